@@ -0,0 +1,92 @@
+# benchmarks/bench_pdf_extraction.py
+"""
+Compares the legacy bulletin parsing path (whole file in a BytesIO, pdfplumber text of the
+hard-coded second page) with RetrieverAgent.parse_apartment_price_pdf, which reads only the
+pages found by the pdfium probe.
+
+Usage:
+    python benchmarks/bench_pdf_extraction.py [bulletin.pdf ...]
+
+Without arguments the synthetic bulletins in benchmarks/fixtures are used (and generated if
+missing).
+"""
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import pdfplumber  # noqa: E402
+
+from benchmarks.fixtures import make_sample_bulletin  # noqa: E402
+from real_estate_assistant.agents.retriever import RetrieverAgent  # noqa: E402
+
+REPEATS = 15
+
+
+def legacy_parse(retriever: RetrieverAgent, pdf_path: str) -> dict:
+    """The pre-locator implementation, kept here as the baseline."""
+    with open(pdf_path, "rb") as f:
+        pdf_file = io.BytesIO(f.read())
+    with pdfplumber.open(pdf_file) as pdf:
+        text = pdf.pages[1].extract_text()
+        lines = text.split('\n')
+    new_lines = retriever.extract_table_from_text(
+        lines, "Average price of new apartment", "Average price of old apartment"
+    )
+    old_lines = retriever.extract_table_from_text(
+        lines, "Average price of old apartment", "Source: Website"
+    )
+    return {
+        "new_apartment_prices": pd.DataFrame(retriever.parse_price_lines(new_lines)),
+        "old_apartment_prices": pd.DataFrame(retriever.parse_price_lines(old_lines)),
+    }
+
+
+def targeted_parse(retriever: RetrieverAgent, pdf_path: str) -> dict:
+    return retriever.parse_apartment_price_pdf(pdf_path)
+
+
+def measure(func, retriever, pdf_path):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(retriever, pdf_path)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(retriever, pdf_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rows = len(result["new_apartment_prices"]) + len(result["old_apartment_prices"])
+    return statistics.median(timings), peak, rows
+
+
+def main(paths):
+    if not paths:
+        if not all(os.path.exists(os.path.join(make_sample_bulletin.FIXTURES_DIR, name))
+                   for name in make_sample_bulletin.SAMPLES):
+            make_sample_bulletin.main()
+        paths = [os.path.join(make_sample_bulletin.FIXTURES_DIR, name)
+                 for name in make_sample_bulletin.SAMPLES]
+
+    retriever = RetrieverAgent()
+    print(f"{'bulletin':<34}{'path':<10}{'median ms':>12}{'peak KiB':>12}{'rows':>6}")
+    for pdf_path in paths:
+        for label, func in (("legacy", legacy_parse), ("targeted", targeted_parse)):
+            try:
+                seconds, peak, rows = measure(func, retriever, pdf_path)
+            except Exception as e:
+                print(f"{os.path.basename(pdf_path):<34}{label:<10}  failed: {e}")
+                continue
+            print(f"{os.path.basename(pdf_path):<34}{label:<10}"
+                  f"{seconds * 1000:>12.1f}{peak / 1024:>12.0f}{rows:>6}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
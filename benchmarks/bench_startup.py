@@ -0,0 +1,105 @@
+# benchmarks/bench_startup.py
+"""
+Startup-time check for the CLI, based on `python -X importtime`.
+
+Imports `main` in a fresh interpreter, reports the cumulative import time and the slowest
+modules, and fails (exit status 1) when the import exceeds the budget or pulls in one of the
+heavy libraries that must only be loaded on first use. Run it in CI next to the other checks:
+
+    python benchmarks/bench_startup.py [--budget-ms 250] [--runs 5]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 250
+
+# Heavy dependencies that must not be imported just to show the first prompt.
+DEFERRED_MODULES = [
+    "faiss",
+    "numpy",
+    "pandas",
+    "pdfplumber",
+    "bs4",
+    "lxml",
+    "requests",
+    "langchain_together",
+    "together",
+    "weasyprint",
+    "aiohttp",
+]
+
+_LINE_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def measure_import(module: str = "main") -> dict:
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+    Returns the cumulative time in ms, the loaded modules and their self times.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total_us = None
+    for line in result.stderr.splitlines():
+        match = _LINE_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        modules[name] = int(self_us)
+        if name == module:
+            total_us = int(cumulative_us)
+    return {"total_ms": (total_us or 0) / 1000, "modules": modules}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--runs", type=int, default=5,
+                        help="Imports to run; the fastest one is compared with the budget")
+    parser.add_argument("--module", default="main")
+    args = parser.parse_args(argv)
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["total_ms"])
+
+    print(f"import {args.module}: best {best['total_ms']:.1f} ms of {args.runs} runs "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print("Slowest modules (self time):")
+    slowest = sorted(best["modules"].items(), key=lambda item: item[1], reverse=True)[:10]
+    for name, self_us in slowest:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    eager = sorted(
+        name for name in DEFERRED_MODULES
+        if any(loaded == name or loaded.startswith(name + ".") for loaded in best["modules"])
+    )
+    if eager:
+        failures.append(f"heavy modules imported at startup: {', '.join(eager)}")
+    if best["total_ms"] > args.budget_ms:
+        failures.append(f"startup {best['total_ms']:.1f} ms exceeds budget of "
+                        f"{args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# benchmarks/fixtures/make_llm_responses.py
+"""
+Records the LLM responses replayed by benchmarks/run_benchmarks.py.
+
+The benchmark is run once with a recording replay backend, so every prompt the pipeline sends
+is captured with its exact hash. By default the answers come from `SyntheticAnalyst`, which
+writes deterministic, realistically sized sections offline; pass `--backend together` (or any
+other LLM_BACKEND name) to record real model output instead.
+
+Usage:
+    python benchmarks/fixtures/make_llm_responses.py [--backend synthetic|together|llamacpp|stub]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from real_estate_assistant.llm import LLMBackend, LLMResponse, ReplayBackend, create_llm  # noqa: E402
+
+_DISTRICT_LINE = re.compile(r'[^\n.]*дүүрэг[^\n.]*')
+
+ANALYSIS = """### Price Position
+The asking price works out to the figure computed above per square meter. Compared with the
+district benchmark from the latest 1212.mn bulletin, this places the unit within the range of
+recent transactions for comparable apartments.
+
+### Location
+The district has steady demand from families and commuters, with schools, kindergartens and
+public transport within walking distance. Newer buildings in the area command a premium over
+Soviet-era blocks, which is reflected in the spread between new and old apartment prices.
+
+### Property Features
+Floor area, floor level and the year of commissioning are the main drivers of value here.
+Recent renovation and heating quality matter to buyers in Ulaanbaatar's winter months.
+
+### Market Trends
+Prices per square meter rose over the past year across most districts, with the fastest growth
+in central districts. Listing volumes remain high, so buyers retain some negotiating power."""
+
+CONCLUSION = """### Overall Assessment
+The assessment computed from price per square meter stands as stated above.
+
+### Key Reasons
+- The price per square meter relative to the district average
+- Location and access to services
+- Building age and condition
+
+### Risks and Considerations
+- Verify ownership documents and any outstanding utility debts
+- Inspect heating, windows and plumbing before winter
+
+### Recommendation
+Request a viewing, compare with two or three similar listings in the same district and
+negotiate on the basis of the price per square meter."""
+
+
+class SyntheticAnalyst(LLMBackend):
+    """Offline stand-in that answers each pipeline prompt with a plausible, fixed-shape response."""
+
+    model = "synthetic-analyst"
+
+    def invoke(self, prompt: str, **kwargs) -> LLMResponse:
+        if "JSON object" in prompt:
+            listing_text = prompt.split("Listing text:", 1)[-1]
+            match = _DISTRICT_LINE.search(listing_text)
+            answer = {"location": match.group(0).strip() if match else "N/A"}
+            return LLMResponse(content=json.dumps(answer, ensure_ascii=False))
+        if "conclusion" in prompt.lower():
+            return LLMResponse(content=CONCLUSION)
+        return LLMResponse(content=ANALYSIS)
+
+
+def main():
+    from benchmarks.run_benchmarks import LLM_RESPONSES, run_benchmarks
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default="synthetic")
+    args = parser.parse_args()
+
+    source = SyntheticAnalyst() if args.backend == "synthetic" else create_llm(args.backend)
+    replay = ReplayBackend(LLM_RESPONSES, record_from=source)
+    replay.recordings = {}  # Drop prompts the pipeline no longer sends
+    run_benchmarks(repeats=1, replay=replay)
+    replay.save()
+    print(f"Recorded {len(replay.recordings)} responses to {LLM_RESPONSES}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/fixtures/make_sample_bulletin.py
+"""
+Writes small synthetic 1212.mn-style monthly bulletins for the benchmarks.
+
+The real bulletins are large and change layout between months, so the fixtures are generated
+with a minimal hand-written PDF writer: the price tables use the same wording as the English
+section of the bulletin, surrounded by filler pages so that page location actually matters.
+"""
+import os
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DISTRICTS = [
+    ("Baganuur", 2.10, 2.15, 2.18, 2.20, 0.10, 4.8),
+    ("Bayangol", 3.77, 4.05, 4.21, 4.41, 0.64, 17.0),
+    ("Bayanzurkh", 3.64, 3.88, 3.95, 4.04, 0.40, 11.0),
+    ("Chingeltei", 3.30, 3.52, 3.60, 3.71, 0.41, 12.4),
+    ("Khan-Uul", 4.60, 4.85, 4.99, 5.10, 0.50, 10.9),
+    ("Songinokhairkhan", 2.71, 3.05, 3.20, 3.33, 0.62, 23.0),
+    ("Sukhbaatar", 3.92, 4.80, 5.12, 5.44, 1.52, 38.7),
+    ("Ulaanbaatar", 3.60, 3.95, 4.08, 4.21, 0.61, 16.9),
+]
+
+FILLER = (
+    "The monthly bulletin summarises consumer prices, housing and construction statistics "
+    "for Ulaanbaatar and the aimags. Figures are preliminary and may be revised."
+)
+
+
+def _table_lines(label: str, scale: float) -> list:
+    lines = [
+        f"Average price of {label} apartment, by district (MNT million per m2)",
+        "District 2024 Mar 2025 Jan 2025 Feb 2025 Mar Value Percent",
+    ]
+    for name, *values in DISTRICTS:
+        scaled = [v * scale for v in values[:5]] + [values[5]]
+        lines.append(name + " " + " ".join(f"{v:.2f}" for v in scaled))
+    return lines
+
+
+def _bulletin_pages(table_page: int, total_pages: int) -> list:
+    pages = []
+    for number in range(total_pages):
+        if number == table_page:
+            lines = ["Housing market", ""]
+            lines += _table_lines("new", 1.0) + [""]
+            lines += _table_lines("old", 0.72) + [""]
+            lines.append("Source: Website of the National Statistics Office")
+        else:
+            lines = [f"Monthly bulletin - page {number + 1}", ""] + [FILLER] * 30
+        pages.append(lines)
+    return pages
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: list):
+    """Writes text-only pages with the standard Helvetica font."""
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for lines in pages:
+        stream = ["BT", "/F1 8 Tf", "10 TL", "40 800 Td"]
+        for line in lines:
+            stream.append(f"({_escape(line[:110])}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1")
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append((content_id,
+                        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream"))
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1")))
+        page_ids.append(page_id)
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append((1, b"<< /Type /Catalog /Pages 2 0 R >>"))
+    page_tree = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"
+    objects.append((2, page_tree.encode("latin-1")))
+    objects.append((font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"))
+    objects.sort()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n" % obj_id + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for obj_id in range(1, len(objects) + 1):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += (b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (len(objects) + 1, xref_offset))
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+SAMPLES = {
+    # Same layout as the current bulletin: table on the second page.
+    "bulletin_2025_03.pdf": (1, 12),
+    # Layout shifted by extra front matter: table on the fifth page.
+    "bulletin_2025_03_shifted.pdf": (4, 24),
+}
+
+
+def main():
+    for name, (table_page, total_pages) in SAMPLES.items():
+        path = os.path.join(FIXTURES_DIR, name)
+        write_pdf(path, _bulletin_pages(table_page, total_pages))
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
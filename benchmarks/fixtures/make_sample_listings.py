@@ -0,0 +1,94 @@
+# benchmarks/fixtures/make_sample_listings.py
+"""
+Writes saved-page stand-ins for unegui.mn listings used by the benchmarks.
+
+The pages reproduce the parts of the live markup the parser relies on (announcement section
+with data-price, chars-column characteristics, description, breadcrumbs) inside the same kind
+of boilerplate the real pages carry: inline scripts, styles, navigation and a long footer.
+"""
+import os
+
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__))
+LISTINGS_DIR = os.path.join(FIXTURES_DIR, "listings")
+
+LISTINGS = {
+    "9129580": {
+        "title": "Төмөр замд 2 өрөө байр зарна",
+        "price": 239000000,
+        "district": "Баянгол дүүрэг",
+        "chars": [("Талбай:", "49.5 м²"), ("Өрөө:", "2"), ("Барилгын давхар:", "12"),
+                  ("Ашиглалтад орсон он:", "2016")],
+        "description": "Төмөр замд 2 өрөө байр зарна. Нарлаг, дулаан, шинэ засвартай. "
+                       "Сургууль цэцэрлэг ойрхон.",
+    },
+    "9287714": {
+        "title": "Хан-Уулд 3 өрөө шинэ байр",
+        "price": 330000000,
+        "district": "Хан-Уул дүүрэг",
+        "chars": [("Талбай:", "65 м²"), ("Өрөө:", "3"), ("Барилгын давхар:", "16"),
+                  ("Ашиглалтад орсон он:", "2021")],
+        "description": "Зайсангийн гудамжинд 3 өрөө байр. Граж, агуулахтай. Хотын төвд 15 минут.",
+    },
+    # No district in the breadcrumbs: the location has to come from the text.
+    "9341198": {
+        "title": "Бгд 4 хороололд 1 өрөө 17 мк байр",
+        "price": 65000000,
+        "district": None,
+        "chars": [("Талбай:", "17 м²"), ("Өрөө:", "1")],
+        "description": "Шууд нүүж ороход бэлэн. Баянгол дүүрэг 4-р хороолол, "
+                       "автобусны буудалд ойрхон.",
+    },
+}
+
+_SCRIPT = ("window.dataLayer = window.dataLayer || []; "
+           "function gtag(){dataLayer.push(arguments);} ") * 40
+_STYLE = ".announcement-block{margin:0 auto;padding:12px}.chars-column li{display:flex} " * 60
+_NAV = "".join(f"<li><a href='/l-hdlh/{i}/'>Ангилал {i}</a></li>" for i in range(120))
+_FOOTER = "".join(f"<p><a href='/info/{i}'>Тусламж, үйлчилгээний нөхцөл {i}</a></p>"
+                  for i in range(80))
+_SIMILAR = "".join(
+    f"<div class='advert'><a href='/adv/{9000000 + i}/'>Зар {i}</a>"
+    f"<span>{100 + i} сая ₮</span></div>"
+    for i in range(40)
+)
+
+
+def listing_html(listing: dict) -> str:
+    crumbs = "<a href='/'>Нүүр</a><a href='/l-hdlh/'>Үл хөдлөх</a>"
+    if listing["district"]:
+        crumbs += f"<a href='/l-hdlh/d/'>{listing['district']}</a>"
+    chars = "".join(
+        f"<li><span class='key-chars'>{key}</span><a class='value-chars'>{value}</a></li>"
+        for key, value in listing["chars"]
+    )
+    return (
+        "<!DOCTYPE html><html lang='mn'><head><meta charset='utf-8'>"
+        f"<title>{listing['title']} - unegui.mn</title>"
+        f"<meta property='og:title' content='{listing['title']}'>"
+        f"<style>{_STYLE}</style><script>{_SCRIPT}</script></head><body>"
+        f"<header><nav><ul>{_NAV}</ul></nav>"
+        f"<form><input name='q'><button>Хайх</button></form></header>"
+        f"<div class='breadcrumbs'>{crumbs}</div>"
+        f"<section class='list-announcement' data-price='{listing['price']}'>"
+        f"<h1>{listing['title']}</h1>"
+        f"<div class='announcement-price'><span class='announcement-price__value'>"
+        f"{listing['price'] / 1e6:.0f} сая ₮</span></div>"
+        f"<ul class='chars-column'>{chars}</ul>"
+        f"<div class='announcement-description'>\n  {listing['description']}\n</div>"
+        "</section>"
+        f"<aside class='similar'>{_SIMILAR}</aside>"
+        f"<footer>{_FOOTER}</footer><script>{_SCRIPT}</script></body></html>"
+    )
+
+
+def main():
+    os.makedirs(LISTINGS_DIR, exist_ok=True)
+    for listing_id, listing in LISTINGS.items():
+        path = os.path.join(LISTINGS_DIR, f"{listing_id}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(listing_html(listing))
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# benchmarks/run_benchmarks.py
+"""
+End-to-end pipeline benchmark on recorded fixtures, timed stage by stage.
+
+Everything runs offline: listing pages and the bulletin PDF are served by a local HTTP server
+from benchmarks/fixtures, and LLM calls are answered from benchmarks/fixtures/llm_responses.json
+by the replay backend. The result is written as JSON; with --baseline, stages that got slower
+than the tolerance are reported and the exit status is 1.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--repeats 5] [--output benchmarks/results/latest.json]
+                                        [--baseline benchmarks/results/baseline.json]
+                                        [--tolerance 0.25] [--update-baseline]
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_sample_bulletin, make_sample_listings  # noqa: E402
+from real_estate_assistant.agents.build_index import build_faiss_index, combine_texts, embed_texts  # noqa: E402
+from real_estate_assistant.agents.extractor import HybridExtractor  # noqa: E402
+from real_estate_assistant.agents.researcher import compact_listing_html  # noqa: E402
+from real_estate_assistant.agents.retriever import RetrieverAgent  # noqa: E402
+from real_estate_assistant.agents.writer import WriterAgent, extract_market_context  # noqa: E402
+from real_estate_assistant.comparables import ComparablesIndex  # noqa: E402
+from real_estate_assistant.dedupe import Deduplicator  # noqa: E402
+from real_estate_assistant.generate_pdf import (  # noqa: E402
+    create_pdf_report,
+    generate_html_report,
+    load_weasyprint,
+)
+from real_estate_assistant.llm import InstrumentedLLM, ReplayBackend  # noqa: E402
+from real_estate_assistant.pipeline import Pipeline  # noqa: E402
+from real_estate_assistant.report_cache import ReportCache  # noqa: E402
+from real_estate_assistant.report_formats import render_report  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = make_sample_bulletin.FIXTURES_DIR
+LLM_RESPONSES = os.path.join(FIXTURES_DIR, "llm_responses.json")
+BULLETIN = "bulletin_2025_03.pdf"
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "results", "baseline.json")
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 1.0  # Ignore differences below timer noise
+COMPARABLES_STORE_SIZE = 20_000
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def fixture_server():
+    """Serves benchmarks/fixtures on an ephemeral localhost port; yields the base URL."""
+    handler = functools.partial(_QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def ensure_fixtures():
+    if not all(os.path.exists(os.path.join(FIXTURES_DIR, name))
+               for name in make_sample_bulletin.SAMPLES):
+        make_sample_bulletin.main()
+    if not all(os.path.exists(os.path.join(make_sample_listings.LISTINGS_DIR, f"{listing_id}.html"))
+               for listing_id in make_sample_listings.LISTINGS):
+        make_sample_listings.main()
+
+
+class StageTimer:
+    def __init__(self, repeats: int):
+        self.repeats = repeats
+        self.results = {}
+
+    def run(self, name: str, func, items: int = 1):
+        """Times `func` `repeats` times with its output silenced; returns the last result."""
+        timings, result = [], None
+        for _ in range(self.repeats):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                result = func()
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.results[name] = {
+            "median_ms": round(statistics.median(timings), 3),
+            "min_ms": round(timings[0], 3),
+            "max_ms": round(timings[-1], 3),
+            "runs": len(timings),
+            "items": items,
+        }
+        print(f"  {name:<16}{self.results[name]['median_ms']:>10.2f} ms  "
+              f"(min {timings[0]:.2f}, {items} items)")
+        return result
+
+    def skip(self, name: str, reason: str):
+        self.results[name] = {"skipped": reason}
+        print(f"  {name:<16}{'skipped':>10}     ({reason})")
+
+
+def synthetic_store(listings: list, size: int = COMPARABLES_STORE_SIZE, seed: int = 0) -> list:
+    """A deterministic local store for the comparables stage: variations of the fixtures."""
+    import random
+
+    from real_estate_assistant.listing import Listing
+
+    rng = random.Random(seed)
+    store = []
+    for i in range(size):
+        template = listings[i % len(listings)]
+        area = round(template.area_m2 * rng.uniform(0.7, 1.3), 1)
+        price_per_m2 = template.price_mnt / template.area_m2 * rng.uniform(0.8, 1.2)
+        rooms = template.rooms if rng.random() < 0.8 else template.rooms + 1
+        store.append(Listing(url=f"https://www.unegui.mn/adv/{7000000 + i}/", title=template.title,
+                             location=template.location, description=template.description,
+                             price_mnt=round(price_per_m2 * area, -5), area_m2=area, rooms=rooms,
+                             district=template.resolved_district))
+    return store
+
+
+def run_benchmarks(repeats: int = DEFAULT_REPEATS, replay: ReplayBackend = None) -> dict:
+    """
+    Runs every stage; `replay` defaults to the recorded responses (the recorder passes its own).
+    """
+    ensure_fixtures()
+    timer = StageTimer(repeats)
+    replay = replay or ReplayBackend(LLM_RESPONSES)
+    llm = InstrumentedLLM(replay)
+
+    with fixture_server() as base_url, tempfile.TemporaryDirectory() as tmp:
+        import requests
+
+        retriever = RetrieverAgent(session=requests.Session())
+        urls = [f"{base_url}/listings/{listing_id}.html"
+                for listing_id in make_sample_listings.LISTINGS]
+
+        html_pages = timer.run("fetch", lambda: [retriever.fetch_listing_data(url) for url in urls],
+                               len(urls))
+        pages = dict(zip(urls, html_pages))
+        timer.run("parse",
+                  lambda: [retriever.parse_listing_html(html, url) for url, html in pages.items()],
+                  len(pages))
+        timer.run("compact", lambda: [compact_listing_html(html) for html in html_pages],
+                  len(pages))
+
+        extractor = HybridExtractor(retriever, llm_client=llm)
+        listings = timer.run("extract_hybrid",
+                             lambda: [extractor.extract_from_html(html, url)
+                                      for url, html in pages.items()],
+                             len(pages))
+        timer.run("dedupe", lambda: Deduplicator().filter(listings), len(listings))
+
+        def download():
+            path = retriever.download_pdf(f"{base_url}/{BULLETIN}")
+            os.remove(path)
+        timer.run("pdf_download", download)
+        bulletin = os.path.join(FIXTURES_DIR, BULLETIN)
+        market_data = timer.run("pdf_extract",
+                                lambda: retriever.parse_apartment_price_pdf(bulletin))
+
+        # Embedding is not timed: build_index.embed_texts is a hash-based placeholder, not a model
+        texts = combine_texts(listings, market_data)
+        vectors = embed_texts(texts)
+        index = timer.run("index_build", lambda: build_faiss_index(vectors), len(texts))
+        timer.run("index_search", lambda: index.search(vectors, 3), len(texts))
+
+        store = synthetic_store(listings)
+        comparables = timer.run("comp_index", lambda: ComparablesIndex.from_listings(store),
+                                len(store))
+        timer.run("comparables", lambda: [comparables.search(listing) for listing in listings],
+                  len(listings))
+
+        contexts = timer.run("market_context",
+                             lambda: [extract_market_context(market_data, listing, comparables)
+                                      for listing in listings],
+                             len(listings))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = WriterAgent(llm=llm)
+        reports = timer.run("report_data",
+                            lambda: [writer.generate_report_data(listing, context)
+                                     for listing, context in zip(listings, contexts)],
+                            len(listings))
+        with contextlib.redirect_stdout(io.StringIO()):
+            cached_writer = WriterAgent(llm=llm,
+                                        report_cache=ReportCache(os.path.join(tmp, "report_cache")))
+        for listing, context in zip(listings, contexts):
+            cached_writer.generate_report_data(listing, context)
+        timer.run("report_cached",
+                  lambda: [cached_writer.generate_report_data(listing, context)
+                           for listing, context in zip(listings, contexts)],
+                  len(listings))
+        timer.run("html", lambda: [generate_html_report(report) for report in reports],
+                  len(reports))
+        timer.run("markdown", lambda: [render_report(report, "markdown") for report in reports],
+                  len(reports))
+        timer.run("json", lambda: [render_report(report, "json") for report in reports],
+                  len(reports))
+
+        # Fetch, extract, market context and report for every listing at once on the async pipeline
+        with Pipeline(writer, retriever=retriever, bulletin_url=f"{base_url}/{BULLETIN}",
+                      comparables=comparables) as pipeline:
+            pipeline.market_data()
+            timer.run("analyze_many", lambda: pipeline.analyze_many(urls), len(urls))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            weasyprint = load_weasyprint()
+        if weasyprint:
+            timer.run("pdf_render",
+                      lambda: [create_pdf_report(report, os.path.join(tmp, f"report_{i}.pdf"))
+                               for i, report in enumerate(reports)],
+                      len(reports))
+        else:
+            timer.skip("pdf_render", "weasyprint not available")
+
+    if replay.misses and replay.record_from is None:
+        print(f"Warning: {replay.misses} LLM prompts were not in {os.path.relpath(LLM_RESPONSES)}; "
+              f"re-record with benchmarks/fixtures/make_llm_responses.py")
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "llm_replay": {"hits": replay.hits, "misses": replay.misses},
+        "stages": timer.results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Stages whose median grew by more than `tolerance` (and by at least MIN_REGRESSION_MS).
+    A few slow repeats can push a median up on a busy machine, so the fastest run must have
+    slowed down by the tolerance as well; otherwise the change is treated as noise.
+    """
+    regressions = []
+    for name, result in report["stages"].items():
+        before = baseline.get("stages", {}).get(name, {})
+        if "median_ms" not in result or "median_ms" not in before:
+            continue
+        now, then = result["median_ms"], before["median_ms"]
+        result["baseline_ms"] = then
+        result["change_pct"] = round((now - then) / then * 100, 1) if then else None
+        slower = now > then * (1 + tolerance) and now - then >= MIN_REGRESSION_MS
+        fastest_slower = result["min_ms"] > before.get("min_ms", then) * (1 + tolerance)
+        if slower and fastest_slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-stage pipeline benchmark on recorded fixtures")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown per stage as a fraction (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write this run as the new baseline")
+    args = parser.parse_args()
+
+    print(f"Running pipeline stages ({args.repeats} repeats, median shown):")
+    report = run_benchmarks(args.repeats)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+
+    for path in [args.output] + ([args.baseline] if args.update_baseline else []):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+
+    if regressions:
+        stages = report["stages"]
+        print(f"Regressions over {args.tolerance:.0%}: " + ", ".join(
+            f"{name} ({stages[name]['baseline_ms']:.2f} -> {stages[name]['median_ms']:.2f} ms)"
+            for name in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,110 @@
+import argparse
+import logging
+
 from dotenv import load_dotenv
 
-from real_estate_assistant.agents.build_index import build_vector_store
-from real_estate_assistant.agents.retriever import RetrieverAgent
-from real_estate_assistant.agents.writer import WriterAgent, extract_market_context
+from real_estate_assistant.agents.router import RouterAgent
+from real_estate_assistant.agents.writer import WriterAgent
+from real_estate_assistant.llm import format_usage, track_usage
+from real_estate_assistant.pipeline import Pipeline
+from real_estate_assistant.report_cache import ReportCache
+from real_estate_assistant.report_formats import FORMATS
+from real_estate_assistant.tracing import configure_tracing
+from real_estate_assistant.utils import configure_logging
 
 load_dotenv()
 
 def main():
+    parser = argparse.ArgumentParser(description="Real Estate Assistant")
+    parser.add_argument("--no-llm", action="store_true",
+                        help="Skip the LLM and narrate the deterministic price/m² verdict "
+                             "(fast path)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run as a long-lived HTTP service with /analyze and /search endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent analyses in server mode")
+    parser.add_argument("--max-queue", type=int, default=32,
+                        help="Pending requests accepted before the server answers 503")
+    parser.add_argument("--stub-llm", action="store_true",
+                        help="Use the deterministic offline stub instead of the Together API")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always write the report anew instead of reusing one for the same "
+                             "listing and data")
+    parser.add_argument("--format", choices=FORMATS, default="pdf",
+                        help="Report format; json, html and markdown skip the PDF renderer")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Report on every listing URL in FILE (one per line) instead of "
+                             "asking for a query")
+    parser.add_argument("--zip", action="store_true",
+                        help="With --batch, write one PDF per listing into a zip archive instead "
+                             "of one combined PDF")
+    parser.add_argument("--output", help="With --batch, where to write the PDF or zip archive")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Append per-stage timing spans as JSON lines to FILE "
+                             "(or set TRACE_JSONL)")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("--debug", action="store_true",
+                           help="Log full payloads: listing details, price tables and prompts")
+    verbosity.add_argument("-q", "--quiet", action="store_true",
+                           help="Only log warnings and errors")
+    args = parser.parse_args()
+
+    configure_logging(logging.DEBUG if args.debug
+                      else logging.WARNING if args.quiet else logging.INFO)
+
+    if args.serve:
+        from real_estate_assistant.server import run_server
+
+        run_server(host=args.host, port=args.port, stub_llm=args.stub_llm, use_llm=not args.no_llm,
+                   max_workers=args.workers, max_queue=args.max_queue, trace_file=args.trace)
+        return
+
+    configure_tracing(args.trace)
+
+    if args.batch:
+        run_batch(args)
+        return
+
     print("🏠 Welcome to the Real Estate Assistant!")
-    query = input("\n🔍 Enter your query (property URL or description like 'apartments in Khan-Uul'):\n> ")
+    query = input("\n🔍 Enter your query (property URL or description like "
+                  "'apartments in Khan-Uul'):\n> ")
 
-    # Classify query type
-    if query.startswith("http"):
-        query_type = "q1"  # URL-based query
-    else:
-        query_type = "q2"  # General location-based query
+    # Classify query type: q1 = listing URL, q2 = general location-based query
+    decision = RouterAgent().route(query)
+    query_type = decision.label
 
-    print(f"\n📌 Query classified as: {query_type}")
+    print(f"\n📌 Query classified as: {query_type} "
+          f"(by {decision.tier}, {decision.elapsed_us:.0f} µs)")
 
-    retriever = RetrieverAgent()
-    writer = WriterAgent()
+    writer = WriterAgent(use_llm=not args.no_llm,
+                         report_cache=None if args.no_cache else ReportCache())
+    with Pipeline(writer) as pipeline:
+        run_workflow(pipeline, query_type, query, decision, args)
 
+def run_workflow(pipeline, query_type, query, decision, args):
+    """Workflow 1 (a listing URL) or 2 (a location search), on the pipeline's warm agents."""
     if query_type == "q1":
         # --- Workflow 1: Analyze Single URL ---
         print("\n🚧 Starting Workflow 1: Analyzing URL...")
         
-        listing_details = retriever.extract_listing_details(query)
-        if "error" in listing_details:
-            print(f"❌ Error during extraction: {listing_details['error']}")
+        listing_details = pipeline.extract(decision.url)
+        if listing_details.error:
+            print(f"❌ Error during extraction: {listing_details.error}")
             return
 
         # Get market context from PDF and other data
-        _, market_data = build_vector_store([query])
-        market_context = extract_market_context(market_data)
+        market_data = pipeline.market_data()
+        pipeline.write_vector_store([listing_details], market_data)
+        market_context = pipeline.market_context(listing_details, market_data)
 
         # Generate PDF report (with translation option)
-        translate = input("\n🌐 Do you want the report in Mongolian? (y/n):\n> ").lower().startswith("y")
-        pdf_path = writer.generate_pdf_report(listing_details, market_context, translate=translate)
+        translate = (input("\n🌐 Do you want the report in Mongolian? (y/n):\n> ")
+                     .lower().startswith("y"))
+        report_path = pipeline.save_report(listing_details, market_context, translate, args.format)
         
         print("\n✅ --- Analysis Completed ---")
-        print(f"📄 PDF report saved to: {pdf_path}")
+        print(f"📄 Report saved to: {report_path}")
 
     elif query_type == "q2":
         # --- Workflow 2: General Search + Selection ---
@@ -47,7 +112,7 @@ def main():
 
         location = query
         property_type = input("🏢 Enter property type (e.g., apartment, house):\n> ")
-        search_results = retriever.search_general_listings(location, property_type)
+        search_results = pipeline.retriever.search_general_listings(location, property_type)
 
         if not search_results:
             print("⚠️ No results found. Try a different location or property type.")
@@ -71,24 +136,49 @@ def main():
             print("❌ Invalid selection. Please try again.")
             return
 
-        listing_details = retriever.extract_listing_details(selected_listing["url"])
-        if "error" in listing_details:
-            print(f"❌ Error during extraction: {listing_details['error']}")
+        listing_details = pipeline.extract(selected_listing["url"])
+        if listing_details.error:
+            print(f"❌ Error during extraction: {listing_details.error}")
             return
 
         # Get market context from 1212.mn data
-        _, market_data = build_vector_store([selected_listing["url"]])
-        market_context = extract_market_context(market_data)
+        market_data = pipeline.market_data()
+        pipeline.write_vector_store([listing_details], market_data)
+        market_context = pipeline.market_context(listing_details, market_data)
 
         # Generate PDF report (with optional translation)
-        translate = input("\n🌐 Do you want the report in Mongolian? (y/n):\n> ").lower().startswith("y")
-        pdf_path = writer.generate_pdf_report(listing_details, market_context, translate=translate)
+        translate = (input("\n🌐 Do you want the report in Mongolian? (y/n):\n> ")
+                     .lower().startswith("y"))
+        report_path = pipeline.save_report(listing_details, market_context, translate, args.format)
 
         print("\n✅ --- Analysis Completed ---")
-        print(f"📄 PDF report saved to: {pdf_path}")
+        print(f"📄 Report saved to: {report_path}")
 
     else:
         print("⚠️ Unknown query type. Please try again.")
 
+def run_batch(args):
+    """Portfolio review: every URL in the batch file into one combined PDF or a zip of PDFs."""
+    with open(args.batch, encoding="utf-8") as f:
+        urls = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    writer = WriterAgent(use_llm=not args.no_llm,
+                         report_cache=None if args.no_cache else ReportCache())
+    with Pipeline(writer) as pipeline, track_usage("batch") as usage:
+        print(f"\n🚧 Analyzing {len(urls)} listings...")
+        listings = pipeline.extract_many(urls)
+        for listing in listings:
+            if listing.error:
+                print(f"⚠️ Skipping {listing.url}: {listing.error}")
+
+        output_path = pipeline.batch_pdf_report(listings, archive=args.zip, output_path=args.output)
+    if output_path.startswith("Error:"):
+        print(f"❌ {output_path}")
+        return
+    print("\n✅ --- Analysis Completed ---")
+    print(f"📄 {'Archive' if args.zip else 'PDF report'} saved to: {output_path}")
+    if not args.no_llm:
+        print(f"🧮 {format_usage(usage.summary())}")
+
 if __name__ == "__main__":
     main()
@@ -1,54 +1,20 @@
-from together import Together
 import re  # For URL detection
-import requests  # For fetching HTML in workflow1
-
-client = Together()  # auth defaults to os.environ.get("TOGETHER_API_KEY")
-
-ROUTER_AGENT_PROMPT_TEMPLATE = """You are an intelligent assistant in a multi-agent real estate analysis system.
-
-Your task is to classify a user's query into one of two types:
-
-1. **q1 (Link query):** The user includes a specific URL to a real estate listing (e.g., unegui.mn or 1212.mn or remax.mn)
-2. **q2 (General interest query):** The user is generally interested in a location or type of apartment but does not include a specific link.
 
-Based on the input, respond only with one of these options:  
-→ `q1` if the input contains a real estate listing URL  
-→ `q2` if it describes a type of property or location but doesn't have a URL  
-
-Do not explain your reasoning. Output only `q1` or `q2`.
+import requests  # For fetching HTML in workflow1
 
----
+from real_estate_assistant.agents.router import RouterAgent
+from real_estate_assistant.llm import LLMBackend, create_llm
 
-Input: {user_query}
-Output:"""
+client = create_llm()  # LLM_BACKEND selects together (default), llamacpp, replay or stub
 
-def classify_query(user_query: str, llm_client: Together) -> str:
+def classify_query(user_query: str, llm_client: LLMBackend) -> str:
     """
     Classifies the user query as 'q1' or 'q2' using the RouterAgent.
+    Listing URLs and clear keyword queries are decided locally; the LLM only sees ambiguous input.
     """
-    url_pattern = re.compile(r'https?://(?:www\.)?(unegui\.mn|1212\.mn|remax\.mn)[^\s]*', re.IGNORECASE)
-    if url_pattern.search(user_query):
-        pass
-
-    prompt = ROUTER_AGENT_PROMPT_TEMPLATE.format(user_query=user_query)
-    
-    try:
-        response = llm_client.chat.completions.create(
-            model="meta-llama/Llama-4-Maverick-17B-128E-Instruct-FP8",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=5
-        )
-        classification = response.choices[0].message.content.strip().lower()
-        if classification in ['q1', 'q2']:
-            return classification
-        else:
-            print(f"Warning: LLM returned unexpected classification: {classification}")
-            return 'q1' if url_pattern.search(user_query) else 'q2'
-    except Exception as e:
-        print(f"Error during LLM call for classification: {e}")
-        return 'q1' if url_pattern.search(user_query) else 'q2'
+    decision = RouterAgent(llm_client=llm_client).route(user_query)
+    print(f"Router decision made by the {decision.tier} tier ({decision.elapsed_us:.0f} µs)")
+    return decision.label
 
 def workflow1_retriever(url: str) -> str:
     """
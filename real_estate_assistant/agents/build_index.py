@@ -1,33 +1,36 @@
+import logging
+import os
 import pickle
 
-import faiss
-import numpy as np
-
+from ..dedupe import Deduplicator
+from ..listing import as_listing
+from ..tracing import current_span, traced
 from .retriever import RetrieverAgent
 
+DEFAULT_INDEX_PATH = "vector_store.index"
+DEFAULT_DATA_PATH = "vector_data.pkl"
+
+logger = logging.getLogger(__name__)
+
+
+def dedupe_path(output_index=DEFAULT_INDEX_PATH) -> str:
+    """Where the store's Deduplicator is kept: next to the index, e.g. vector_store.dedupe.pkl."""
+    return os.path.splitext(output_index)[0] + ".dedupe.pkl"
+
+
 
 def dummy_embedder(text):
     # Simple deterministic vectorizer - replace with your actual embedding model
     import hashlib
+
+    import numpy as np
+
     hash_bytes = hashlib.md5(text.encode("utf-8")).digest()
     vec = np.frombuffer(hash_bytes, dtype=np.uint8).astype(np.float32)
     return vec / 255.0  # normalize to [0,1]
 
-def build_vector_store(
-    listing_urls,
-    output_index="vector_store.index",
-    output_data="vector_data.pkl"
-):
-    retriever = RetrieverAgent()
-    print("Extracting listings...")
-    listings = []
-    for url in listing_urls:
-        details = retriever.extract_listing_details(url)
-        listings.append(details)
-
-    print("Extracting apartment price data from PDF...")
-    price_data = retriever.extract_apartment_price_from_pdf()
-
+def combine_texts(listings, price_data):
+    """One text per listing plus one per market price table, in the order they are indexed."""
     # Convert price DataFrames to string for embedding
     price_texts = []
     if "new_apartment_prices" in price_data and price_data["new_apartment_prices"] is not None:
@@ -36,41 +39,190 @@ def build_vector_store(
         price_texts.append(price_data["old_apartment_prices"].to_string())
 
     # Combine all text data to build vectors
-    combined_texts = []
-
-    for listing in listings:
-        parts = [
-            listing.get("title", ""),
-            listing.get("price", ""),
-            listing.get("location", ""),
-            listing.get("area", ""),
-            listing.get("bedrooms", ""),
-            listing.get("description", "")
-        ]
-        combined_texts.append(" | ".join(parts))
-
+    combined_texts = [listing_text(listing) for listing in listings]
     combined_texts.extend(price_texts)
+    return combined_texts
+
+def listing_text(listing):
+    """The text a listing is embedded and stored as."""
+    listing = as_listing(listing)
+    parts = [
+        listing.title,
+        listing.price_text,
+        listing.location,
+        listing.area_text,
+        f"{listing.rooms_text} rooms",
+        listing.description
+    ]
+    return " | ".join(parts)
+
+@traced("index.embed")
+def embed_texts(texts):
+    import numpy as np
+
+    current_span().set(texts=len(texts))
+    return np.array([dummy_embedder(text) for text in texts]).astype("float32")
+
+@traced("index.build")
+def build_faiss_index(vectors):
+    import faiss
+
+    current_span().set(vectors=len(vectors))
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    return index
+
+@traced("index.build_vector_store")
+def build_vector_store(
+    listing_urls,
+    output_index=DEFAULT_INDEX_PATH,
+    output_data=DEFAULT_DATA_PATH,
+    deduplicator: Deduplicator = None
+):
+    """
+    Extracts the listings and the market tables and indexes them. Reposts of a listing already
+    seen by the store are left out of the index (see write_vector_store).
+    """
+    retriever = RetrieverAgent()
+    listings = retriever.extract_many(listing_urls)
+
+    logger.info("Extracting apartment price data from PDF")
+    price_data = retriever.extract_apartment_price_from_pdf()
 
-    print(f"Converting {len(combined_texts)} texts to vectors...")
-    vectors = np.array([dummy_embedder(text) for text in combined_texts]).astype("float32")
+    write_vector_store(listings, price_data, output_index, output_data, deduplicator)
 
-    # Build FAISS index
-    dim = vectors.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(vectors)
+    # Return first listing + price data for testing purposes
+    return listings[0], price_data
+
+@traced("index.write_vector_store")
+def write_vector_store(
+    listings,
+    price_data,
+    output_index=DEFAULT_INDEX_PATH,
+    output_data=DEFAULT_DATA_PATH,
+    deduplicator: Deduplicator = None
+):
+    """
+    Indexes already extracted listings and market tables (the second half of
+    build_vector_store). Failed listings and reposts are left out. Returns the number of rows.
+    Reposts are found with the store's Deduplicator, saved next to the index so that it covers
+    every listing the store has seen; it is loaded from there unless `deduplicator` is given.
+    """
+    import faiss
+
+    if deduplicator is None:
+        deduplicator = Deduplicator.load(dedupe_path(output_index))
+    unique_listings = deduplicator.filter([listing for listing in listings
+                                           if listing.error is None])
+
+    combined_texts = combine_texts(unique_listings, price_data)
 
-    print(f"Saving FAISS index to {output_index} and data to {output_data}...")
+    logger.info("Converting %d texts to vectors", len(combined_texts))
+    index = build_faiss_index(embed_texts(combined_texts))
+
+    logger.info("Saving FAISS index to %s and data to %s", output_index, output_data)
     faiss.write_index(index, output_index)
 
     with open(output_data, "wb") as f:
         pickle.dump(combined_texts, f)
+    deduplicator.save(dedupe_path(output_index))
 
-    print("Build complete.")
+    logger.info("Build complete")
+    return len(combined_texts)
 
-    # Return first listing + price data for testing purposes
-    return listings[0], price_data
+@traced("index.update_vector_store")
+def update_vector_store(
+    changes,
+    output_index=DEFAULT_INDEX_PATH,
+    output_data=DEFAULT_DATA_PATH,
+    deduplicator: Deduplicator = None
+):
+    """
+    Applies recrawled listings to an existing store without rebuilding it: `changes` is a list of
+    (previous, current) listings, previous None for new ones. Only the current listings are
+    embedded; the rows of the previous versions are removed. New listings that repost one the
+    store has already seen are not added. Returns the number of rows added.
+    """
+    import faiss
+    import numpy as np
+
+    if not changes:
+        return 0
+    if deduplicator is None:
+        deduplicator = Deduplicator.load(dedupe_path(output_index))
+    changes = [(previous, current) for previous, current in changes
+               if previous is not None or current is None or deduplicator.add(current) is None]
+    index = faiss.read_index(output_index)
+    with open(output_data, "rb") as f:
+        combined_texts = pickle.load(f)
+
+    positions = {text: position for position, text in enumerate(combined_texts)}
+    previous_texts = (listing_text(previous) for previous, _ in changes if previous is not None)
+    stale = sorted({positions[text] for text in previous_texts if text in positions})
+    if stale:
+        index.remove_ids(np.array(stale, dtype="int64"))  # Later rows shift down, as in the list
+        stale_set = set(stale)
+        combined_texts = [text for position, text in enumerate(combined_texts)
+                          if position not in stale_set]
+
+    new_texts = [listing_text(current) for _, current in changes if current is not None]
+    if new_texts:
+        index.add(embed_texts(new_texts))
+        combined_texts.extend(new_texts)
+    current_span().set(removed=len(stale), added=len(new_texts), rows=index.ntotal)
+
+    faiss.write_index(index, output_index)
+    with open(output_data, "wb") as f:
+        pickle.dump(combined_texts, f)
+    deduplicator.save(dedupe_path(output_index))
+    logger.info("Vector store updated: %d rows replaced or removed, %d added", len(stale),
+                len(new_texts))
+    return len(new_texts)
+
+class VectorStore:
+    """
+    A store written by write_vector_store, loaded once and kept in memory for searching, with
+    the Deduplicator of the listings it has seen.
+    """
+
+    def __init__(self, index, texts: list, deduplicator: Deduplicator = None):
+        self.index = index
+        self.texts = texts
+        self.deduplicator = deduplicator if deduplicator is not None else Deduplicator()
+
+    @classmethod
+    def load(cls, output_index=DEFAULT_INDEX_PATH, output_data=DEFAULT_DATA_PATH):
+        """Reads the index and its texts; returns None when the store has not been built yet."""
+        import faiss
+
+        if not (os.path.exists(output_index) and os.path.exists(output_data)):
+            return None
+        index = faiss.read_index(output_index)
+        with open(output_data, "rb") as f:
+            texts = pickle.load(f)
+        logger.info("Loaded vector store %s (%d rows)", output_index, index.ntotal)
+        return cls(index, texts, Deduplicator.load(dedupe_path(output_index)))
+
+    def __len__(self):
+        return self.index.ntotal
+
+    @traced("index.search")
+    def search(self, query: str, k: int = 5) -> list:
+        """The `k` stored texts nearest to `query`, closest first, with their L2 distances."""
+        if not len(self):
+            return []
+        distances, positions = self.index.search(embed_texts([query]), min(k, len(self)))
+        current_span().set(k=k)
+        return [
+            {"text": self.texts[position], "distance": float(distance)}
+            for distance, position in zip(distances[0], positions[0])
+            if position >= 0
+        ]
 
 if __name__ == "__main__":
+    from ..utils import configure_logging
+
+    configure_logging()
     listing_details, market_data = build_vector_store(
         listing_urls=["https://www.unegui.mn/adv/9129580_tomor-zamd-2-oroo-zarna/"]
     )
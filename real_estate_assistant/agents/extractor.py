@@ -0,0 +1,167 @@
+# real_estate_assistant/agents/extractor.py
+import logging
+
+from ..listing import NOT_FOUND, Listing
+from ..llm import LLMBackend
+from ..tracing import traced
+from ..utils import count_tokens, extract_json_object
+from .researcher import compact_listing_html
+from .retriever import RetrieverAgent
+
+# Fields the LLM may fill in, with the hint given to it and the page sections that hold them
+FIELD_HINTS = {
+    "title": "the listing headline",
+    "price": "the asking price with its currency, e.g. '239 сая ₮'",
+    "location": "the district (дүүрэг) and khoroo or street address",
+    "area": "the floor area with its unit, e.g. '49.5 м²'",
+    "rooms": "the number of rooms, e.g. '2 өрөө'",
+    "description": "a one-sentence summary of the description",
+}
+FIELD_SELECTORS = {
+    "title": ["h1"],
+    "price": [".announcement-price", "h1"],
+    "location": [".breadcrumbs", ".announcement__location, [itemprop='address']", ".chars-column",
+                 "h1", ".announcement-description"],
+    "area": [".chars-column", "h1", ".announcement-description"],
+    "rooms": [".chars-column", "h1"],
+    "description": [".announcement-description"],
+}
+FRAGMENT_TOKEN_BUDGET = 400
+TOKENS_PER_FIELD = 40
+
+logger = logging.getLogger(__name__)
+
+
+class HybridExtractor:
+    """
+    Listing extraction that runs the rule-based parser first and asks the LLM only for the
+    fields the parser left as "N/A", sending just the page sections those fields live in.
+    Every field is tagged in `listing.provenance` with "parser", "llm" or "missing".
+    """
+
+    def __init__(self, retriever: RetrieverAgent = None, llm_client: LLMBackend = None,
+                 max_fragment_tokens: int = FRAGMENT_TOKEN_BUDGET):
+        self.retriever = retriever or RetrieverAgent()
+        self.llm_client = llm_client
+        self.max_fragment_tokens = max_fragment_tokens
+        self.stats = {"listings": 0, "llm_calls": 0, "llm_fields": 0, "prompt_tokens": 0}
+
+    def extract(self, url: str) -> Listing:
+        """Fetches and extracts a listing, like RetrieverAgent.extract_listing_details."""
+        logger.info("Extracting details from %s", url)
+        html_content = self.retriever.fetch_listing_data(url)
+        if html_content.startswith("Error:"):
+            return Listing.failed(url, html_content)
+        return self.extract_from_html(html_content, url)
+
+    def extract_many(self, urls: list) -> list:
+        """
+        `extract` for a batch; pages are fetched in parallel through the retriever's scheduler.
+        """
+        return [Listing.failed(url, html) if html.startswith("Error:")
+                else self.extract_from_html(html, url)
+                for url, html in zip(urls, self.retriever.fetch_many(urls))]
+
+    @traced("extractor.extract")
+    def extract_from_html(self, html_content: str, url: str) -> Listing:
+        listing = self.retriever.parse_listing_html(html_content, url)
+        self.stats["listings"] += 1
+
+        missing = [f for f in FIELD_HINTS if listing.text(f) == NOT_FOUND]
+        provenance = {f: "missing" if f in missing else "parser" for f in FIELD_HINTS}
+
+        if missing and self.llm_client is not None:
+            for field, value in self._extract_with_llm(html_content, missing).items():
+                # Numbers the LLM gave in an unparseable form stay missing
+                if listing.set_text(field, value):
+                    provenance[field] = "llm"
+
+        listing.provenance = provenance
+        filled = sum(1 for source in provenance.values() if source == "llm")
+        logger.info("%d fields parsed, %d filled by LLM, %d missing",
+                    len(FIELD_HINTS) - len(missing), filled, len(missing) - filled)
+        logger.debug("Extracted details: %s", listing)
+        return listing
+
+    def _fragment_for(self, html_content: str, fields: list) -> str:
+        selectors = []
+        for field in fields:
+            for selector in FIELD_SELECTORS[field]:
+                if selector not in selectors:
+                    selectors.append(selector)
+        return compact_listing_html(html_content, self.max_fragment_tokens, selectors=selectors)
+
+    def _extract_with_llm(self, html_content: str, fields: list) -> dict:
+        """Asks the LLM for `fields` only; returns the ones it actually found."""
+        fragment = self._fragment_for(html_content, fields)
+        if not fragment:
+            return {}
+        wanted = "\n".join(f'- "{field}": {FIELD_HINTS[field]}' for field in fields)
+        prompt = f"""Extract these fields from the Mongolian real estate listing text below:
+{wanted}
+
+Listing text:
+{fragment}
+
+Respond with only a JSON object with exactly these keys. \
+Use "N/A" for anything the text does not state."""
+
+        self.stats["llm_calls"] += 1
+        self.stats["prompt_tokens"] += count_tokens(prompt)
+        try:
+            response = self.llm_client.invoke(prompt, label="extract",
+                                              max_tokens=TOKENS_PER_FIELD * len(fields),
+                                              temperature=0)
+            extracted = extract_json_object(response.content)
+        except Exception as e:
+            logger.warning("LLM extraction failed: %s", e)
+            return {}
+        if not isinstance(extracted, dict):
+            return {}
+
+        found = {}
+        for field in fields:
+            value = extracted.get(field)
+            if isinstance(value, (int, float)):
+                value = str(value)
+            if isinstance(value, str) and value.strip() and value.strip() != NOT_FOUND:
+                found[field] = value.strip()
+        self.stats["llm_fields"] += len(found)
+        return found
+
+
+if __name__ == '__main__':
+    from ..llm import LLMResponse
+    from ..utils import configure_logging
+
+    configure_logging()
+
+    class MockLLM:
+        """Answers with a fixed location so the merge can be checked offline."""
+
+        def __init__(self):
+            self.prompts = []
+
+        def invoke(self, prompt, **kwargs):
+            self.prompts.append(prompt)
+            return LLMResponse(content='{"location": "Баянгол дүүрэг, 4-р хороолол"}')
+
+    complete_page = (
+        "<html><body><ul class='breadcrumbs'><a>Үл хөдлөх</a><a>Баянгол дүүрэг</a></ul>"
+        "<section class='list-announcement' data-price='65000000'>"
+        "<h1>Бгд 4 хороололд 1 өрөө 17 мк байр</h1>"
+        "<ul class='chars-column'>"
+        "<li><span class='key-chars'>Талбай:</span><a class='value-chars'>17 м²</a></li>"
+        "<li><span class='key-chars'>Өрөө:</span><a class='value-chars'>1</a></li></ul>"
+        "<div class='announcement-description'>Шууд нүүж ороход бэлэн.</div>"
+        "</section></body></html>"
+    )
+    vague_page = complete_page.replace("<a>Баянгол дүүрэг</a>", "")
+
+    llm = MockLLM()
+    extractor = HybridExtractor(llm_client=llm)
+    for page in (complete_page, vague_page):
+        listing = extractor.extract_from_html(page, "http://example.com/listing")
+        print(f"  location={listing.location!r} provenance={listing.provenance}")
+    print(f"\nStats: {extractor.stats}")
+    print(f"LLM prompt ({count_tokens(llm.prompts[0])} tokens):\n{llm.prompts[0]}")
@@ -1,30 +1,99 @@
 # real_estate_assistant/agents/researcher.py
+import logging
+
+from ..llm import LLMBackend
+from ..utils import clean_text, count_tokens, extract_json_object, truncate_to_tokens
+
+# Markup that never carries listing facts
+BOILERPLATE_TAGS = ["script", "style", "noscript", "svg", "iframe", "nav", "header", "footer",
+                    "form", "button", "aside", "link", "meta"]
+# unegui.mn announcement blocks, in the order they should appear in the prompt
+LISTING_SELECTORS = [
+    "h1",
+    ".breadcrumbs",
+    ".announcement-price",
+    ".announcement__location, [itemprop='address']",
+    ".chars-column",
+    ".announcement-description",
+]
+LISTING_FALLBACK_SELECTORS = ["section.list-announcement", "main", "body"]
+HTML_TOKEN_BUDGET = 1200
+
+logger = logging.getLogger(__name__)
+
+
+def _element_lines(element) -> list:
+    """
+    Visible text of an element, one cleaned line per block; 'Key:' lines are joined to their value.
+    """
+    lines = []
+    for raw in element.get_text(separator="\n").splitlines():
+        line = clean_text(raw)
+        if not line:
+            continue
+        if lines and lines[-1].endswith(":"):
+            lines[-1] = f"{lines[-1]} {line}"
+        else:
+            lines.append(line)
+    return lines
+
+
+def compact_listing_html(html_content: str, max_tokens: int = HTML_TOKEN_BUDGET,
+                         selectors=None) -> str:
+    """
+    Reduces listing HTML to the announcement text an extractor needs: boilerplate tags are
+    dropped, only the listing sections are kept, whitespace is collapsed, repeated lines are
+    removed and the result is cut to `max_tokens`. `selectors` narrows the kept sections
+    (default: LISTING_SELECTORS).
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "lxml")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    selected = []
+    for selector in selectors or LISTING_SELECTORS:
+        for element in soup.select(selector):
+            if not any(parent in selected for parent in element.parents):
+                selected.append(element)
+    if not selected:
+        for selector in LISTING_FALLBACK_SELECTORS:
+            element = soup.select_one(selector)
+            if element is not None:
+                selected.append(element)
+                break
+
+    lines, seen = [], set()
+    for element in selected:
+        for line in _element_lines(element):
+            if line not in seen:
+                seen.add(line)
+                lines.append(line)
+    return truncate_to_tokens("\n".join(lines), max_tokens)
 
-# Placeholder for imports (e.g., from together import Together, BeautifulSoup for parsing)
-# from bs4 import BeautifulSoup
 
 class ResearcherAgent:
-    def __init__(self, llm_client=None): # LLM client can be optional or required based on approach
+    # LLM client is optional; see llm.create_llm
+    def __init__(self, llm_client: LLMBackend = None, max_html_tokens: int = HTML_TOKEN_BUDGET):
         self.llm_client = llm_client
+        self.max_html_tokens = max_html_tokens
 
     def analyze_listing_html(self, html_content: str, url: str) -> dict:
         """
         Analyzes HTML content of a single listing to extract key information.
         This could use an LLM for extraction or rule-based parsing (e.g., BeautifulSoup).
         """
-        print(f"ResearcherAgent: Analyzing HTML content from {url} (length: {len(html_content)} chars)")
-        
-        # Placeholder for extraction logic
-        # Example using BeautifulSoup (very basic):
-        # soup = BeautifulSoup(html_content, 'html.parser')
-        # title = soup.find('h1').get_text(strip=True) if soup.find('h1') else "N/A"
-        # price = "N/A" # Extract price
-        # description = "N/A" # Extract description
-        # features = [] # Extract features
-        
-        # Example using LLM (conceptual)
+        logger.info("Analyzing HTML content from %s (length: %d chars)", url, len(html_content))
+
         if self.llm_client:
-            prompt = f"""Extract the following details from the real estate listing HTML provided below:
+            listing_text = compact_listing_html(html_content, self.max_html_tokens)
+            if logger.isEnabledFor(logging.DEBUG):
+                # Tokenizing the whole raw page costs more than compacting it; only for debugging
+                logger.debug("Compacted HTML from %d to %d tokens", count_tokens(html_content),
+                             count_tokens(listing_text))
+            prompt = f"""Extract the following details from the real estate listing text provided \
+below:
             - Property Title
             - Price
             - Location/Address
@@ -34,15 +103,21 @@ class ResearcherAgent:
             - Key features (list)
             - Property description summary
 
-            HTML Content:
-            {html_content[:4000]} 
+            Listing Text:
+            {listing_text}
 
-            Extracted Information (JSON format):
+            Respond with a JSON object with the keys title, price, location, bedrooms, bathrooms,
+            area_sqm, features and description_summary. Use "N/A" for anything not stated.
             """
-            # response = self.llm_client.chat.completions.create(...)
-            # extracted_data = json.loads(response.choices[0].message.content)
-            # return extracted_data
-            pass # Implement LLM call
+            try:
+                response = self.llm_client.invoke(prompt, label="research", max_tokens=500,
+                                                  temperature=0)
+                extracted_data = extract_json_object(response.content)
+            except Exception as e:
+                logger.warning("LLM extraction failed: %s", e)
+                extracted_data = {}
+            if isinstance(extracted_data, dict) and extracted_data:
+                return {"url": url, **extracted_data}
 
         # Placeholder return
         return {
@@ -57,15 +132,16 @@ class ResearcherAgent:
             "description_summary": "This is a placeholder summary of the property."
         }
 
-    def research_market_data(self, processed_listings_data: list, general_query_info: dict = None) -> dict:
+    def research_market_data(self, processed_listings_data: list,
+                             general_query_info: dict = None) -> dict:
         """
         Performs market analysis based on processed listing data or a general query.
         This could involve comparing prices, identifying trends, etc.
         (Placeholder)
         """
-        print("ResearcherAgent: Performing market data research...")
+        logger.info("Performing market data research")
         if general_query_info:
-            print(f"Based on general query: {general_query_info}")
+            logger.debug("Based on general query: %s", general_query_info)
         
         # Placeholder for market analysis logic
         # e.g., calculate average price, price per sqm, identify comparable properties
@@ -82,15 +158,40 @@ class ResearcherAgent:
         return analysis_summary
 
 if __name__ == '__main__':
+    from ..utils import configure_logging
+
+    configure_logging()
     researcher = ResearcherAgent() # Add mock LLM client if testing LLM-dependent parts
 
     # Test with mock HTML content
-    mock_html = "<html><head><title>Test Property</title></head><body><h1>Beautiful Apartment</h1><p>Price: MNT 200,000,000</p><div>Area: 75 sqm</div></body></html>"
+    mock_html = ("<html><head><title>Test Property</title></head><body>"
+                 "<h1>Beautiful Apartment</h1><p>Price: MNT 200,000,000</p>"
+                 "<div>Area: 75 sqm</div></body></html>")
     mock_url = "http://example.com/listing1"
     extracted_info = researcher.analyze_listing_html(mock_html, mock_url)
     print("\nExtracted Listing Info:")
     print(extracted_info)
 
+    # Test HTML compaction on a page shaped like a unegui.mn announcement
+    page_html = (
+        "<html><head><style>" + ".a{color:red}" * 300 + "</style>"
+        "<script>" + "var tracking = {};" * 500 + "</script></head><body>"
+        "<header><nav>" + "<a href='/'>Нүүр</a>" * 80 + "</nav></header>"
+        "<section class='list-announcement' data-price='239000000'>"
+        "<h1>2 өрөө байр, Баянгол дүүрэг</h1>"
+        "<div class='announcement-price'>"
+        "<span class='announcement-price__value'>239 сая ₮</span></div>"
+        "<ul class='chars-column'><li><span class='key-chars'>Талбай:</span>"
+        "<a class='value-chars'>49.5 м²</a></li><li><span class='key-chars'>Өрөө:</span>"
+        "<a class='value-chars'>2</a></li></ul>"
+        "<div class='announcement-description'>"
+        "  Нарлаг,   дулаан   байр.\n\n Шинэ засвартай. </div>"
+        "</section><footer>" + "<p>© unegui.mn</p>" * 50 + "</footer></body></html>"
+    )
+    compact = compact_listing_html(page_html)
+    print(f"\nCompacted listing ({count_tokens(page_html)} -> {count_tokens(compact)} tokens):")
+    print(compact)
+
     # Test market data research (with mock processed data)
     mock_processed_data = [
         {"url": "http://example.com/1", "price_numeric": 100000000, "area_sqm": 50},
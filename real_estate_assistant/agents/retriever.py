@@ -1,131 +1,198 @@
-import io
+import logging
+import mmap
+import os
 import re
+import tempfile
 
-import pandas as pd
-import pdfplumber
-import requests
-from bs4 import BeautifulSoup
+from ..listing import Listing
+from ..market_index import MONTH_PATTERN, market_data_version, month_period
+from ..sources.registry import adapter_for
+from ..sources.scheduler import FetchScheduler, get_fetch_scheduler
+from ..tracing import current_span, traced
+
+# pandas, pdfplumber, requests and BeautifulSoup are imported where they are used, so that
+# importing this module (and the CLI) stays fast.
+
+DEFAULT_BULLETIN_URL = "https://downloads.1212.mn/JTjvL9z4sDu9E9ro-BcOLaJ_e-VQS_ouZ_BVsiNl.pdf"
+
+PRICE_TABLE_MARKERS = ("Average price of new apartment", "Average price of old apartment")
+PRICE_TABLE_END_MARKER = "Source: Website"
+PRICE_TABLE_PAGE = 1  # 0-based page the price tables are usually on
+PDF_CHUNK_SIZE = 64 * 1024
+FETCH_TIMEOUT = 15
+REQUEST_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+}
+
+# Month columns of the price tables, used when a table's header line is missing
+DEFAULT_MONTH_COLUMNS = ["2024 Mar", "2025 Jan", "2025 Feb", "2025 Mar"]
+
+logger = logging.getLogger(__name__)
+
+
+def _response_text(response) -> str:
+    """The body as text. Without a charset in Content-Type, requests assumes ISO-8859-1; the
+    Mongolian sites we read serve UTF-8, so that is the fallback instead."""
+    content_type = response.headers.get("Content-Type", "").lower()
+    if "charset" not in content_type and (response.encoding or "").lower() in ("", "iso-8859-1"):
+        response.encoding = "utf-8"
+    return response.text
 
 
 class RetrieverAgent:
-    def __init__(self):
-        pass
+    def __init__(self, session=None, scheduler: FetchScheduler = None):
+        """
+        `session` is an optional requests.Session; long-running processes pass one so that
+        connections to each host are pooled and reused across requests. Requests go through
+        `scheduler` (default: the process-wide one), which keeps each host within its source
+        adapter's limits.
+        """
+        self.session = session
+        self.scheduler = scheduler or get_fetch_scheduler()
 
+    def _http(self):
+        if self.session is not None:
+            return self.session
+        import requests
+
+        return requests
+
+    @traced("retriever.fetch")
     def fetch_listing_data(self, url: str) -> str:
-        print(f"RetrieverAgent: Fetching content from {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        import requests
+
+        logger.info("Fetching content from %s", url)
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            with self.scheduler.slot(url) as waited:
+                response = self._http().get(url, headers=REQUEST_HEADERS, timeout=FETCH_TIMEOUT)
             response.raise_for_status()
-            return response.text
+            current_span().set(url=url, status=response.status_code, bytes=len(response.content),
+                               waited=round(waited, 3))
+            return _response_text(response)
         except requests.RequestException as e:
-            print(f"Error fetching URL {url}: {e}")
+            logger.warning("Error fetching URL %s: %s", url, e)
             return f"Error: Could not retrieve content from {url}."
-        except Exception as e:
-            print(f"An unexpected error occurred while fetching {url}: {e}")
+        except Exception:
+            logger.exception("An unexpected error occurred while fetching %s", url)
             return f"Error: An unexpected error occurred while retrieving content from {url}."
 
+    @traced("retriever.fetch")
     def fetch_statistical_data(self, url: str) -> str:
-        print(f"RetrieverAgent: Fetching content from {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        import requests
+
+        logger.info("Fetching content from %s", url)
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            with self.scheduler.slot(url) as waited:
+                response = self._http().get(url, headers=REQUEST_HEADERS, timeout=FETCH_TIMEOUT)
             response.raise_for_status()
-            return response.text
+            current_span().set(url=url, status=response.status_code, bytes=len(response.content),
+                               waited=round(waited, 3))
+            return _response_text(response)
         except requests.RequestException as e:
-            print(f"Error fetching URL {url}: {e}")
+            logger.warning("Error fetching URL %s: %s", url, e)
             return f"Error: Could not retrieve content from {url}."
-        except Exception as e:
-            print(f"An unexpected error occurred while fetching {url}: {e}")
+        except Exception:
+            logger.exception("An unexpected error occurred while fetching %s", url)
             return f"Error: An unexpected error occurred while retrieving content from {url}."
 
-    def extract_listing_details(self, url: str) -> dict:
-        print(f"RetrieverAgent: Extracting details from {url}")
-        html_content = self.fetch_listing_data(url)
-        if html_content.startswith("Error:"):
+    @traced("retriever.fetch")
+    def fetch_if_modified(self, url: str, etag: str = None, last_modified: str = None) -> dict:
+        """
+        Conditional GET for recrawls: sends the validators from the previous fetch, so a server
+        that supports them answers 304 with no body. Returns {"status", "html", "etag",
+        "last_modified"}; "html" is None for 304 (not modified) and 404/410 (listing removed).
+        Other failures return {"error": ...}.
+        """
+        import requests
+
+        headers = dict(REQUEST_HEADERS)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            with self.scheduler.slot(url) as waited:
+                response = self._http().get(url, headers=headers, timeout=FETCH_TIMEOUT)
+            current_span().set(url=url, status=response.status_code, bytes=len(response.content),
+                               waited=round(waited, 3))
+            if response.status_code in (304, 404, 410):
+                return {"status": response.status_code, "html": None, "etag": etag,
+                        "last_modified": last_modified}
+            response.raise_for_status()
             return {
-                "url": url,
-                "title": "Error fetching page",
-                "price": "N/A",
-                "location": "N/A",
-                "area": "N/A",
-                "rooms": "N/A",
-                "description": "N/A",
-                "error": html_content
+                "status": response.status_code,
+                "html": _response_text(response),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
             }
+        except requests.RequestException as e:
+            logger.warning("Error fetching URL %s: %s", url, e)
+            return {"error": f"Could not retrieve content from {url}: {e}"}
 
-        soup = BeautifulSoup(html_content, 'lxml')
+    @traced("retriever.fetch")
+    async def afetch_listing_data(self, client, url: str) -> str:
+        """
+        fetch_listing_data on an aiohttp ClientSession, for the async pipeline. Waits for the
+        host's slot without blocking the event loop; the limits are shared with sync fetches.
+        """
+        import asyncio
 
-        details = {
-            "url": url,
-            "title": "N/A",
-            "price": "N/A",
-            "location": "N/A",
-            "area": "N/A",
-            "rooms": "N/A",
-            "description": "N/A"
-        }
+        import aiohttp
 
-        title_tag = soup.find('h1')
-        if title_tag:
-            details['title'] = title_tag.text.strip()
-        else:
-            og_title = soup.find('meta', property='og:title')
-            if og_title and og_title.get('content'):
-                details['title'] = og_title['content'].strip()
+        logger.info("Fetching content from %s", url)
+        try:
+            async with self.scheduler.aslot(url) as waited:
+                timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
+                async with client.get(url, headers=REQUEST_HEADERS, timeout=timeout) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+            current_span().set(url=url, status=response.status, bytes=len(body),
+                               waited=round(waited, 3))
+            # Like _response_text: UTF-8 unless the server says otherwise
+            return body.decode(response.charset or "utf-8", errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning("Error fetching URL %s: %s", url, e)
+            return f"Error: Could not retrieve content from {url}."
+        except Exception:
+            logger.exception("An unexpected error occurred while fetching %s", url)
+            return f"Error: An unexpected error occurred while retrieving content from {url}."
 
-        price_container = soup.find('section', class_='list-announcement')
-        if price_container and price_container.has_attr('data-price'):
-            try:
-                price = float(price_container['data-price'])
-                details['price'] = f"MNT {price:,.0f}"
-            except ValueError:
-                details['price'] = price_container['data-price']
-        else:
-            price_tag = soup.find(class_='announcement-price__value')
-            if price_tag:
-                details['price'] = price_tag.get_text(strip=True)
-
-        location_tag = soup.find(string=lambda t: t and ("байршил" in t.lower() or "location" in t.lower()))
-        if location_tag:
-            parent = location_tag.find_parent()
-            if parent:
-                details['location'] = parent.text.strip().replace('\n', ' ').replace('\r', '').replace('\t', ' ')
-            else:
-                details['location'] = location_tag.strip()
-
-        area_li = soup.find('span', string=lambda t: t and 'талбай' in t.lower())
-        if area_li:
-            parent_li = area_li.find_parent('li')
-            if parent_li:
-                value_tag = parent_li.find('a', class_='value-chars')
-                if value_tag:
-                    details['area'] = value_tag.text.strip()
-
-        bedrooms_tag = soup.find(string=lambda t: t and ("өрөө" in t.lower() or "rooms" in t.lower()))
-        if bedrooms_tag:
-            details['rooms'] = bedrooms_tag.strip()
-
-        description_tag = soup.find('div', class_='announcement-description')
-        if description_tag:
-            details['description'] = description_tag.text.strip().replace('\n', ' ').replace('\r', ' ').replace('\t', ' ')
-        else:
-            og_description = soup.find('meta', property='og:description')
-            if og_description and og_description.get('content'):
-                details['description'] = og_description['content'].strip()
-            else:
-                body_text = soup.body.get_text(separator=' ', strip=True) if soup.body else ""
-                details['description'] = (body_text[:500] + '...') if len(body_text) > 500 else body_text
-
-        print(f"RetrieverAgent: Extracted details: {details}")
-        return details
+    def fetch_many(self, urls: list) -> list:
+        """Fetches many pages, hosts in parallel within their limits; results in input order."""
+        return self.scheduler.map(self.fetch_listing_data, urls)
+
+    def extract_listing_details(self, url: str) -> Listing:
+        logger.info("Extracting details from %s", url)
+        return self._extract(url, self.fetch_listing_data(url))
+
+    def extract_many(self, urls: list) -> list:
+        """extract_listing_details for a batch of URLs, fetched through the shared scheduler."""
+        logger.info("Extracting %d listings", len(urls))
+        return [self._extract(url, html) for url, html in zip(urls, self.fetch_many(urls))]
+
+    def _extract(self, url: str, html_content: str) -> Listing:
+        if html_content.startswith("Error:"):
+            return Listing.failed(url, html_content)
+
+        listing = self.parse_listing_html(html_content, url)
+        logger.info("Extracted '%s' (%s, %s, %s)", listing.title, listing.price_text,
+                    listing.area_text, listing.location)
+        logger.debug("Extracted details: %s", listing)
+        return listing
+
+    @traced("retriever.parse")
+    def parse_listing_html(self, html_content: str, url: str) -> Listing:
+        """
+        Rule-based extraction with the source adapter for the URL's site (unegui.mn for unknown
+        hosts). Fields that cannot be found reliably are left as "N/A" (numbers as None).
+        """
+        return adapter_for(url).parse(html_content, url)
 
     def extract_statistical_data_from_1212(self, district="Баянзүрх") -> dict:
-        print(f"RetrieverAgent: Extracting apartment stats for {district}")
+        from bs4 import BeautifulSoup
+
+        logger.info("Extracting apartment stats for %s", district)
         stats_url = "https://1212.mn/stat.aspx?LIST_ID=976_L4_B1"  # Example: change as needed
         html_content = self.fetch_statistical_data(stats_url)
 
@@ -158,10 +225,12 @@ class RetrieverAgent:
         return stats
 
     def search_general_listings(self, location: str, property_type: str, **kwargs) -> list:
-        print(f"RetrieverAgent: Searching for {property_type} in {location} with criteria {kwargs}")
+        logger.info("Searching for %s in %s with criteria %s", property_type, location, kwargs)
         return [
-            {"source": "mock", "title": f"Sample {property_type} in {location} 1", "price": "MNT 100,000,000", "url": "http://example.com/1"},
-            {"source": "mock", "title": f"Sample {property_type} in {location} 2", "price": "MNT 120,000,000", "url": "http://example.com/2"}
+            {"source": "mock", "title": f"Sample {property_type} in {location} 1",
+             "price": "MNT 100,000,000", "url": "http://example.com/1"},
+            {"source": "mock", "title": f"Sample {property_type} in {location} 2",
+             "price": "MNT 120,000,000", "url": "http://example.com/2"}
         ]
 
     # --- New PDF extraction methods ---
@@ -179,90 +248,239 @@ class RetrieverAgent:
                 data_lines.append(line.strip())
         return data_lines
 
+    def parse_month_columns(self, lines) -> list:
+        """
+        Returns the month column labels ('2024 Mar', ..., '2025 Mar') from the first table
+        header in `lines`, in the order the table has them.
+        """
+        for line in lines:
+            months = MONTH_PATTERN.findall(line)
+            if months:
+                return [f"{year} {month.title()}" for year, month in months]
+        logger.warning("No month header in price table, assuming %s", DEFAULT_MONTH_COLUMNS)
+        return list(DEFAULT_MONTH_COLUMNS)
+
     def parse_price_lines(self, price_lines):
+        """
+        Parses a price table into rows of District, one value per month column in the table's
+        header, and the year-over-year change (Value, Percent).
+        """
+        if not price_lines:
+            return []
+        months = self.parse_month_columns(price_lines)
+        width = len(months) + 2
         rows = []
         for line in price_lines:
             parts = re.split(r'\s+', line)
-            if len(parts) < 7:
+            if len(parts) < width + 1:
                 continue
             district = parts[0]
             try:
-                values = list(map(float, parts[1:7]))
+                values = list(map(float, parts[1:width + 1]))
             except ValueError:
                 continue
-            rows.append({
-                "District": district,
-                "2025 Mar": values[3],
-                "Value": values[4],
-                "Percent": values[5],
-            })
+            row = {"District": district, **dict(zip(months, values))}
+            row["Value"], row["Percent"] = values[-2], values[-1]
+            rows.append(row)
         return rows
 
+    def extract_bulletin_period(self, lines):
+        """
+        Returns the bulletin month as 'YYYY-MM', taken from the latest month in the table header.
+        """
+        periods = [month_period(f"{year} {month}")
+                   for year, month in MONTH_PATTERN.findall("\n".join(lines))]
+        return max(periods, default=None)
+
+    @traced("pdf.locate_tables")
+    def locate_price_table_pages(self, pdf_source, hint: int = PRICE_TABLE_PAGE) -> list:
+        """
+        Cheap text probe with pdfium (no layout analysis) to find the pages holding the
+        apartment price tables. The usual page (`hint`) is probed first and the scan stops once
+        both tables are found. Returns 0-based page numbers, or [] if nothing was found.
+        """
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            return []
+
+        if isinstance(pdf_source, os.PathLike):
+            pdf_source = os.fspath(pdf_source)
+        document = pdfium.PdfDocument(pdf_source)
+        try:
+            page_count = len(document)
+            order = [hint] if hint < page_count else []
+            order += [n for n in range(page_count) if n != hint]
+            found = {}
+            for page_number in order:
+                page = document[page_number]
+                textpage = page.get_textpage()
+                text = " ".join(textpage.get_text_range().split())
+                textpage.close()
+                page.close()
+                if any(marker in text for marker in PRICE_TABLE_MARKERS):
+                    found[page_number] = text
+                    seen = " ".join(found.values())
+                    if all(marker in seen for marker in PRICE_TABLE_MARKERS):
+                        break
+        finally:
+            document.close()
+
+        pages = sorted(found)
+        current_span().set(pages=page_count, table_pages=len(pages))
+        if pages and PRICE_TABLE_END_MARKER not in found[pages[-1]] and pages[-1] + 1 < page_count:
+            pages.append(pages[-1] + 1)  # The old apartment table continues on the next page
+        return pages
+
+    def _extract_page_lines(self, pdf_file, page_numbers):
+        import pdfplumber
+
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        if isinstance(pdf_file, (str, os.PathLike)):
+            # Memory-map files on disk so pdfminer reads pages on demand instead of loading the file
+            with open(pdf_file, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+                return self._extract_page_lines(pdf_map, page_numbers)
+
+        lines = []
+        with pdfplumber.open(pdf_file, pages=[n + 1 for n in page_numbers]) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                lines.extend(text.split('\n'))
+        return lines
+
+    @traced("pdf.extract_tables")
+    def parse_apartment_price_pdf(self, pdf_file):
+        """
+        Extracts apartment price tables (new and old) from a bulletin PDF path or file object.
+        The pdfium probe runs first; it checks the usual page (the second) before any other, so
+        the usual layout costs one probed page. Only the pages it finds go through pdfplumber,
+        and the usual page is read if the probe finds nothing.
+        Returns dict with two DataFrames and the bulletin period.
+        """
+        import pandas as pd
+
+        if hasattr(pdf_file, "seek"):
+            pdf_file.seek(0)
+        page_numbers = self.locate_price_table_pages(pdf_file) or [PRICE_TABLE_PAGE]
+        lines = self._extract_page_lines(pdf_file, page_numbers)
+
+        new_apart_lines = self.extract_table_from_text(
+            lines,
+            start_header="Average price of new apartment",
+            end_header="Average price of old apartment"
+        )
+        old_apart_lines = self.extract_table_from_text(
+            lines,
+            start_header="Average price of old apartment",
+            end_header=PRICE_TABLE_END_MARKER
+        )
+
+        new_apart_data = self.parse_price_lines(new_apart_lines)
+        old_apart_data = self.parse_price_lines(old_apart_lines)
+        current_span().set(pages=len(page_numbers), rows=len(new_apart_data) + len(old_apart_data))
+
+        price_data = {
+            "new_apartment_prices": pd.DataFrame(new_apart_data),
+            "old_apartment_prices": pd.DataFrame(old_apart_data),
+            "period": self.extract_bulletin_period(lines)
+        }
+        price_data["version"] = market_data_version(price_data)
+        return price_data
+
+    @traced("pdf.download")
+    def download_pdf(self, pdf_url: str) -> str:
+        """
+        Streams a PDF to a temporary file in chunks, so the whole document is never held in memory.
+        The caller is responsible for deleting the returned path.
+        """
+        with self._http().get(pdf_url, timeout=FETCH_TIMEOUT, stream=True) as r:
+            r.raise_for_status()
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                try:
+                    for chunk in r.iter_content(chunk_size=PDF_CHUNK_SIZE):
+                        tmp.write(chunk)
+                except Exception:
+                    tmp.close()
+                    os.remove(tmp.name)
+                    raise
+                current_span().set(bytes=tmp.tell())
+                return tmp.name
+
+    @traced("pdf.download")
+    async def adownload_pdf(self, client, pdf_url: str) -> str:
+        """download_pdf on an aiohttp ClientSession; the caller deletes the returned path."""
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
+        async with client.get(pdf_url, timeout=timeout) as response:
+            response.raise_for_status()
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                try:
+                    async for chunk in response.content.iter_chunked(PDF_CHUNK_SIZE):
+                        tmp.write(chunk)
+                except BaseException:
+                    tmp.close()
+                    os.remove(tmp.name)
+                    raise
+                current_span().set(bytes=tmp.tell())
+                return tmp.name
+
+    @traced("retriever.market_data")
     def extract_apartment_price_from_pdf(self, pdf_url: str = None):
         """
         Download and extract apartment price tables (new and old) from the PDF.
         Returns dict with two DataFrames: new and old apartment prices.
         """
         if not pdf_url:
-            pdf_url = "https://downloads.1212.mn/JTjvL9z4sDu9E9ro-BcOLaJ_e-VQS_ouZ_BVsiNl.pdf"
+            pdf_url = DEFAULT_BULLETIN_URL
 
-        print(f"RetrieverAgent: Downloading PDF from {pdf_url}")
+        logger.info("Downloading PDF from %s", pdf_url)
         try:
-            r = requests.get(pdf_url, timeout=15)
-            r.raise_for_status()
+            pdf_path = self.download_pdf(pdf_url)
         except Exception as e:
             return {"error": f"Failed to download PDF: {e}"}
 
-        pdf_file = io.BytesIO(r.content)
-        with pdfplumber.open(pdf_file) as pdf:
-            page2 = pdf.pages[1]
-            text = page2.extract_text()
-            lines = text.split('\n')
-
-            new_apart_lines = self.extract_table_from_text(
-                lines,
-                start_header="Average price of new apartment",
-                end_header="Average price of old apartment"
-            )
-            old_apart_lines = self.extract_table_from_text(
-                lines,
-                start_header="Average price of old apartment",
-                end_header="Source: Website"
-            )
-
-            new_apart_data = self.parse_price_lines(new_apart_lines)
-            old_apart_data = self.parse_price_lines(old_apart_lines)
-
-            df_new = pd.DataFrame(new_apart_data)
-            df_old = pd.DataFrame(old_apart_data)
-            
-            dict={
-                "new_apartment_prices": df_new,
-                "old_apartment_prices": df_old
-            }
-            print(dict["new_apartment_prices"])
-            print(dict["old_apartment_prices"])
-            return dict
+        return self.parse_downloaded_pdf(pdf_path)
+
+    def parse_downloaded_pdf(self, pdf_path: str) -> dict:
+        """parse_apartment_price_pdf on a downloaded bulletin, which is deleted afterwards."""
+        try:
+            price_data = self.parse_apartment_price_pdf(pdf_path)
+        finally:
+            os.remove(pdf_path)
+
+        logger.info("Bulletin %s: %d new and %d old apartment price rows", price_data["period"],
+                    len(price_data["new_apartment_prices"]),
+                    len(price_data["old_apartment_prices"]))
+        logger.debug("New apartment prices:\n%s", price_data["new_apartment_prices"])
+        logger.debug("Old apartment prices:\n%s", price_data["old_apartment_prices"])
+        return price_data
             
 
 if __name__ == '__main__':
+    from ..utils import configure_logging
+
+    configure_logging()
     retriever = RetrieverAgent()
 
     # Test: Single listing extraction
     test_url = "https://www.unegui.mn/adv/9129580_tomor-zamd-2-oroo-zarna/"
     print(f"\n--- Testing Single Listing Extraction for: {test_url} ---")
     listing_details = retriever.extract_listing_details(test_url)
-    if "error" not in listing_details:
+    if listing_details.error is None:
         print("\nSuccessfully extracted details:")
-        for key, value in listing_details.items():
+        for key, value in listing_details.to_dict().items():
             print(f"  {key.capitalize()}: {value}")
     else:
-        print(f"\nError during extraction: {listing_details.get('error')}")
+        print(f"\nError during extraction: {listing_details.error}")
         print(f"Partial details: {listing_details}")
 
     # Test: General search
     print("\n--- Testing General Search ---")
-    general_search_results = retriever.search_general_listings(location="Bayanzurkh district", property_type="apartment", bedrooms=2)
+    general_search_results = retriever.search_general_listings(
+        location="Bayanzurkh district", property_type="apartment", bedrooms=2)
     print("\nGeneral Search Results:")
     for item in general_search_results:
         print(item)
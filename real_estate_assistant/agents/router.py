@@ -1,17 +1,29 @@
 # real_estate_assistant/agents/router.py
 
-# Placeholder for imports (e.g., from together import Together, re)
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 
-ROUTER_AGENT_PROMPT_TEMPLATE = """You are an intelligent assistant in a multi-agent real estate analysis system.
+from ..market_index import DISTRICT_ALIASES
+from ..sources.registry import source_hosts
+
+ROUTER_AGENT_PROMPT_TEMPLATE = """You are an intelligent assistant in a multi-agent real estate \
+analysis system.
 
 Your task is to classify a user's query into one of two types:
 
-1. **q1 (Link query):** The user includes a specific URL to a real estate listing (e.g., unegui.mn or 1212.mn or remax.mn)
-2. **q2 (General interest query):** The user is generally interested in a location or type of apartment but does not include a specific link.
+1. **q1 (Link query):** The user includes a specific URL to a real estate listing (e.g., unegui.mn \
+or 1212.mn or remax.mn)
+2. **q2 (General interest query):** The user is generally interested in a location or type of \
+apartment but does not include a specific link.
 
-Based on the input, respond only with one of these options:  
-→ `q1` if the input contains a real estate listing URL  
-→ `q2` if it describes a type of property or location but doesn't have a URL  
+Based on the input, respond only with one of these options:
+→ `q1` if the input contains a real estate listing URL
+→ `q2` if it describes a type of property or location but doesn't have a URL
 
 Do not explain your reasoning. Output only `q1` or `q2`.
 
@@ -20,78 +32,337 @@ Do not explain your reasoning. Output only `q1` or `q2`.
 Input: {user_query}
 Output:"""
 
+ROUTER_MODEL = "meta-llama/Llama-4-Maverick-17B-128E-Instruct-FP8"
+
+LISTING_HOSTS = source_hosts()
+LISTING_URL_PATTERN = re.compile(
+    r'https?://(?:www\.)?(?:' + "|".join(re.escape(host) for host in LISTING_HOSTS) + r')[^\s]*',
+    re.IGNORECASE
+)
+BARE_LISTING_URL_PATTERN = re.compile(
+    r'\b(?:www\.)?(?:' + "|".join(re.escape(host) for host in LISTING_HOSTS) + r')/[^\s]+',
+    re.IGNORECASE
+)
+ANY_URL_PATTERN = re.compile(r'https?://[^\s]+', re.IGNORECASE)
+WORD_PATTERN = re.compile(r'[\w-]+')
+
+# Words that mark a general search ("2 өрөө байр Хан-Уулд", "apartments in Khan-Uul").
+GENERAL_QUERY_KEYWORDS = {
+    "apartment", "apartments", "flat", "flats", "house", "houses", "room", "rooms", "bedroom",
+    "district", "rent", "buy", "sale", "cheap", "near", "price", "sqm", "m2",
+    "байр", "орон", "сууц", "өрөө", "хаус", "байшин", "дүүрэг", "хороо", "хороолол", "түрээс",
+    "зарна", "худалдана", "авна", "үнэ", "хямд", "ойр", "мкв",
+}
+_DISTRICT_ALIASES = sorted({a for aliases in DISTRICT_ALIASES.values() for a in aliases}, key=len,
+                           reverse=True)
+# Full district names may carry case suffixes ("Баянзүрхэд"); abbreviations must be whole words.
+DISTRICT_PATTERN = re.compile(
+    r'\b(?:'
+    + "|".join(re.escape(a) + (r'\b' if len(a) <= 3 else '') for a in _DISTRICT_ALIASES)
+    + r')'
+)
+
+ROUTER_BATCH_PROMPT_TEMPLATE = """\
+You are an intelligent assistant in a multi-agent real estate analysis system.
+
+Classify each numbered user query below into one of two types:
+
+- `q1` if the query contains a URL to a real estate listing (e.g., unegui.mn or 1212.mn or remax.mn)
+- `q2` if it describes a type of property or location but doesn't have a URL
+
+Answer with exactly one line per query in the form `<number>: <q1 or q2>`. \
+Do not explain your reasoning.
+
+---
+
+{numbered_queries}
+
+Output:"""
+
+# Decisions below this confidence are sent to the LLM, if one is configured.
+LLM_CONFIDENCE_THRESHOLD = 0.75
+BATCH_PROMPT_SIZE = 20
+ROUTER_CACHE_SIZE = 4096
+
+_BATCH_ANSWER_PATTERN = re.compile(r'^\s*(\d+)\s*[:.)-]\s*`?(q[12])`?',
+                                   re.IGNORECASE | re.MULTILINE)
+_NORMALIZE_PATTERN = re.compile(r'[^\w\s:/.?=&%-]+')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(user_query: str) -> str:
+    """Cache key for a query: case, punctuation and whitespace differences are ignored."""
+    return " ".join(_NORMALIZE_PATTERN.sub(" ", user_query.lower()).split())
+
+
+@dataclass
+class RoutingDecision:
+    label: str          # "q1" (listing link) or "q2" (general query)
+    confidence: float
+    tier: str           # "pattern", "url", "keywords", "llm" or "fallback"
+    url: str = None
+    elapsed_us: float = 0.0
+    cached: bool = False
+
+
 class RouterAgent:
-    def __init__(self, llm_client):
+    def __init__(self, llm_client=None, model=ROUTER_MODEL,
+                 confidence_threshold=LLM_CONFIDENCE_THRESHOLD, cache_size=ROUTER_CACHE_SIZE,
+                 max_workers=8):
         self.llm_client = llm_client
-        # Consider pre-compiling regex patterns here if used frequently
-        # self.url_pattern = re.compile(r'https?://(?:www\.)?(unegui\.mn|1212\.mn|remax\.mn)[^\s]*', re.IGNORECASE)
+        self.model = model
+        self.confidence_threshold = confidence_threshold
+        self.cache_size = cache_size
+        self.max_workers = max_workers
+        self.tier_counts = {"pattern": 0, "url": 0, "keywords": 0, "llm": 0, "fallback": 0}
+        self._lock = threading.Lock()  # route and classify_batch may run on several threads
+        self.cache_hits = 0
+        self._cache = OrderedDict()
 
+    def _classify_locally(self, user_query: str) -> RoutingDecision:
+        """
+        Tier 1 (precompiled listing-host patterns, then any other URL) and tier 2 (keyword model).
+        """
+        match = LISTING_URL_PATTERN.search(user_query)
+        if match:
+            return RoutingDecision("q1", 1.0, "pattern", url=match.group(0))
 
-    def classify_query(self, user_query: str) -> str:
+        match = BARE_LISTING_URL_PATTERN.search(user_query)
+        if match:
+            return RoutingDecision("q1", 0.9, "pattern", url="https://" + match.group(0))
+
+        match = ANY_URL_PATTERN.search(user_query)
+        if match:
+            # A link, but not to a host we know: probably a listing, let the LLM confirm.
+            return RoutingDecision("q1", 0.6, "url", url=match.group(0))
+
+        lowered = user_query.lower()
+        hits = sum(1 for word in WORD_PATTERN.findall(lowered) if word in GENERAL_QUERY_KEYWORDS)
+        hits += len(DISTRICT_PATTERN.findall(lowered))
+        confidence = min(0.95, 0.6 + 0.15 * hits) if hits else 0.5
+        return RoutingDecision("q2", confidence, "keywords")
+
+    def _complete(self, prompt: str, max_tokens: int) -> str:
         """
-        Classifies the user query as 'q1' or 'q2'.
+        Sends a prompt to the client: an `LLMBackend` (see llm.create_llm) or a raw
+        `together.Together` client.
         """
-        # Basic check for URLs (optional, can rely solely on LLM)
-        # if self.url_pattern.search(user_query):
-        #     # Potentially optimize or inform the LLM
-        #     pass
+        if hasattr(self.llm_client, "invoke"):
+            response = self.llm_client.invoke(prompt, label="router", max_tokens=max_tokens,
+                                              temperature=0)
+            return response.content
+        response = self.llm_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
 
+    def _classify_with_llm(self, user_query: str) -> str:
         prompt = ROUTER_AGENT_PROMPT_TEMPLATE.format(user_query=user_query)
-        
-        try:
-            # Replace with actual LLM call logic
-            # response = self.llm_client.chat.completions.create(...)
-            # classification = response.choices[0].message.content.strip().lower()
-            
-            # Placeholder logic:
-            if "http" in user_query and ("unegui.mn" in user_query or "1212.mn" in user_query or "remax.mn" in user_query) :
-                classification = "q1"
-            else:
-                classification = "q2"
-            
-            if classification in ['q1', 'q2']:
-                return classification
+        return self._complete(prompt, max_tokens=5).strip().lower().strip("`")
+
+    def _classify_batch_with_llm(self, user_queries: list) -> dict:
+        """
+        Classifies several queries with one prompt. Returns {position: label} for the answers
+        that could be parsed; missing positions are left to the caller.
+        """
+        numbered = "\n".join(f"{i}: {' '.join(query.split())}"
+                             for i, query in enumerate(user_queries, start=1))
+        content = self._complete(ROUTER_BATCH_PROMPT_TEMPLATE.format(numbered_queries=numbered),
+                                 max_tokens=8 * len(user_queries))
+        answers = {}
+        for number, label in _BATCH_ANSWER_PATTERN.findall(content):
+            position = int(number) - 1
+            if 0 <= position < len(user_queries):
+                answers[position] = label.lower()
+        return answers
+
+    def _resolve_with_llm(self, decision: RoutingDecision, classification) -> RoutingDecision:
+        if classification == 'q1' and decision.url is None:
+            # A link query needs a link to analyze; without one it can only be a general query.
+            logger.info("LLM classified a query without a URL as q1; routing it as q2")
+            return RoutingDecision("q2", 0.5, "llm")
+        if classification in ['q1', 'q2']:
+            return RoutingDecision(classification, 0.8, "llm", url=decision.url)
+        if classification is not None:
+            logger.warning("LLM returned unexpected classification: %s", classification)
+        decision.tier = "fallback"
+        return decision
+
+    def _needs_llm(self, decision: RoutingDecision) -> bool:
+        return decision.confidence < self.confidence_threshold and self.llm_client is not None
+
+    def _cache_get(self, key: str):
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+        return decision
+
+    def _cache_put(self, key: str, decision: RoutingDecision):
+        if decision.tier == "fallback":
+            return  # Made while the LLM was failing; ask it again next time
+        with self._lock:
+            self._cache[key] = decision
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _finish(self, user_query: str, decision: RoutingDecision, start: float,
+                cached=False) -> RoutingDecision:
+        if cached:
+            # The cached label holds for every query with the same normalized text, but the URL
+            # must come from this exact query (paths are case-sensitive).
+            decision = replace(decision, cached=True, url=self._classify_locally(user_query).url)
+        else:
+            with self._lock:
+                self.tier_counts[decision.tier] += 1
+        if decision.label == "q2":
+            decision.url = None
+        decision.elapsed_us = (time.perf_counter() - start) * 1_000_000
+        return decision
+
+    def route(self, user_query: str) -> RoutingDecision:
+        """
+        Classifies the query with the cheapest tier that is confident enough.
+        The LLM is only consulted for low-confidence inputs; decisions are cached by normalized
+        text, except fallbacks made because the LLM call failed.
+        """
+        start = time.perf_counter()
+        key = normalize_query(user_query)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return self._finish(user_query, cached, start, cached=True)
+
+        decision = self._classify_locally(user_query)
+        if self._needs_llm(decision):
+            try:
+                decision = self._resolve_with_llm(decision, self._classify_with_llm(user_query))
+            except Exception as e:
+                logger.warning("Error during LLM call for classification: %s", e)
+                decision.tier = "fallback"
+
+        self._cache_put(key, replace(decision))
+        return self._finish(user_query, decision, start)
+
+    def classify_batch(self, user_queries: list) -> list:
+        """
+        Classifies many queries at once. Cached and locally decidable queries never reach the LLM;
+        the remaining distinct queries are packed BATCH_PROMPT_SIZE to a prompt, and anything the
+        batch answer misses is classified individually in parallel.
+        Returns one RoutingDecision per input, in order.
+        """
+        start = time.perf_counter()
+        keys = [normalize_query(query) for query in user_queries]
+        decisions = {}
+        ambiguous = {}
+        cached_keys = set()
+
+        for query, key in zip(user_queries, keys):
+            if key in decisions or key in ambiguous:
+                continue
+            cached = self._cache_get(key)
+            if cached is not None:
+                decisions[key] = cached
+                cached_keys.add(key)
+                continue
+            decision = self._classify_locally(query)
+            if self._needs_llm(decision):
+                ambiguous[key] = (query, decision)
             else:
-                # Fallback or error handling
-                print(f"Warning: LLM returned unexpected classification: {classification}")
-                # A simple fallback based on URL presence
-                # return 'q1' if self.url_pattern.search(user_query) else 'q2'
-                return 'q2' # Default fallback
-        except Exception as e:
-            print(f"Error during LLM call for classification: {e}")
-            # Fallback mechanism
-            # return 'q1' if self.url_pattern.search(user_query) else 'q2'
-            return 'q2' # Default fallback
+                decisions[key] = decision
+
+        pending = list(ambiguous.items())
+        for offset in range(0, len(pending), BATCH_PROMPT_SIZE):
+            chunk = pending[offset:offset + BATCH_PROMPT_SIZE]
+            try:
+                answers = self._classify_batch_with_llm([query for _, (query, _) in chunk])
+            except Exception as e:
+                logger.warning("Error during batch LLM call for classification: %s", e)
+                answers = {}
+            for position, (key, (query, decision)) in enumerate(chunk):
+                if position in answers:
+                    decisions[key] = self._resolve_with_llm(decision, answers[position])
+
+        missing = [(key, query, decision) for key, (query, decision) in pending
+                   if key not in decisions]
+        if missing:
+            def classify_one(item):
+                key, query, decision = item
+                try:
+                    return key, self._resolve_with_llm(decision, self._classify_with_llm(query))
+                except Exception as e:
+                    logger.warning("Error during LLM call for classification: %s", e)
+                    decision.tier = "fallback"
+                    return key, decision
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                decisions.update(executor.map(classify_one, missing))
+
+        results = []
+        seen = set(cached_keys)
+        for query, key in zip(user_queries, keys):
+            decision = decisions[key]
+            if key in seen:
+                # Served from the cache, or a repeat of a query decided earlier in this batch
+                results.append(self._finish(query, decision, start, cached=True))
+                continue
+            seen.add(key)
+            self._cache_put(key, replace(decision))
+            results.append(self._finish(query, replace(decision), start))
+        return results
+
+    def classify_file(self, path: str) -> list:
+        """Classifies a file of user requests, one per line (blank lines are skipped)."""
+        with open(path, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+        return list(zip(queries, self.classify_batch(queries)))
+
+    def classify_query(self, user_query: str) -> str:
+        """
+        Classifies the user query as 'q1' or 'q2'.
+        """
+        return self.route(user_query).label
 
 if __name__ == '__main__':
     # Example Usage (requires a mock or real LLM client)
     class MockLLMClient:
-        def chat_completions_create(self, model, messages, max_tokens):
+        """Mimics `together.Together().chat.completions.create`."""
+
+        def __init__(self):
+            self.chat = self
+            self.completions = self
+
+        def create(self, model, messages, max_tokens):
             # Simulate LLM response based on keywords for testing
-            query_content = messages[0]['content']
-            if "http" in query_content and "unegui.mn" in query_content:
-                class Choice:
-                    def __init__(self, text):
-                        self.message = type('obj', (object,), {'content': text})
-                class MockResponse:
-                    def __init__(self, choices):
-                        self.choices = choices
-                return MockResponse([Choice("q1")])
-            else:
-                class Choice:
-                    def __init__(self, text):
-                        self.message = type('obj', (object,), {'content': text})
-                class MockResponse:
-                    def __init__(self, choices):
-                        self.choices = choices
-                return MockResponse([Choice("q2")])
+            query_content = messages[0]['content'].split("Input:")[-1]
+            text = "q1" if "http" in query_content else "q2"
+            message = type('obj', (object,), {'content': text})
+            choice = type('obj', (object,), {'message': message})
+            return type('obj', (object,), {'choices': [choice]})
 
     mock_client = MockLLMClient()
     router = RouterAgent(llm_client=mock_client)
-    
-    test_query_url = "Can you analyze this listing? http://unegui.mn/property/12345"
-    test_query_general = "I'm looking for apartments in Ulaanbaatar near the city center."
-    
-    print(f"Query: '{test_query_url}' -> Classification: {router.classify_query(test_query_url)}")
-    print(f"Query: '{test_query_general}' -> Classification: {router.classify_query(test_query_general)}")
 
+    test_queries = [
+        "Can you analyze this listing? http://unegui.mn/property/12345",
+        "unegui.mn/adv/9341198_bgd-4-khoroolold-17-mkv-azhlyn-bair/",
+        "Look at https://example.com/listing/42",
+        "I'm looking for apartments in Ulaanbaatar near the city center.",
+        "Хан-Уул дүүрэгт 2 өрөө байр",
+        "hello",
+    ]
+    for query in test_queries:
+        decision = router.route(query)
+        print(f"Query: '{query}' -> {decision.label} (tier={decision.tier}, "
+              f"confidence={decision.confidence:.2f}, {decision.elapsed_us:.0f} µs)")
+    print(f"Tier counts: {router.tier_counts}")
+
+    batch = test_queries + ["HELLO!", "хан-уул дүүрэгт 2 өрөө байр"]
+    print("\nBatch classification:")
+    for query, decision in zip(batch, router.classify_batch(batch)):
+        print(f"  {decision.label} tier={decision.tier:<8} cached={decision.cached!s:<5} {query}")
+    print(f"Tier counts: {router.tier_counts}, cache hits: {router.cache_hits}")
@@ -1,72 +1,103 @@
+import asyncio
+import logging
 import os
 
-import pandas as pd
-from .build_index import build_vector_store
-from langchain_together import ChatTogether
-from ..generate_pdf import create_pdf_report
+from ..comparables import comparables_table, summarize_comparables
+from ..generate_pdf import (
+    create_combined_pdf_report,
+    create_pdf_archive,
+    create_pdf_report,
+    report_filename,
+)
+from ..listing import Listing, as_listing
+from ..llm import DEFAULT_MODEL, InstrumentedLLM, create_llm, format_usage, track_usage
+from ..market_index import get_market_index
+from ..scoring import describe_market_position, describe_verdict, score_listing, verdict_label
+from ..tracing import current_span, traced
+from ..utils import truncate_to_tokens
+
+# Prompt-size budgets: listing descriptions can be several pages long
+DESCRIPTION_TOKEN_BUDGET = 300
+MAX_PROMPT_INSIGHTS = 8
+
+logger = logging.getLogger(__name__)
 
 
 class WriterAgent:
-    def __init__(self, model="meta-llama/Meta-Llama-3-70B-Instruct-Turbo"):
+    def __init__(self, model=DEFAULT_MODEL, use_llm=True, llm=None, report_cache=None):
         """
-        Initializes the WriterAgent with Together's ChatTogether client.
+        Initializes the WriterAgent with the backend chosen by LLM_BACKEND (Together by default).
+        With use_llm=False no client is created and reports are narrated from the deterministic
+        score. An already constructed backend (e.g. a shared one, or StubLLM for tests) can be
+        passed as `llm`.
+        With a `report_cache` (report_cache.ReportCache), a report already written for the same
+        listing, market data, language and model is returned as is, PDF included.
         """
-        self.api_key = os.getenv("TOGETHER_API_KEY", "your_together_api_key_here")
-        if not self.api_key:
-            raise ValueError("TOGETHER_API_KEY not found in environment variables.")
-        self.llm = ChatTogether(
-            together_api_key=self.api_key,
-            model=model
-        )
-        print(f"WriterAgent: Initialized with model {model}")
-
-    def generate_report(self, listing_details: dict, market_context: dict = None, translate=False) -> str:
+        self.use_llm = use_llm
+        self.llm = llm
+        self.report_cache = report_cache
+        if not use_llm:
+            logger.info("Initialized in LLM-free mode")
+            return
+        if llm is not None:
+            logger.info("Initialized with provided client %s", type(llm).__name__)
+            if not hasattr(llm, "tracker"):
+                self.llm = InstrumentedLLM(llm)
+            return
+        self.llm = create_llm(model=model)
+        logger.info("Initialized with model %s", self.llm.model)
+
+    @traced("writer.report")
+    def generate_report(self, listing_details: Listing, market_context: dict = None,
+                        translate=False) -> str:
         """
         Generates a textual report based on listing details and market context.
         Optionally translates the report to Mongolian.
         """
-        print("WriterAgent: Generating textual report...")
+        logger.info("Generating textual report")
 
         if not listing_details:
             return "Error: No listing details provided to generate report."
+        listing_details = as_listing(listing_details)
 
         if market_context is None:
-            market_context = {
-                "listings_analyzed": 0,
-                "average_price": "N/A",
-                "key_insights": ["No market data available."]
-            }
+            market_context = _empty_market_context()
+
+        if not self.use_llm:
+            return self._deterministic_report(listing_details, market_context, translate)
 
         prompt = f"""
 You are a professional real estate analyst.
 
-Your task is to analyze whether the following apartment listing is a good deal, using step-by-step reasoning based on the listing and the market data.
+Your task is to analyze whether the following apartment listing is a good deal, using step-by-step \
+reasoning based on the listing and the market data.
 
 Use the following format:
 1. Summarize the listing in 1–2 sentences.
 2. Compare the listing's price and area to the market average.
 3. Analyze the district/location and any other notable features.
-4. Based on your reasoning, give a verdict: **"Good deal"**, **"Average deal"**, or **"Overpriced"** — and explain why.
+4. Based on your reasoning, give a verdict: **"Good deal"**, **"Average deal"**, or \
+**"Overpriced"** — and explain why.
 
 Be specific and base your reasoning on numbers where possible.
 
 ---
 
 **Apartment Listing Details:**
-URL: {listing_details.get("url", "N/A")}
-Title: {listing_details.get("title", "N/A")}
-Price: {listing_details.get("price", "N/A")}
-Location: {listing_details.get("location", "N/A")}
-Area: {listing_details.get("area", "N/A sqm")}
-Rooms: {listing_details.get("bedrooms", "N/A")}
-Description: {listing_details.get("description", "N/A")}
+URL: {listing_details.url}
+Title: {listing_details.title}
+Price: {listing_details.price_text}
+Location: {listing_details.location}
+Area: {listing_details.area_text}
+Rooms: {listing_details.rooms_text}
+Description: {_prompt_description(listing_details)}
 
 **Market Context:**
 Listings Analyzed: {market_context.get("listings_analyzed", "N/A")}
 Average Price: {market_context.get("average_price", "N/A")}
 Key Insights:
-{chr(10).join(f"- {insight}" for insight in market_context.get("key_insights", ["N/A"]))}
-
+{chr(10).join(f"- {insight}" for insight in _prompt_insights(market_context))}
+{_prompt_comparables(market_context)}
 ---
 
 Format:
@@ -82,10 +113,10 @@ Format:
 """
 
         try:
-            print("WriterAgent: Sending prompt to Together LLM...")
-            response = self.llm.invoke(prompt, max_tokens=1024, temperature=0.2)
+            logger.debug("Sending report prompt to LLM:\n%s", prompt)
+            response = self.llm.invoke(prompt, label="report", max_tokens=1024, temperature=0.2)
             report_content = response.content
-            print("WriterAgent: Report content received from LLM.")
+            logger.info("Report content received from LLM (%d chars)", len(report_content))
 
             if translate:
                 return self.translate_to_mongolian(report_content)
@@ -93,14 +124,25 @@ Format:
                 return report_content
 
         except Exception as e:
-            print(f"WriterAgent: Error during LLM call: {e}")
-            return f"Error: Could not generate report using LLM. Details: {e}"
+            logger.warning("Error during LLM call, using the computed verdict instead: %s", e)
+            return self._deterministic_report(listing_details, market_context, translate)
+
+    def _deterministic_report(self, listing_details: Listing, market_context: dict,
+                              translate=False) -> str:
+        score = score_listing(listing_details, market_context.get("market_index"))
+        return (
+            "========== MARKET ANALYSIS REPORT ==========\n\n"
+            f"{listing_details.title} - {listing_details.price_text}\n\n"
+            f"{describe_market_position(score, translate)}\n\n"
+            f"{describe_verdict(score, translate)}\n\n"
+            "============================================"
+        )
 
     def translate_to_mongolian(self, english_text: str) -> str:
         """
         Uses the LLM to translate English report content into Mongolian.
         """
-        print("WriterAgent: Translating report to Mongolian...")
+        logger.info("Translating report to Mongolian")
 
         prompt = f"""
 Translate the following real estate market analysis report into Mongolian:
@@ -114,72 +156,294 @@ Translate the following real estate market analysis report into Mongolian:
 Only return the translated text. Do not include explanations or extra formatting.
 """
         try:
-            response = self.llm.invoke(prompt, max_tokens=1024, temperature=0.3)
+            response = self.llm.invoke(prompt, label="translation", max_tokens=1024,
+                                       temperature=0.3)
             return response.content.strip()
         except Exception as e:
-            print(f"WriterAgent: Translation failed: {e}")
-            return f"Error: Could not translate to Mongolian. Details: {e}"
+            logger.warning("Translation failed, keeping the English text: %s", e)
+            return english_text
 
-    def generate_pdf_report(self, listing_details: dict, market_context: dict = None, translate=False) -> str:
+    @traced("writer.report_data")
+    def generate_report_data(self, listing_details: Listing, market_context: dict = None,
+                             translate=False) -> dict:
+        """
+        Generates the structured report content (header fields, sections and score) without
+        rendering it.
+        """
+        listing_details = as_listing(listing_details)
+        if market_context is None:
+            market_context = _empty_market_context()
+        cache_key = self._cache_key(listing_details, market_context, translate)
+        report_data = self._cached_report_data(cache_key, listing_details, market_context)
+        if report_data is not None:
+            return report_data
+
+        with track_usage("report") as usage:
+            report_data = self._generate_structured_content(listing_details, market_context,
+                                                            translate)
+        return self._finish_report_data(report_data, cache_key, usage)
+
+    @traced("writer.report_data")
+    async def agenerate_report_data(self, listing_details: Listing, market_context: dict = None,
+                                    translate=False) -> dict:
+        """
+        generate_report_data with the two LLM sections requested concurrently, without blocking
+        the loop.
+        """
+        listing_details = as_listing(listing_details)
+        if market_context is None:
+            market_context = _empty_market_context()
+        cache_key = self._cache_key(listing_details, market_context, translate)
+        report_data = self._cached_report_data(cache_key, listing_details, market_context)
+        if report_data is not None:
+            return report_data
+
+        with track_usage("report") as usage:
+            report_data = await self._agenerate_structured_content(listing_details, market_context,
+                                                                   translate)
+        return self._finish_report_data(report_data, cache_key, usage)
+
+    def _cached_report_data(self, cache_key, listing_details: Listing, market_context: dict):
+        if cache_key is None:
+            return None
+        report_data = self.report_cache.get(cache_key, market_context)
+        if report_data is not None:
+            current_span().set(cached=True)
+            logger.info("Report for %s served from the report cache", listing_details.url)
+        return report_data
+
+    def _finish_report_data(self, report_data: dict, cache_key, usage) -> dict:
+        if cache_key is not None:
+            self.report_cache.put(cache_key, report_data)
+        if self.use_llm:
+            report_data["llm_usage"] = summary = usage.summary()
+            current_span().set(llm_calls=summary["calls"], prompt_tokens=summary["prompt_tokens"],
+                               completion_tokens=summary["completion_tokens"])
+            logger.info("Report used %d LLM calls, %d prompt + %d completion tokens in %.2fs",
+                        summary["calls"], summary["prompt_tokens"], summary["completion_tokens"],
+                        summary["seconds"])
+        return report_data
+
+    def generate_pdf_report(self, listing_details: Listing, market_context: dict = None,
+                            translate=False, output_dir: str = None) -> str:
         """
         Generates a structured PDF report with title/price header, market analysis, and conclusion.
         """
-        print("WriterAgent: Generating structured PDF report...")
+        logger.info("Generating structured PDF report")
 
         if not listing_details:
             return "Error: No listing details provided to generate report."
+        listing_details = as_listing(listing_details)
 
-        if market_context is None:
-            market_context = {
-                "listings_analyzed": 0,
-                "average_price": "N/A",
-                "key_insights": ["No market data available."]
-            }
+        cache_key = self._cache_key(listing_details, market_context, translate)
+        cached_pdf = self._cached_pdf(cache_key)
+        if cached_pdf:
+            return cached_pdf
 
         # Generate structured content for PDF
-        report_data = self._generate_structured_content(listing_details, market_context, translate)
-        
-        # Create PDF using the generate_pdf module
-        pdf_filename = f"real_estate_report_{listing_details.get('title', 'unknown').replace(' ', '_')[:30]}.pdf"
+        report_data = self.generate_report_data(listing_details, market_context, translate)
+        return self._render_pdf(report_data, cache_key, output_dir)
+
+    async def agenerate_pdf_report(self, listing_details: Listing, market_context: dict = None,
+                                   translate=False, output_dir: str = None) -> str:
+        """generate_pdf_report for the async pipeline; the PDF is rendered in a worker thread."""
+        logger.info("Generating structured PDF report")
+
+        if not listing_details:
+            return "Error: No listing details provided to generate report."
+        listing_details = as_listing(listing_details)
+
+        cache_key = self._cache_key(listing_details, market_context, translate)
+        cached_pdf = self._cached_pdf(cache_key)
+        if cached_pdf:
+            return cached_pdf
+
+        report_data = await self.agenerate_report_data(listing_details, market_context, translate)
+        return await asyncio.to_thread(self._render_pdf, report_data, cache_key, output_dir)
+
+    def _cached_pdf(self, cache_key):
+        # With a report cache the PDF lives in the cache directory and is reused from there
+        if cache_key is None:
+            return None
+        cached_pdf = self.report_cache.pdf_path(cache_key)
+        if cached_pdf:
+            logger.info("PDF report served from the report cache: %s", cached_pdf)
+        return cached_pdf
+
+    def _render_pdf(self, report_data: dict, cache_key, output_dir: str = None) -> str:
+        if cache_key is not None:
+            pdf_filename = self.report_cache.pdf_target(cache_key)
+        else:
+            pdf_filename = report_filename(report_data)
+            if output_dir:
+                pdf_filename = os.path.join(output_dir, pdf_filename)
         pdf_path = create_pdf_report(report_data, pdf_filename)
-        
+        if cache_key is not None:
+            self.report_cache.evict()
         return pdf_path
 
-    def _generate_structured_content(self, listing_details: dict, market_context: dict, translate=False) -> dict:
+    def _cache_key(self, listing_details: Listing, market_context: dict, translate: bool):
+        if self.report_cache is None:
+            return None
+        if market_context is None:
+            market_context = {}
+        model = getattr(self.llm, "model", None) if self.use_llm else "deterministic"
+        return self.report_cache.key(listing_details, market_context, translate, model)
+
+    def generate_batch_pdf_report(self, listings: list, market_data: dict, translate=False,
+                                  output_path: str = None, archive=False, comparables=None,
+                                  deduplicator=None) -> str:
         """
-        Generates structured content for PDF report with separate sections.
+        Reports on many listings at once. By default they go into one PDF with the market table
+        rendered once; with `archive=True` each listing gets its own PDF inside a zip that is
+        written as the reports are generated. Failed listings (with an error) are skipped.
+        `comparables` and `deduplicator` are passed on to extract_market_context.
         """
-        # Extract key information for header
-        title = listing_details.get("title", "N/A")
-        price = listing_details.get("price", "N/A")
-        area = listing_details.get("area", "N/A")
-        location = listing_details.get("location", "N/A")
-
-        # Generate market analysis section
-        market_analysis = self._generate_market_analysis(listing_details, market_context, translate)
-        
-        # Generate conclusion and recommendation
-        conclusion = self._generate_conclusion(listing_details, market_context, translate)
-
-        report_data = {
-            "title": title,
-            "price": price,
-            "area": area,
-            "location": location,
-            "market_analysis": market_analysis,
-            "conclusion": conclusion,
-            "url": listing_details.get("url", "N/A"),
-            "market_data_df": market_context.get("market_data_df", None)  # Include market data DataFrame
-        }
+        listings = [listing for listing in map(as_listing, listings) if listing.error is None]
+        logger.info("Generating %s for %d listings",
+                    "PDF archive" if archive else "combined PDF report", len(listings))
+        if not listings:
+            return "Error: No listing details provided to generate report."
 
-        return report_data
+        def report_data_for_each():
+            for listing in listings:
+                market_context = extract_market_context(market_data, listing, comparables,
+                                                        deduplicator)
+                yield self.generate_report_data(listing, market_context, translate)
 
-    def _generate_market_analysis(self, listing_details: dict, market_context: dict, translate=False) -> str:
+        with track_usage("batch") as usage:
+            if archive:
+                result = create_pdf_archive(report_data_for_each(),
+                                            output_path or "real_estate_reports.zip")
+            else:
+                result = create_combined_pdf_report(report_data_for_each(),
+                                                    output_path or "real_estate_portfolio.pdf")
+        self.log_batch_usage(usage, len(listings))
+        return result
+
+    def log_batch_usage(self, usage, reports: int):
+        """Logs (and adds to the current span) the LLM usage of a batch of reports."""
+        if not self.use_llm:
+            return
+        summary = usage.summary()
+        current_span().set(llm_calls=summary["calls"], prompt_tokens=summary["prompt_tokens"],
+                           completion_tokens=summary["completion_tokens"])
+        logger.info("Batch of %d reports used %s", reports, format_usage(summary))
+
+    def _generate_structured_content(self, listing_details: Listing, market_context: dict,
+                                     translate=False) -> dict:
+        """
+        Generates structured content for PDF report with separate sections.
+        """
+        # Deterministic price/m² score; the LLM only narrates the verdict
+        score = score_listing(listing_details, market_context.get("market_index"))
+
+        if self.use_llm:
+            market_analysis = self._generate_market_analysis(listing_details, market_context, score,
+                                                             translate)
+            conclusion = self._generate_conclusion(listing_details, market_context, score,
+                                                   translate)
+        else:
+            market_analysis = describe_market_position(score, translate)
+            conclusion = describe_verdict(score, translate)
+        return _structured_report(listing_details, market_context, score, market_analysis,
+                                  conclusion, translate)
+
+    async def _agenerate_structured_content(self, listing_details: Listing, market_context: dict,
+                                            translate=False) -> dict:
+        score = score_listing(listing_details, market_context.get("market_index"))
+
+        if self.use_llm:
+            market_analysis, conclusion = await asyncio.gather(
+                self._agenerate_market_analysis(listing_details, market_context, score, translate),
+                self._agenerate_conclusion(listing_details, market_context, score, translate),
+            )
+        else:
+            market_analysis = describe_market_position(score, translate)
+            conclusion = describe_verdict(score, translate)
+        return _structured_report(listing_details, market_context, score, market_analysis,
+                                  conclusion, translate)
+
+    def _generate_market_analysis(self, listing_details: Listing, market_context: dict,
+                                  score: dict, translate=False) -> str:
         """
         Generates the market analysis section of the report.
         """
-        prompt = f"""
-You are a professional real estate analyst. Generate a detailed market analysis section for the following apartment listing.
+        prompt = _market_analysis_prompt(listing_details, market_context, score, translate)
+        try:
+            response = self.llm.invoke(prompt, label="market_analysis", max_tokens=800,
+                                       temperature=0.2)
+            return response.content.strip()
+        except Exception as e:
+            logger.warning("Market analysis failed, using the computed price position: %s", e)
+            return describe_market_position(score, translate)
+
+    async def _agenerate_market_analysis(self, listing_details: Listing, market_context: dict,
+                                         score: dict, translate=False) -> str:
+        prompt = _market_analysis_prompt(listing_details, market_context, score, translate)
+        try:
+            response = await self.llm.ainvoke(prompt, label="market_analysis", max_tokens=800,
+                                              temperature=0.2)
+            return response.content.strip()
+        except Exception as e:
+            logger.warning("Market analysis failed, using the computed price position: %s", e)
+            return describe_market_position(score, translate)
+
+    def _generate_conclusion(self, listing_details: Listing, market_context: dict, score: dict,
+                             translate=False) -> str:
+        """
+        Generates the conclusion and recommendation section.
+        """
+        prompt = _conclusion_prompt(listing_details, market_context, score, translate)
+        try:
+            response = self.llm.invoke(prompt, label="conclusion", max_tokens=600, temperature=0.2)
+            return response.content.strip()
+        except Exception as e:
+            logger.warning("Conclusion failed, using the computed verdict: %s", e)
+            return describe_verdict(score, translate)
+
+    async def _agenerate_conclusion(self, listing_details: Listing, market_context: dict,
+                                    score: dict, translate=False) -> str:
+        prompt = _conclusion_prompt(listing_details, market_context, score, translate)
+        try:
+            response = await self.llm.ainvoke(prompt, label="conclusion", max_tokens=600,
+                                              temperature=0.2)
+            return response.content.strip()
+        except Exception as e:
+            logger.warning("Conclusion failed, using the computed verdict: %s", e)
+            return describe_verdict(score, translate)
+
+
+def _empty_market_context() -> dict:
+    return {
+        "listings_analyzed": 0,
+        "average_price": "N/A",
+        "key_insights": ["No market data available."]
+    }
+
+
+def _structured_report(listing_details: Listing, market_context: dict, score: dict,
+                       market_analysis: str, conclusion: str, translate=False) -> dict:
+    return {
+        "title": listing_details.title,
+        "price": listing_details.price_text,
+        "area": listing_details.area_text,
+        "location": listing_details.location,
+        "market_analysis": market_analysis,
+        "conclusion": conclusion,
+        "score": score,
+        "verdict": verdict_label(score, translate),
+        "url": listing_details.url,
+        "duplicate_urls": market_context.get("duplicates") or [],
+        "market_data_df": market_context.get("market_data_df", None)  # Market data DataFrame
+    }
+
+
+def _market_analysis_prompt(listing_details: Listing, market_context: dict, score: dict,
+                            translate=False) -> str:
+    return f"""
+You are a professional real estate analyst. Generate a detailed market analysis section for the \
+following apartment listing.
 
 Focus on:
 1. Price comparison with market averages
@@ -188,110 +452,147 @@ Focus on:
 4. Market trends and insights
 
 **Apartment Details:**
-Price: {listing_details.get("price", "N/A")}
-Area: {listing_details.get("area", "N/A")}
-Location: {listing_details.get("location", "N/A")}
-Description: {listing_details.get("description", "N/A")}
+Price: {listing_details.price_text}
+Area: {listing_details.area_text}
+Rooms: {listing_details.rooms_text}
+Location: {listing_details.location}
+Description: {_prompt_description(listing_details)}
 
 **Market Context:**
 Average Price: {market_context.get("average_price", "N/A")}
-Market Insights: {chr(10).join(market_context.get("key_insights", ["N/A"]))}
+Market Insights: {chr(10).join(_prompt_insights(market_context))}
+{_prompt_comparables(market_context)}
+**Computed Price Position (use these numbers as given):**
+{describe_market_position(score)}
 
 Provide a comprehensive market analysis in {"Mongolian" if translate else "English"}.
 """
 
-        try:
-            response = self.llm.invoke(prompt, max_tokens=800, temperature=0.2)
-            return response.content.strip()
-        except Exception as e:
-            return f"Error generating market analysis: {e}"
 
-    def _generate_conclusion(self, listing_details: dict, market_context: dict, translate=False) -> str:
-        """
-        Generates the conclusion and recommendation section.
-        """
-        prompt = f"""
-You are a professional real estate analyst. Based on the market analysis, provide a clear conclusion and recommendation for this apartment listing.
+def _conclusion_prompt(listing_details: Listing, market_context: dict, score: dict,
+                       translate=False) -> str:
+    return f"""
+You are a professional real estate analyst. Based on the market analysis, provide a clear \
+conclusion and recommendation for this apartment listing.
+
+The overall assessment has already been computed from price per m² and must not be changed:
+**{verdict_label(score)}**
 
 Include:
-1. Overall assessment (Good deal, Average deal, or Overpriced)
+1. The overall assessment above
 2. Key reasons supporting your recommendation
 3. Potential risks or considerations
 4. Final recommendation for the buyer
 
 **Property Summary:**
-Price: {listing_details.get("price", "N/A")}
-Area: {listing_details.get("area", "N/A")}
+Price: {listing_details.price_text}
+Area: {listing_details.area_text}
 Market Average: {market_context.get("average_price", "N/A")}
+{describe_market_position(score)}
 
 Provide a clear conclusion and recommendation in {"Mongolian" if translate else "English"}.
 Format your response with clear headings and bullet points where appropriate.
 """
 
-        try:
-            response = self.llm.invoke(prompt, max_tokens=600, temperature=0.2)
-            return response.content.strip()
-        except Exception as e:
-            return f"Error generating conclusion: {e}"
+
+def _prompt_description(listing_details: Listing) -> str:
+    return truncate_to_tokens(listing_details.description or "N/A", DESCRIPTION_TOKEN_BUDGET)
+
+
+def _prompt_insights(market_context: dict) -> list:
+    return market_context.get("key_insights", ["N/A"])[:MAX_PROMPT_INSIGHTS]
 
 
-def extract_market_context(market_data):
+def _prompt_comparables(market_context: dict) -> str:
+    table = market_context.get("comparables_table")
+    if not table:
+        return ""
+    return f"\n**Comparable Listings (same district, similar area and rooms):**\n{table}\n"
+
+
+@traced("writer.market_context")
+def extract_market_context(market_data, listing_details: Listing = None, comparables=None,
+                           deduplicator=None):
     """
     Extracts summary statistics from the market price data.
+    The district index is built once per market-data version; when listing details are
+    given, the listing's own district stats are looked up and put first in the insights.
+    With a ComparablesIndex (comparables.get_comparables_index) the listing's comparables are
+    summarized as well, for the prompts. With the vector store's Deduplicator, the other URLs
+    the same flat was posted under are listed in "duplicates".
     """
     context = {
         "listings_analyzed": 0,
         "average_price": "N/A",
         "key_insights": [],
-        "market_data_df": None
+        "market_data_df": None,
+        "market_index": None,
+        "district": None,
+        "district_stats": {},
+        "comparables": None,
+        "comparables_table": None,
+        "duplicates": []
     }
 
-    combined_df = pd.DataFrame()
-
-    if "new_apartment_prices" in market_data and market_data["new_apartment_prices"] is not None:
-        df_new = market_data["new_apartment_prices"].copy()
-        df_new["Type"] = "New"
-        combined_df = pd.concat([combined_df, df_new], ignore_index=True)
+    if listing_details and deduplicator is not None:
+        context["duplicates"] = deduplicator.duplicates_of(as_listing(listing_details).url)
+    if listing_details and comparables is not None:
+        summary = summarize_comparables(comparables.search(listing_details))
+        context["comparables"] = summary
+        context["comparables_table"] = comparables_table(summary)
 
-    if "old_apartment_prices" in market_data and market_data["old_apartment_prices"] is not None:
-        df_old = market_data["old_apartment_prices"].copy()
-        df_old["Type"] = "Old"
-        combined_df = pd.concat([combined_df, df_old], ignore_index=True)
+    try:
+        index = get_market_index(market_data)
+    except Exception as e:
+        context["key_insights"] = [f"Error parsing market data: {e}"]
+        return context
 
-    if combined_df.empty:
+    if not len(index):
         context["key_insights"].append("No apartment price data available.")
         return context
 
-    try:
-        combined_df["2025 Mar"] = pd.to_numeric(combined_df["2025 Mar"], errors="coerce")
-        combined_df = combined_df.dropna(subset=["2025 Mar"])
-
-        avg_price = combined_df["2025 Mar"].mean()
-        context["listings_analyzed"] = len(combined_df)
-        context["average_price"] = f"MNT {avg_price:,.0f}M"
-        context["market_data_df"] = combined_df  # Add DataFrame to context
-
-        top = combined_df.sort_values("2025 Mar", ascending=False).head(3)
-        insights = [
-            f"{row['District']} has an average price of MNT {row['2025 Mar']:.0f}M ({row['Type']})"
-            for _, row in top.iterrows()
-        ]
-        context["key_insights"] = insights
-
-    except Exception as e:
-        context["key_insights"] = [f"Error parsing market data: {e}"]
-    print(combined_df)
+    context["listings_analyzed"] = len(index)
+    context["average_price"] = f"MNT {index.average_price:,.2f}M per m²"
+    context["market_data_df"] = index.df  # Add DataFrame to context
+    context["market_index"] = index
+
+    insights = []
+    if listing_details:
+        district = as_listing(listing_details).resolved_district
+        district_stats = index.district_stats(district) if district else {}
+        if district_stats:
+            context["district"] = district
+            context["district_stats"] = district_stats
+            insights.extend(
+                f"{district} (listing's district) has an average price of "
+                f"MNT {row[index.price_column]:.2f}M per m² ({apartment_type})"
+                for apartment_type, row in district_stats.items()
+            )
+
+    insights.extend(
+        f"{row['District']} has an average price of "
+        f"MNT {row[index.price_column]:.2f}M per m² ({row['Type']})"
+        for row in index.top_rows
+    )
+    context["key_insights"] = insights
+    current_span().set(rows=len(index), insights=len(insights))
+    logger.debug("Market data:\n%s", index.df)
     return context
 
 
 if __name__ == '__main__':
+    from ..utils import configure_logging
+    from .build_index import build_vector_store
+
+    configure_logging()
+
     writer = WriterAgent()
 
     sample_listing_details, raw_market_data = build_vector_store(
         listing_urls=["https://www.unegui.mn/adv/9129580_tomor-zamd-2-oroo-zarna/"]
     )
 
-    market_context = extract_market_context(raw_market_data)
+    market_context = extract_market_context(raw_market_data, sample_listing_details)
 
     print("\n--- Testing WriterAgent with sample data ---")
     report = writer.generate_report(sample_listing_details, market_context, translate=True)
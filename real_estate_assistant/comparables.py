@@ -0,0 +1,223 @@
+# real_estate_assistant/comparables.py
+"""
+Comparable listings: the closest listings in the local store (see recrawl.py) to the one being
+analyzed, for pricing it against actual asking prices rather than the district average alone.
+
+A comparable is in the same district, within ±20% of the floor area and (when known) has the
+same number of rooms. The index keeps its rows sorted by (district, rooms, area), so that filter
+is a binary search inside one block instead of a scan over the store; the surviving candidates
+are ranked by embedding similarity to the listing (build_index.embed_texts), or by area when
+the index has no vectors.
+"""
+import logging
+import os
+import threading
+
+from .listing import Listing, ListingBatch, as_listing
+from .tracing import current_span, traced
+
+DEFAULT_K = 10
+AREA_TOLERANCE = 0.2
+_COMPARABLES_CACHE = {}
+_COMPARABLES_LOCK = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class ComparablesIndex:
+    """
+    Structured filter plus vector ranking over a ListingBatch. Build once per store version
+    (see get_comparables_index); a search then touches only the candidate rows.
+    """
+
+    def __init__(self, batch: ListingBatch, vectors=None):
+        import numpy as np
+
+        records = batch.records
+        order = np.lexsort((records["area_m2"], records["rooms"], records["district"]))
+        self.batch = batch.take(order)
+        records = self.batch.records
+        self._area = records["area_m2"].astype("f8")
+        self._price_per_m2 = self.batch.price_per_m2()
+        self._rows = {url: row for row, url in enumerate(self.batch.urls)}
+
+        self._vectors = None
+        if vectors is not None:
+            vectors = np.asarray(vectors, dtype="f4")[order]
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._vectors = vectors / np.where(norms > 0, norms, 1)
+
+        # (district code, rooms) -> (start, end) row range, rows in it sorted by area
+        keys = records["district"].astype("i8") * 65536 + records["rooms"].astype("i8")
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        else:
+            starts = np.empty(0, int)
+        ends = np.r_[starts[1:], len(keys)]
+        self._blocks = {}
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            district, rooms = int(records["district"][start]), int(records["rooms"][start])
+            self._blocks.setdefault(district, {})[rooms] = (start, end)
+
+    def __len__(self):
+        return len(self.batch)
+
+    @classmethod
+    def from_listings(cls, listings, embed: bool = True):
+        """Index over Listing objects (or their dicts); `embed` adds vectors for ranking."""
+        listings = [as_listing(listing) for listing in listings]
+        vectors = None
+        if embed and listings:
+            from .agents.build_index import embed_texts, listing_text
+
+            vectors = embed_texts([listing_text(listing) for listing in listings])
+        return cls(ListingBatch.from_listings(listings), vectors)
+
+    def _query_vector(self, listing: Listing):
+        from .agents.build_index import embed_texts, listing_text
+
+        vector = embed_texts([listing_text(listing)])[0]
+        norm = float((vector ** 2).sum()) ** 0.5
+        return vector / norm if norm > 0 else vector
+
+    @traced("comparables.search")
+    def search(self, listing, k: int = DEFAULT_K,
+               area_tolerance: float = AREA_TOLERANCE) -> ListingBatch:
+        """The up to `k` best comparables of `listing`, best first; never the listing itself."""
+        import numpy as np
+
+        listing = as_listing(listing)
+        district = listing.resolved_district
+        blocks = self._blocks.get(ListingBatch.district_code(district), {}) if district else {}
+        if listing.rooms is not None:
+            blocks = {listing.rooms: blocks[listing.rooms]} if listing.rooms in blocks else {}
+
+        ranges = []
+        for start, end in blocks.values():
+            if listing.area_m2 is not None:
+                area = self._area[start:end]
+                low = np.searchsorted(area, listing.area_m2 * (1 - area_tolerance), side="left")
+                high = np.searchsorted(area, listing.area_m2 * (1 + area_tolerance), side="right")
+                start, end = start + int(low), start + int(high)
+            if end > start:
+                ranges.append(np.arange(start, end))
+        candidates = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        candidates = candidates[np.isfinite(self._price_per_m2[candidates])]
+        own_row = self._rows.get(listing.url)
+        if own_row is not None:
+            candidates = candidates[candidates != own_row]
+
+        if len(candidates) > k:
+            if self._vectors is not None:
+                distance = -(self._vectors[candidates] @ self._query_vector(listing))
+            else:
+                distance = np.abs(self._area[candidates] - (listing.area_m2 or 0))
+            best = np.argpartition(distance, k)[:k]
+            candidates = candidates[best[np.argsort(distance[best], kind="stable")]]
+        current_span().set(candidates=len(candidates), k=k)
+        return self.batch.take(candidates)
+
+
+def summarize_comparables(comparables: ListingBatch) -> dict:
+    """Price per m² statistics (MNT million) over the comparables, plus their rows for the table."""
+    import numpy as np
+
+    if not len(comparables):
+        return {"count": 0}
+    records = comparables.records
+    price_per_m2 = comparables.price_per_m2()
+    p25, median, p75 = np.percentile(price_per_m2, [25, 50, 75])
+    return {
+        "count": len(comparables),
+        "median_price_per_m2": float(median),
+        "mean_price_per_m2": float(price_per_m2.mean()),
+        "p25_price_per_m2": float(p25),
+        "p75_price_per_m2": float(p75),
+        "rows": [
+            {"url": url, "price_mnt": float(price), "area_m2": float(area), "rooms": int(rooms),
+             "price_per_m2": float(ppm2)}
+            for url, price, area, rooms, ppm2 in zip(comparables.urls, records["price_mnt"],
+                                                    records["area_m2"], records["rooms"],
+                                                    price_per_m2)
+        ],
+    }
+
+
+def comparables_table(summary: dict, max_rows: int = DEFAULT_K) -> str:
+    """Compact plain-text table of the comparables for the LLM prompts."""
+    if not summary.get("count"):
+        return "No comparable listings found."
+    lines = [
+        f"{summary['count']} comparable listings: "
+        f"median MNT {summary['median_price_per_m2']:.2f}M per m² "
+        f"(IQR {summary['p25_price_per_m2']:.2f}–{summary['p75_price_per_m2']:.2f}, "
+        f"mean {summary['mean_price_per_m2']:.2f})",
+        "Price (MNT M) | Area (m²) | Rooms | MNT M per m²",
+    ]
+    lines.extend(
+        f"{row['price_mnt'] / 1_000_000:.0f} | {round(row['area_m2'], 1):g} | "
+        f"{row['rooms'] if row['rooms'] >= 0 else 'N/A'} | {row['price_per_m2']:.2f}"
+        for row in summary["rows"][:max_rows]
+    )
+    return "\n".join(lines)
+
+
+def get_comparables_index(store_path: str = None) -> ComparablesIndex | None:
+    """
+    The index over the listings in the recrawl store, rebuilt only when the store file changes.
+    None when there is no store yet.
+    """
+    from .recrawl import DEFAULT_DB_PATH, RecrawlStore
+
+    store_path = store_path or DEFAULT_DB_PATH
+    if not os.path.exists(store_path):
+        return None
+    version = (store_path, os.path.getmtime(store_path))
+    with _COMPARABLES_LOCK:
+        index = _COMPARABLES_CACHE.get(version)
+        if index is None:
+            store = RecrawlStore(store_path)
+            try:
+                index = ComparablesIndex.from_listings(store.listings())
+            finally:
+                store.close()
+            _COMPARABLES_CACHE.clear()
+            _COMPARABLES_CACHE[version] = index
+            logger.info("Comparables index built over %d listings from %s", len(index), store_path)
+    return index
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    import numpy as np
+
+    from .listing import DISTRICTS
+
+    rng = random.Random(0)
+    size = 500_000
+    areas = [rng.uniform(18, 160) for _ in range(size)]
+    batch = ListingBatch(np.empty(size, dtype=ListingBatch.DTYPE),
+                         [f"https://www.unegui.mn/adv/{7000000 + i}/" for i in range(size)])
+    batch.records["area_m2"] = areas
+    batch.records["rooms"] = [min(5, max(1, round(a / 30))) for a in areas]
+    batch.records["district"] = [rng.randrange(len(DISTRICTS)) for _ in range(size)]
+    batch.records["price_mnt"] = [a * rng.uniform(2.5, 6.5) * 1e6 for a in areas]
+    vectors = np.random.default_rng(0).random((size, 16), dtype=np.float32)
+
+    start = time.perf_counter()
+    index = ComparablesIndex(batch, vectors)
+    print(f"Indexed {len(index)} listings in {time.perf_counter() - start:.2f}s")
+
+    subject = Listing(url="https://www.unegui.mn/adv/9129580/",
+                      title="Төмөр замд 2 өрөө байр зарна", location="Баянгол дүүрэг",
+                      price_mnt=239e6, area_m2=49.5, rooms=2)
+    index.search(subject)
+    timings = []
+    for _ in range(50):
+        start = time.perf_counter()
+        comparables = index.search(subject)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"Search: median {sorted(timings)[len(timings) // 2]:.2f} ms over {len(timings)} runs")
+    print(comparables_table(summarize_comparables(comparables)))
@@ -0,0 +1,248 @@
+# real_estate_assistant/dedupe.py
+"""
+Near-duplicate detection for listings (the same flat reposted under a new unegui.mn ID).
+
+Each listing's title and description are reduced to a MinHash signature over character
+shingles. An LSH index splits the signatures into bands, so a new listing is compared only with
+listings that share a band, not with everything seen so far. A candidate counts as a duplicate
+when its estimated text similarity clears `threshold` and its price and area fall in the same
+or neighbouring log-scale buckets. Duplicates are merged with union-find; the first listing
+seen is the canonical one of its cluster.
+"""
+import logging
+import math
+import os
+import pickle
+import re
+import zlib
+
+from .listing import NOT_FOUND, as_listing
+from .tracing import current_span, traced
+
+NUM_PERM = 128
+LSH_BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 similarity almost always share a band
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.75
+PRICE_BUCKET_STEP = 0.05  # Buckets 5% wide; neighbouring buckets also match
+AREA_BUCKET_STEP = 0.03
+_MERSENNE_PRIME = (1 << 31) - 1
+_NON_WORD_PATTERN = re.compile(r'[^\w]+', re.UNICODE)
+
+logger = logging.getLogger(__name__)
+
+
+def _shingles(text: str) -> set:
+    text = _NON_WORD_PATTERN.sub(" ", text.lower()).strip()
+    if len(text) < SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _bucket(value, step: float):
+    return None if not value or value <= 0 else math.floor(math.log(value) / math.log1p(step))
+
+
+def _buckets_match(a, b) -> bool:
+    """Unknown values match anything; known ones must be in the same or a neighbouring bucket."""
+    return a is None or b is None or abs(a - b) <= 1
+
+
+class Deduplicator:
+    """
+    Incremental: call `add` as listings arrive (or `filter` on a batch). Re-adding a URL that was
+    already seen does not create a new entry, so recrawls can feed the same instance. `save` and
+    `load` keep one instance per vector store across runs.
+    """
+
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD, num_perm: int = NUM_PERM,
+                 bands: int = LSH_BANDS, seed: int = 1):
+        import numpy as np
+
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        self.urls = []
+        self._ids = {}
+        self._signatures = []
+        self._buckets = []  # (price bucket, area bucket) per entry
+        self._tables = [{} for _ in range(bands)]
+        self._parent = []
+        self._members = {}  # Root entry -> entries of its cluster, for clusters of two or more
+        self.stats = {"added": 0, "duplicates": 0, "candidates": 0}
+
+    def __len__(self):
+        return len(self.urls)
+
+    @classmethod
+    def load(cls, path: str) -> "Deduplicator":
+        """The instance saved at `path`, or a new one when nothing has been saved there yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as f:
+            deduplicator = pickle.load(f)
+        logger.info("Loaded %d deduplicated listings from %s", len(deduplicator), path)
+        return deduplicator
+
+    def save(self, path: str):
+        with open(path + ".part", "wb") as f:
+            pickle.dump(self, f)
+        os.replace(path + ".part", path)
+
+    def signature(self, text: str):
+        """MinHash signature of `text` (uint64 array), or None when there is no text to compare."""
+        import numpy as np
+
+        shingles = _shingles(text)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        hashes &= np.uint64(_MERSENNE_PRIME)
+        permuted = ((self._a[:, None] * hashes[None, :] + self._b[:, None])
+                    % np.uint64(_MERSENNE_PRIME))
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes()
+                for band in range(self.bands)]
+
+    def _find(self, entry: int) -> int:
+        while self._parent[entry] != entry:
+            self._parent[entry] = self._parent[self._parent[entry]]
+            entry = self._parent[entry]
+        return entry
+
+    def _union(self, a: int, b: int):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            # The earlier entry stays the root, so the canonical listing is the first one seen
+            root, other = min(root_a, root_b), max(root_a, root_b)
+            self._parent[other] = root
+            self._members.setdefault(root, [root]).extend(self._members.pop(other, [other]))
+
+    def add(self, listing) -> str | None:
+        """Indexes a listing; returns the canonical URL when it duplicates an earlier one."""
+        listing = as_listing(listing)
+        if listing.url in self._ids:
+            root = self._find(self._ids[listing.url])
+            return self.urls[root] if root != self._ids[listing.url] else None
+
+        entry = len(self.urls)
+        self.urls.append(listing.url)
+        self._ids[listing.url] = entry
+        self._parent.append(entry)
+        self.stats["added"] += 1
+
+        text = " ".join(t for t in (listing.title, listing.description) if t and t != NOT_FOUND)
+        signature = self.signature(text) if listing.error is None else None
+        buckets = (_bucket(listing.price_mnt, PRICE_BUCKET_STEP),
+                   _bucket(listing.area_m2, AREA_BUCKET_STEP))
+        self._signatures.append(signature)
+        self._buckets.append(buckets)
+        if signature is None:
+            return None
+
+        keys = self._band_keys(signature)
+        candidates = set()
+        for table, key in zip(self._tables, keys):
+            candidates.update(table.get(key, ()))
+        self.stats["candidates"] += len(candidates)
+
+        for candidate in sorted(candidates):
+            other = self._buckets[candidate]
+            if not (_buckets_match(buckets[0], other[0]) and _buckets_match(buckets[1], other[1])):
+                continue
+            if float((self._signatures[candidate] == signature).mean()) >= self.threshold:
+                self._union(candidate, entry)
+
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append(entry)
+
+        root = self._find(entry)
+        if root != entry:
+            self.stats["duplicates"] += 1
+            return self.urls[root]
+        return None
+
+    @traced("dedupe.filter")
+    def filter(self, listings: list) -> list:
+        """Adds every listing and returns those that are not duplicates, in order."""
+        unique = [listing for listing in listings if self.add(listing) is None]
+        current_span().set(listings=len(listings), duplicates=len(listings) - len(unique))
+        if len(unique) < len(listings):
+            logger.info("Dropped %d duplicate listings of %d", len(listings) - len(unique),
+                        len(listings))
+        return unique
+
+    def canonical(self, url: str) -> str:
+        """
+        The first-seen URL of the listing's cluster (the URL itself when it is unique or unknown).
+        """
+        entry = self._ids.get(url)
+        return url if entry is None else self.urls[self._find(entry)]
+
+    def duplicates_of(self, url: str) -> list:
+        """The other URLs in the listing's cluster, canonical first; [] when it has none."""
+        entry = self._ids.get(url)
+        if entry is None:
+            return []
+        members = sorted(self._members.get(self._find(entry), ()))
+        return [self.urls[member] for member in members if member != entry]
+
+    def clusters(self) -> list:
+        """Duplicate clusters as lists of URLs, canonical first; singletons are left out."""
+        return [[self.urls[member] for member in sorted(members)]
+                for _, members in sorted(self._members.items())]
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    from .listing import Listing
+
+    base = Listing(
+        url="https://www.unegui.mn/adv/9129580/",
+        title="Төмөр замд 2 өрөө байр зарна",
+        description="Төмөр замд 2 өрөө байр зарна. Нарлаг, дулаан, шинэ засвартай. "
+                    "Сургууль цэцэрлэг ойрхон. 12 давхарын 7 давхарт, 2016 онд ашиглалтад "
+                    "орсон, цонх урд зүг.",
+        price_mnt=239e6, area_m2=49.5, rooms=2,
+    )
+    repost = Listing(url="https://www.unegui.mn/adv/9311207/", title=base.title + "!!",
+                     description=base.description.replace("шинэ засвартай",
+                                                          "шинэ засвартай, яаралтай"),
+                     price_mnt=235e6, area_m2=49.5, rooms=2)
+    same_text_other_flat = Listing(url="https://www.unegui.mn/adv/9311300/", title=base.title,
+                                   description=base.description, price_mnt=310e6, area_m2=65,
+                                   rooms=3)
+
+    dedupe = Deduplicator()
+    for listing in (base, repost, same_text_other_flat):
+        print(f"{listing.url} -> duplicate of {dedupe.add(listing)}")
+    print(f"Clusters: {dedupe.clusters()}")
+
+    words = ("байр", "өрөө", "зарна", "шинэ", "засвартай", "дулаан", "нарлаг", "төв", "ойрхон",
+             "давхар", "сургууль", "граж", "тагттай", "хотхон", "цонх", "яаралтай", "үнэ",
+             "тохиролцоно")
+    rng = random.Random(0)
+    synthetic = [Listing(url=f"https://www.unegui.mn/adv/{8000000 + i}/",
+                         description=" ".join(rng.choice(words) for _ in range(25)),
+                         price_mnt=rng.randint(60, 600) * 1e6, area_m2=rng.randint(20, 150))
+                 for i in range(5000)]
+    reposts = [Listing(url=f"https://www.unegui.mn/adv/{9000000 + i}/",
+                       description=x.description + " яаралтай", price_mnt=x.price_mnt,
+                       area_m2=x.area_m2)
+               for i, x in enumerate(synthetic[:500])]
+    dedupe = Deduplicator()
+    start = time.perf_counter()
+    unique = dedupe.filter(synthetic + reposts)
+    elapsed = time.perf_counter() - start
+    print(f"{len(synthetic) + len(reposts)} listings -> {len(unique)} unique in {elapsed:.2f}s, "
+          f"{dedupe.stats['candidates']} candidate pairs checked")
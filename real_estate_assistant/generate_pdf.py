@@ -1,25 +1,63 @@
 # real_estate_assistant/generate_pdf.py
 
 # Ensure you have weasyprint installed: pip install weasyprint
-import pandas as pd
+from __future__ import annotations
+
+import hashlib
+import logging
 import os
 import re
+import threading
+import zipfile
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+from .market_index import PRICE_COLUMN, month_columns
+from .tracing import current_span, traced
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# weasyprint takes about a second to import, so it is loaded on the first PDF render.
+_weasyprint = None
+# FontConfiguration is costly to build; keep one per thread and reuse it for every render.
+_renderer_state = threading.local()
+
+logger = logging.getLogger(__name__)
+
+def load_weasyprint():
+    """
+    Imports weasyprint on first use. Returns the module, or None if it is not installed.
+    """
+    global _weasyprint
+    if _weasyprint is None:
+        try:
+            import weasyprint
+            from weasyprint.text.fonts import FontConfiguration  # noqa: F401
+            _weasyprint = weasyprint
+        except (ImportError, OSError):
+            _weasyprint = False
+            logger.warning("weasyprint library not found. PDF generation will not be available. "
+                           "Install with 'pip install weasyprint'")
+    return _weasyprint or None
 
-try:
-    from weasyprint import HTML, CSS
-    from weasyprint.text.fonts import FontConfiguration
-    WEASYPRINT_AVAILABLE = True
-except ImportError:
-    WEASYPRINT_AVAILABLE = False
-    print("Warning: weasyprint library not found. PDF generation will not be available. Install with 'pip install weasyprint'")
+def get_font_config():
+    """Returns this thread's warm weasyprint FontConfiguration."""
+    font_config = getattr(_renderer_state, "font_config", None)
+    if font_config is None:
+        font_config = load_weasyprint().text.fonts.FontConfiguration()
+        _renderer_state.font_config = font_config
+    return font_config
 
+@traced("pdf.render")
 def create_pdf_report(report_data: dict, filename: str = "real_estate_report.pdf") -> str:
     """
-    Creates a structured PDF report with header, market analysis, and conclusion sections using weasyprint.
+    Creates a structured PDF report with header, market analysis, and conclusion sections using
+    weasyprint.
     """
-    if not WEASYPRINT_AVAILABLE:
-        print("Cannot generate PDF: weasyprint library is missing.")
+    weasyprint = load_weasyprint()
+    if weasyprint is None:
+        logger.error("Cannot generate PDF: weasyprint library is missing")
         return f"Error: PDF generation failed due to missing weasyprint. Content:\n{report_data}"
 
     try:
@@ -27,37 +65,296 @@ def create_pdf_report(report_data: dict, filename: str = "real_estate_report.pdf
         html_content = generate_html_report(report_data)
         
         # Create PDF using weasyprint
-        font_config = FontConfiguration()
-        html_doc = HTML(string=html_content)
+        font_config = get_font_config()
+        html_doc = weasyprint.HTML(string=html_content)
         
         # Generate PDF
         html_doc.write_pdf(filename, font_config=font_config)
+        current_span().set(html_chars=len(html_content), bytes=os.path.getsize(filename))
         
-        print(f"PDF report generated: {filename}")
+        logger.info("PDF report generated: %s", filename)
+        return os.path.abspath(filename)
+    except Exception as e:
+        logger.exception("Error generating PDF")
+        return f"Error: PDF generation failed. {e}"
+
+def report_filename(report_data: dict, extension: str = "pdf") -> str:
+    """
+    File name for a listing's report: a slug of the title plus a short hash of the URL, so
+    listings whose titles start the same still get different files.
+    """
+    slug = re.sub(r'[^\w-]+', '_', report_data.get("title") or "report").strip("_")[:40] or "report"
+    key = report_data.get("url") or report_data.get("title") or ""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest()
+    return f"real_estate_report_{slug}_{digest}.{extension}"
+
+@traced("pdf.render_combined")
+def create_combined_pdf_report(reports, filename: str = "real_estate_portfolio.pdf") -> str:
+    """
+    Renders many listings into one PDF: the market table once, then a section per listing
+    (see generate_combined_html_report). `reports` may be a generator: each listing's section
+    is built as it is produced, and the PDF is laid out once the last one is in.
+    """
+    weasyprint = load_weasyprint()
+    if weasyprint is None:
+        logger.error("Cannot generate PDF: weasyprint library is missing")
+        return "Error: PDF generation failed due to missing weasyprint."
+
+    try:
+        count = 0
+
+        def counted(reports):
+            nonlocal count
+            for count, report_data in enumerate(reports, 1):
+                yield report_data
+
+        html_content = generate_combined_html_report(counted(reports))
+        weasyprint.HTML(string=html_content).write_pdf(filename, font_config=get_font_config())
+        current_span().set(reports=count, html_chars=len(html_content),
+                           bytes=os.path.getsize(filename))
+        logger.info("Combined PDF report for %d listings generated: %s", count, filename)
+        return os.path.abspath(filename)
+    except Exception as e:
+        logger.exception("Error generating combined PDF")
+        return f"Error: PDF generation failed. {e}"
+
+@traced("pdf.render_archive")
+def create_pdf_archive(reports, filename: str = "real_estate_reports.zip") -> str:
+    """
+    Renders each report straight into a zip archive, one PDF per listing named by
+    report_filename. `reports` may be a generator: each report is rendered and written before
+    the next is produced, so only one PDF is ever held in memory.
+    """
+    weasyprint = load_weasyprint()
+    if weasyprint is None:
+        logger.error("Cannot generate PDF: weasyprint library is missing")
+        return "Error: PDF generation failed due to missing weasyprint."
+
+    try:
+        count = 0
+        names = set()
+        with zipfile.ZipFile(filename, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for report_data in reports:
+                name = report_filename(report_data)
+                if name in names:  # The same listing twice
+                    name = name.replace(".pdf", f"_{count}.pdf")
+                names.add(name)
+                with archive.open(name, "w") as entry:
+                    weasyprint.HTML(string=generate_html_report(report_data)).write_pdf(
+                        entry, font_config=get_font_config())
+                count += 1
+        current_span().set(reports=count, bytes=os.path.getsize(filename))
+        logger.info("PDF archive with %d reports generated: %s", count, filename)
         return os.path.abspath(filename)
     except Exception as e:
-        print(f"Error generating PDF: {e}")
+        logger.exception("Error generating PDF archive")
         return f"Error: PDF generation failed. {e}"
 
+_REPORT_STYLE = """
+    @page {
+        size: A4;
+        margin: 2cm;
+    }
+    
+    body {
+        font-family: 'Times New Roman', 'DejaVu Serif', serif;
+        margin: 0;
+        padding: 0;
+        line-height: 1.6;
+        color: #333;
+        font-size: 12pt;
+    }
+    
+    .header {
+        text-align: center;
+        margin-bottom: 30px;
+        border-bottom: 2px solid #2c5aa0;
+        padding-bottom: 20px;
+    }
+    
+    .main-title {
+        color: #2c5aa0;
+        font-size: 22pt;
+        font-weight: bold;
+        margin-bottom: 10px;
+    }
+    
+    .property-info {
+        background-color: #f8f9fa;
+        padding: 15px;
+        border-radius: 5px;
+        margin-bottom: 25px;
+        border: 1px solid #dee2e6;
+    }
+    
+    .property-info h2 {
+        color: #28a745;
+        font-size: 16pt;
+        margin-bottom: 15px;
+        border-bottom: 1px solid #28a745;
+        padding-bottom: 5px;
+    }
+    
+    .property-table {
+        width: 100%;
+        border-collapse: collapse;
+        margin-bottom: 15px;
+    }
+    
+    .property-table td {
+        padding: 8px 12px;
+        border: 1px solid #ddd;
+        vertical-align: top;
+    }
+    
+    .property-table td:first-child {
+        background-color: #e9ecef;
+        font-weight: bold;
+        width: 25%;
+    }
+    
+    .market-data-section {
+        margin: 25px 0;
+        page-break-inside: avoid;
+    }
+    
+    .market-data-section h2 {
+        color: #28a745;
+        font-size: 16pt;
+        margin-bottom: 15px;
+        border-bottom: 1px solid #28a745;
+        padding-bottom: 5px;
+    }
+    
+    .market-table {
+        width: 100%;
+        border-collapse: collapse;
+        font-size: 10pt;
+        margin-bottom: 20px;
+    }
+    
+    .market-table th, .market-table td {
+        padding: 6px 8px;
+        text-align: left;
+        border: 1px solid #ddd;
+    }
+    
+    .market-table th {
+        background-color: #2c5aa0;
+        color: white;
+        font-weight: bold;
+    }
+    
+    .market-table tr:nth-child(even) {
+        background-color: #f8f9fa;
+    }
+    
+    .section {
+        margin: 25px 0;
+        page-break-inside: avoid;
+    }
+    
+    .section h2 {
+        color: #28a745;
+        font-size: 16pt;
+        margin-bottom: 15px;
+        border-bottom: 1px solid #28a745;
+        padding-bottom: 5px;
+    }
+    
+    .content {
+        text-align: justify;
+        margin-bottom: 15px;
+        line-height: 1.7;
+    }
+    
+    .footer {
+        margin-top: 30px;
+        padding-top: 15px;
+        border-top: 1px solid #ddd;
+        font-size: 10pt;
+        color: #666;
+    }
+    
+    .price-highlight {
+        color: #dc3545;
+        font-weight: bold;
+        font-size: 14pt;
+    }
+    
+    .page-break {
+        page-break-before: always;
+    }
+
+    .source {
+        font-size: 10pt;
+        color: #666;
+    }
+"""
+
 def generate_html_report(report_data: dict) -> str:
     """
     Generates HTML content for the PDF report.
     """
+    return _html_document(listing_section_html(report_data))
+
+def generate_combined_html_report(reports) -> str:
+    """
+    One HTML document for many listings: the market table once (from the first report that
+    has one), then each listing's section on its own page. Sections are built one report at
+    a time, so `reports` may be a generator.
+    """
+    market_df = None
+    sections = []
+    for i, report in enumerate(reports):
+        if market_df is None:
+            market_df = report.get("market_data_df")
+        sections.append(f'<div class="{"listing page-break" if i else "listing"}">'
+                        f'{listing_section_html(report, market_table=False)}</div>')
+    return _html_document(market_table_html(market_df) + "\n".join(sections))
+
+def _html_document(body: str) -> str:
     # Get current timestamp
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-    
-    # Generate market data table HTML if available
-    market_data_table = ""
-    if report_data.get("market_data_df") is not None:
-        df = report_data["market_data_df"]
-        market_data_table = f"""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Үл Хөдлөх Хөрөнгийн Тайлан</title>
+        <style>{_REPORT_STYLE}</style>
+    </head>
+    <body>
+        <div class="header">
+            <div class="main-title">ҮЛ ХӨДЛӨХ ХӨРӨНГИЙН ШИНЖИЛГЭЭНИЙ ТАЙЛАН</div>
+        </div>
+
+        {body}
+
+        <div class="footer">
+            <p>Тайлан үүсгэсэн огноо: {timestamp}</p>
+        </div>
+    </body>
+    </html>
+    """
+
+def market_table_html(df: pd.DataFrame) -> str:
+    """
+    The market data table, or "" when there is no data. The price column is headed with the
+    bulletin's latest month, the one MarketIndex copies to PRICE_COLUMN.
+    """
+    if df is None:
+        return ""
+    months = month_columns(df.columns)
+    price_header = f"{months[-1]} (MNT сая)" if months else "Үнэ (MNT сая)"
+    return f"""
         <div class="market-data-section">
             <h2>Зах Зээлийн Өгөгдөл</h2>
             <table class="market-table">
                 <thead>
                     <tr>
                         <th>Дүүрэг</th>
-                        <th>2025 Мар (MNT сая)</th>
+                        <th>{price_header}</th>
                         <th>Өөрчлөлт</th>
                         <th>Хувь (%)</th>
                         <th>Төрөл</th>
@@ -69,155 +366,25 @@ def generate_html_report(report_data: dict) -> str:
             </table>
         </div>
         """
-    
-    html_template = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Үл Хөдлөх Хөрөнгийн Тайлан</title>
-        <style>
-            @page {{
-                size: A4;
-                margin: 2cm;
-            }}
-            
-            body {{
-                font-family: 'Times New Roman', 'DejaVu Serif', serif;
-                margin: 0;
-                padding: 0;
-                line-height: 1.6;
-                color: #333;
-                font-size: 12pt;
-            }}
-            
-            .header {{
-                text-align: center;
-                margin-bottom: 30px;
-                border-bottom: 2px solid #2c5aa0;
-                padding-bottom: 20px;
-            }}
-            
-            .main-title {{
-                color: #2c5aa0;
-                font-size: 22pt;
-                font-weight: bold;
-                margin-bottom: 10px;
-            }}
-            
-            .property-info {{
-                background-color: #f8f9fa;
-                padding: 15px;
-                border-radius: 5px;
-                margin-bottom: 25px;
-                border: 1px solid #dee2e6;
-            }}
-            
-            .property-info h2 {{
-                color: #28a745;
-                font-size: 16pt;
-                margin-bottom: 15px;
-                border-bottom: 1px solid #28a745;
-                padding-bottom: 5px;
-            }}
-            
-            .property-table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 15px;
-            }}
-            
-            .property-table td {{
-                padding: 8px 12px;
-                border: 1px solid #ddd;
-                vertical-align: top;
-            }}
-            
-            .property-table td:first-child {{
-                background-color: #e9ecef;
-                font-weight: bold;
-                width: 25%;
-            }}
-            
-            .market-data-section {{
-                margin: 25px 0;
-                page-break-inside: avoid;
-            }}
-            
-            .market-data-section h2 {{
-                color: #28a745;
-                font-size: 16pt;
-                margin-bottom: 15px;
-                border-bottom: 1px solid #28a745;
-                padding-bottom: 5px;
-            }}
-            
-            .market-table {{
-                width: 100%;
-                border-collapse: collapse;
-                font-size: 10pt;
-                margin-bottom: 20px;
-            }}
-            
-            .market-table th, .market-table td {{
-                padding: 6px 8px;
-                text-align: left;
-                border: 1px solid #ddd;
-            }}
-            
-            .market-table th {{
-                background-color: #2c5aa0;
-                color: white;
-                font-weight: bold;
-            }}
-            
-            .market-table tr:nth-child(even) {{
-                background-color: #f8f9fa;
-            }}
-            
-            .section {{
-                margin: 25px 0;
-                page-break-inside: avoid;
-            }}
-            
-            .section h2 {{
-                color: #28a745;
-                font-size: 16pt;
-                margin-bottom: 15px;
-                border-bottom: 1px solid #28a745;
-                padding-bottom: 5px;
-            }}
-            
-            .content {{
-                text-align: justify;
-                margin-bottom: 15px;
-                line-height: 1.7;
-            }}
-            
-            .footer {{
-                margin-top: 30px;
-                padding-top: 15px;
-                border-top: 1px solid #ddd;
-                font-size: 10pt;
-                color: #666;
-            }}
-            
-            .price-highlight {{
-                color: #dc3545;
-                font-weight: bold;
-                font-size: 14pt;
-            }}
-            
-            .page-break {{
-                page-break-before: always;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <div class="main-title">ҮЛ ХӨДЛӨХ ХӨРӨНГИЙН ШИНЖИЛГЭЭНИЙ ТАЙЛАН</div>
-        </div>
-        
+
+def listing_section_html(report_data: dict, market_table: bool = True) -> str:
+    """
+    The per-listing part of a report: property details, analysis, conclusion, source and the
+    other URLs the flat was posted under. The market table is included unless `market_table` is
+    False (it is then rendered once outside).
+    """
+    market_data_table = market_table_html(report_data.get("market_data_df")) if market_table else ""
+    missing_analysis = 'Зах зээлийн шинжилгээ байхгүй байна.'
+    source_html = (
+        f'<p class="source">Эх сурвалж: <span style="word-break: break-all;">'
+        f'{report_data.get("url", "")}</span></p>'
+    ) if report_data.get("url") else ''
+    duplicates = ", ".join(report_data.get("duplicate_urls") or [])
+    duplicates_html = (
+        f'<p class="source">Давхардсан зарууд: <span style="word-break: break-all;">{duplicates}'
+        '</span></p>'
+    ) if duplicates else ""
+    return f"""
         <div class="property-info">
             <h2>Орон Сууцны Мэдээлэл</h2>
             <table class="property-table">
@@ -237,15 +404,16 @@ def generate_html_report(report_data: dict) -> str:
                     <td>Байршил:</td>
                     <td>{format_location(report_data.get('location', 'N/A'))}</td>
                 </tr>
+                {format_score_rows(report_data.get('score'), report_data.get('verdict'))}
             </table>
         </div>
         
         {market_data_table}
-        
+
         <div class="section">
             <h2>Зах Зээлийн Шинжилгээ</h2>
             <div class="content">
-                {format_content(report_data.get('market_analysis', 'Зах зээлийн шинжилгээ байхгүй байна.'))}
+                {format_content(report_data.get('market_analysis', missing_analysis))}
             </div>
         </div>
         
@@ -255,16 +423,10 @@ def generate_html_report(report_data: dict) -> str:
                 {format_content(report_data.get('conclusion', 'Дүгнэлт байхгүй байна.'))}
             </div>
         </div>
-        
-        <div class="footer">
-            <p>Тайлан үүсгэсэн огноо: {timestamp}</p>
-            {f'<p>Эх сурвалж: <span style="word-break: break-all;">{report_data.get("url", "")}</span></p>' if report_data.get("url") else ''}
-        </div>
-    </body>
-    </html>
+
+        {source_html}
+        {duplicates_html}
     """
-    
-    return html_template
 
 def generate_table_rows(df: pd.DataFrame) -> str:
     """
@@ -275,7 +437,7 @@ def generate_table_rows(df: pd.DataFrame) -> str:
         rows += f"""
         <tr>
             <td>{row.get('District', 'N/A')}</td>
-            <td>{row.get('2025 Mar', 'N/A')}</td>
+            <td>{row.get(PRICE_COLUMN, 'N/A')}</td>
             <td>{row.get('Value', 'N/A')}</td>
             <td>{row.get('Percent', 'N/A')}</td>
             <td>{row.get('Type', 'N/A')}</td>
@@ -291,6 +453,31 @@ def format_location(location: str) -> str:
         return location[:300] + "..."
     return location
 
+def format_score_rows(score: dict, verdict: str) -> str:
+    """
+    Generates property table rows for the deterministic price/m² score, if one was computed.
+    """
+    if not score or score.get("price_per_m2") is None:
+        return ""
+    rows = f"""
+                <tr>
+                    <td>1 м² үнэ:</td>
+                    <td>{score['price_per_m2']:.2f} сая ₮</td>
+                </tr>
+                """
+    if score.get("verdict") is not None:
+        position = f"{score['deviation_pct']:+.1f}%, {score['percentile']:.0f}-р процентиль"
+        rows += f"""
+                <tr>
+                    <td>Үнэлгээ:</td>
+                    <td>{verdict} ({position})</td>
+                </tr>
+                """
+    return rows
+
+BLOCK_OPEN_TAGS = ('<ul>', '<ol>', '<li>', '<h1>', '<h2>', '<h3>', '<pre>', '<blockquote>')
+BLOCK_CLOSE_TAGS = ('</ul>', '</ol>', '</li>', '</h1>', '</h2>', '</h3>', '</pre>', '</blockquote>')
+
 def format_content(content: str) -> str:
     """
     Format content for HTML display, handling markdown formatting and converting to HTML.
@@ -319,15 +506,18 @@ def format_content(content: str) -> str:
     content = re.sub(r'^[\s]*[-*+]\s+(.*?)$', r'<li>\1</li>', content, flags=re.MULTILINE)
     
     # Wrap consecutive list items in <ul> tags
-    content = re.sub(r'(<li>.*?</li>(?:\s*<li>.*?</li>)*)', r'<ul>\1</ul>', content, flags=re.DOTALL)
+    content = re.sub(r'(<li>.*?</li>(?:\s*<li>.*?</li>)*)', r'<ul>\1</ul>', content,
+                     flags=re.DOTALL)
     
     # Handle numbered lists
-    content = re.sub(r'^[\s]*(\d+\.)\s+(.*?)$', r'<li value="\1">\2</li>', content, flags=re.MULTILINE)
+    content = re.sub(r'^[\s]*(\d+\.)\s+(.*?)$', r'<li value="\1">\2</li>', content,
+                     flags=re.MULTILINE)
     content = re.sub(r'<li value="(\d+)\.">(.*?)</li>', r'<li>\2</li>', content)
     
     # Wrap numbered list items in <ol> tags
-    content = re.sub(r'(<li>(?:(?!<ul>|<ol>).*?)</li>(?:\s*<li>(?:(?!<ul>|<ol>).*?)</li>)*)', 
-                    lambda m: f'<ol>{m.group(1)}</ol>' if re.search(r'^\d+\.', m.group(0)) else m.group(0), 
+    content = re.sub(r'(<li>(?:(?!<ul>|<ol>).*?)</li>(?:\s*<li>(?:(?!<ul>|<ol>).*?)</li>)*)',
+                    lambda m: (f'<ol>{m.group(1)}</ol>' if re.search(r'^\d+\.', m.group(0))
+                               else m.group(0)),
                     content, flags=re.DOTALL)
     
     # Convert line breaks to HTML breaks (but not inside lists or other block elements)
@@ -339,13 +529,14 @@ def format_content(content: str) -> str:
         stripped = line.strip()
         
         # Check if we're entering or exiting a block element
-        if any(tag in stripped for tag in ['<ul>', '<ol>', '<li>', '<h1>', '<h2>', '<h3>', '<pre>', '<blockquote>']):
+        if any(tag in stripped for tag in BLOCK_OPEN_TAGS):
             in_block = True
-        elif any(tag in stripped for tag in ['</ul>', '</ol>', '</li>', '</h1>', '</h2>', '</h3>', '</pre>', '</blockquote>']):
+        elif any(tag in stripped for tag in BLOCK_CLOSE_TAGS):
             in_block = False
         
         # Add <br> for non-empty lines that aren't block elements
-        if stripped and not in_block and not any(tag in stripped for tag in ['<ul>', '<ol>', '<li>', '<h1>', '<h2>', '<h3>', '<pre>', '<blockquote>', '</ul>', '</ol>', '</li>', '</h1>', '</h2>', '</h3>', '</pre>', '</blockquote>']):
+        if stripped and not in_block and not any(tag in stripped
+                                                 for tag in BLOCK_OPEN_TAGS + BLOCK_CLOSE_TAGS):
             formatted_lines.append(stripped + '<br>')
         else:
             formatted_lines.append(stripped)
@@ -362,11 +553,13 @@ def format_content(content: str) -> str:
     return content
 
 if __name__ == '__main__':
-    if WEASYPRINT_AVAILABLE:
+    import pandas as pd
+
+    if load_weasyprint():
         # Sample market data
         sample_df = pd.DataFrame({
             'District': ['Bayangol', 'Bayanzurkh', 'Songinokhairkhan', 'Sukhbaatar'],
-            '2025 Mar': [4.41, 4.04, 3.33, 5.44],
+            PRICE_COLUMN: [4.41, 4.04, 3.33, 5.44],
             'Value': [0.64, 0.40, 0.62, 1.52],
             'Percent': [17.0, 11.0, 23.0, 38.7],
             'Type': ['New', 'New', 'New', 'New']
@@ -376,8 +569,11 @@ if __name__ == '__main__':
             "title": "Бгд төмөр замд 2 өрөө 49.5мкв байр",
             "price": "MNT 239,000,000",
             "area": "49.5 м²",
-            "location": "2021 онд ашиглалтад орсон. байршил БГД 3-р хороо, нарны гүүрний баруун талд 73-р сургуулийн урь талд байрладаг",
-            "market_analysis": "Энэ орон сууцны үнэ зах зээлийн дундаж үнээс доогуур байна. Баянгол дүүргийн дундаж үнэтэй харьцуулахад энэ нь сайн зардал болж байна.",
+            "location": ("2021 онд ашиглалтад орсон. байршил БГД 3-р хороо, нарны гүүрний баруун "
+                         "талд 73-р сургуулийн урь талд байрладаг"),
+            "market_analysis": ("Энэ орон сууцны үнэ зах зээлийн дундаж үнээс доогуур байна. "
+                                "Баянгол дүүргийн дундаж үнэтэй харьцуулахад энэ нь сайн зардал "
+                                "болж байна."),
             "conclusion": "Сайн зардал гэж үзэж болно. Байршил сайн, үнэ хямд байна.",
             "url": "https://www.unegui.mn/adv/9129580_tomor-zamd-2-oroo-zarna/",
             "market_data_df": sample_df
@@ -0,0 +1,195 @@
+# real_estate_assistant/listing.py
+"""
+Typed listing records.
+
+`Listing` is what the retriever and extractor produce and what the index builder, scoring and
+writer consume: strings for the free-text fields, numbers for price, area and rooms. Pages show
+those as text ("239 сая ₮", "49.5 м²", "2 өрөө"); they are parsed once, here, and rendered back
+with the `*_text` properties. `ListingBatch` packs many listings into numpy columns for
+vectorized work over large sets (comparables, deduplication).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .market_index import DISTRICT_ALIASES, resolve_district
+from .utils import parse_area_m2, parse_price_mnt, parse_rooms
+
+if TYPE_CHECKING:
+    import numpy as np
+
+NOT_FOUND = "N/A"
+
+# Fields a page (or the LLM) provides as text, in display order.
+TEXT_FIELDS = ("title", "price", "location", "area", "rooms", "description")
+
+# District codes used by ListingBatch; -1 is unknown.
+DISTRICTS = tuple(DISTRICT_ALIASES)
+_DISTRICT_CODES = {district: code for code, district in enumerate(DISTRICTS)}
+
+
+@dataclass(slots=True)
+class Listing:
+    url: str
+    title: str = NOT_FOUND
+    location: str = NOT_FOUND
+    description: str = NOT_FOUND
+    price_mnt: float | None = None
+    area_m2: float | None = None
+    rooms: int | None = None
+    district: str | None = None  # Canonical district if known up front, else from the text
+    provenance: dict | None = None  # Field -> "parser" / "llm" / "missing", set by HybridExtractor
+    error: str | None = None
+
+    @classmethod
+    def failed(cls, url: str, error: str) -> Listing:
+        """Placeholder for a page that could not be fetched."""
+        return cls(url=url, title="Error fetching page", error=error)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Listing:
+        """Builds a listing from the dict form (as returned by `to_dict` or older callers)."""
+        rooms = data.get("rooms", data.get("bedrooms"))
+        return cls(
+            url=data.get("url", NOT_FOUND),
+            title=data.get("title") or NOT_FOUND,
+            location=data.get("location") or NOT_FOUND,
+            description=data.get("description") or NOT_FOUND,
+            price_mnt=parse_price_mnt(data.get("price_mnt", data.get("price"))),
+            area_m2=parse_area_m2(data.get("area_m2", data.get("area"))),
+            rooms=parse_rooms(rooms),
+            district=data.get("district"),
+            provenance=data.get("provenance"),
+            error=data.get("error"),
+        )
+
+    @property
+    def price_text(self) -> str:
+        return f"MNT {self.price_mnt:,.0f}" if self.price_mnt is not None else NOT_FOUND
+
+    @property
+    def area_text(self) -> str:
+        return f"{self.area_m2:g} m²" if self.area_m2 is not None else NOT_FOUND
+
+    @property
+    def rooms_text(self) -> str:
+        return str(self.rooms) if self.rooms is not None else NOT_FOUND
+
+    @property
+    def resolved_district(self) -> str | None:
+        return self.district or resolve_district(f"{self.location} {self.title}")
+
+    def text(self, field: str) -> str:
+        """One of TEXT_FIELDS as display text; NOT_FOUND when unknown."""
+        if field in ("price", "area", "rooms"):
+            return getattr(self, f"{field}_text")
+        return getattr(self, field)
+
+    def set_text(self, field: str, value: str) -> bool:
+        """
+        Sets one of TEXT_FIELDS from text, parsing the numeric ones. False if it did not parse.
+        """
+        if field == "price":
+            self.price_mnt = parse_price_mnt(value)
+        elif field == "area":
+            self.area_m2 = parse_area_m2(value)
+        elif field == "rooms":
+            self.rooms = parse_rooms(value)
+        else:
+            setattr(self, field, value)
+        return self.text(field) != NOT_FOUND
+
+    def to_dict(self) -> dict:
+        """JSON-friendly form: display text for price and area, plus the typed numbers."""
+        data = {"url": self.url, **{field: self.text(field) for field in TEXT_FIELDS}}
+        data.update(price_mnt=self.price_mnt, area_m2=self.area_m2, rooms=self.rooms)
+        for key in ("district", "provenance", "error"):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        return data
+
+
+def as_listing(listing) -> Listing:
+    """Accepts a Listing or its dict form."""
+    return listing if isinstance(listing, Listing) else Listing.from_dict(listing)
+
+
+class ListingBatch:
+    """
+    Many listings as numpy columns: price (MNT), area (m²), rooms and a district code per row,
+    about 16 bytes a listing instead of a Python object with boxed floats. Missing numbers are
+    NaN (rooms: -1) and unknown districts are -1. `urls` keeps the row order.
+    """
+
+    DTYPE = [("price_mnt", "f8"), ("area_m2", "f4"), ("rooms", "i2"), ("district", "i2")]
+
+    __slots__ = ("records", "urls")
+
+    def __init__(self, records: np.ndarray, urls: list):
+        self.records = records
+        self.urls = urls
+
+    @classmethod
+    def from_listings(cls, listings) -> ListingBatch:
+        import numpy as np
+
+        listings = [as_listing(listing) for listing in listings]
+        records = np.empty(len(listings), dtype=cls.DTYPE)
+        nan = float("nan")
+        records["price_mnt"] = [nan if x.price_mnt is None else x.price_mnt for x in listings]
+        records["area_m2"] = [nan if x.area_m2 is None else x.area_m2 for x in listings]
+        records["rooms"] = [-1 if x.rooms is None else x.rooms for x in listings]
+        records["district"] = [_DISTRICT_CODES.get(x.resolved_district, -1) for x in listings]
+        return cls(records, [x.url for x in listings])
+
+    def __len__(self):
+        return len(self.records)
+
+    def price_per_m2(self) -> np.ndarray:
+        """MNT million per m² for every row; NaN where price or area is unknown."""
+        import numpy as np
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.records["price_mnt"] / 1_000_000 / self.records["area_m2"]
+
+    @staticmethod
+    def district_code(district: str) -> int:
+        """The code of `district` (any alias understood by resolve_district); -2 if unknown."""
+        return _DISTRICT_CODES.get(resolve_district(district) or district, -2)
+
+    def district_mask(self, district: str) -> np.ndarray:
+        """Rows in `district` (any alias understood by resolve_district)."""
+        return self.records["district"] == self.district_code(district)
+
+    def take(self, indices) -> ListingBatch:
+        """Subset by integer indices or a boolean mask."""
+        import numpy as np
+
+        indices = np.asarray(indices)
+        if indices.dtype == np.bool_:
+            indices = np.flatnonzero(indices)
+        return ListingBatch(self.records[indices], [self.urls[i] for i in indices])
+
+
+if __name__ == '__main__':
+    import sys
+
+    listing = Listing.from_dict({
+        "url": "https://www.unegui.mn/adv/9129580/",
+        "title": "Төмөр замд 2 өрөө байр зарна",
+        "price": "239 сая ₮",
+        "location": "Баянгол дүүрэг",
+        "area": "49.5 м²",
+        "bedrooms": "2 өрөө",
+    })
+    print(listing)
+    print(listing.to_dict())
+    print(f"Listing object: {sys.getsizeof(listing)} bytes (a dict with the same keys: "
+          f"{sys.getsizeof(listing.to_dict())} bytes before its values)")
+
+    studio = Listing(url="x", price_mnt=65e6, area_m2=17, title="БГД 1 өрөө")
+    batch = ListingBatch.from_listings([listing, studio] * 3)
+    print(f"Batch of {len(batch)}: {batch.records.nbytes} bytes, price/m² {batch.price_per_m2()}")
+    print(f"Bayangol rows: {batch.take(batch.district_mask('БГД')).urls}")
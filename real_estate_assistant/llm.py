@@ -0,0 +1,451 @@
+# real_estate_assistant/llm.py
+
+"""
+LLM backends behind one interface (`LLMBackend`: invoke, ainvoke, stream, batch), plus usage
+instrumentation. Use `create_llm()` to get the backend selected by LLM_BACKEND.
+"""
+import abc
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from .tracing import current_span, span
+from .utils import count_tokens
+
+DEFAULT_MODEL = "meta-llama/Meta-Llama-3-70B-Instruct-Turbo"
+DEFAULT_LLAMACPP_URL = "http://127.0.0.1:8081/v1"
+DEFAULT_REPLAY_FILE = "benchmarks/fixtures/llm_responses.json"
+DEFAULT_PROMPT_TOKEN_BUDGET = 3000
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LLMResponse:
+    """Minimal response object compatible with LangChain's `.content` attribute."""
+    content: str
+    metadata: dict = field(default_factory=dict)
+
+
+class LLMBackend(abc.ABC):
+    """
+    The interface agents use to talk to a model. Subclasses must implement `invoke`; `ainvoke`,
+    `stream` and `batch` fall back to it (in a worker thread, as one chunk, or in a thread pool)
+    unless the backend has a native version. Unknown keyword arguments are ignored.
+    """
+
+    model = "unknown"
+
+    @abc.abstractmethod
+    def invoke(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+               **kwargs) -> LLMResponse:
+        """Sends `prompt` and returns the response; `.content` holds the text."""
+
+    async def ainvoke(self, prompt: str, **kwargs) -> LLMResponse:
+        return await asyncio.to_thread(self.invoke, prompt, **kwargs)
+
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        yield self.invoke(prompt, **kwargs).content
+
+    def batch(self, prompts: list, max_workers: int = 4, **kwargs) -> list:
+        if len(prompts) <= 1:
+            return [self.invoke(prompt, **kwargs) for prompt in prompts]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+            return list(pool.map(lambda prompt: self.invoke(prompt, **kwargs), prompts))
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable key for recorded responses."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class StubLLM(LLMBackend):
+    """
+    Deterministic offline stand-in for ChatTogether, for tests and local runs of the server.
+    The same prompt always produces the same answer; no network access is needed.
+    """
+
+    def __init__(self, model="stub"):
+        self.model = model
+        self.calls = 0
+
+    def invoke(self, prompt: str, **kwargs) -> LLMResponse:
+        self.calls += 1
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        content = f"Stub response {digest} for a {len(prompt)}-character prompt."
+        return LLMResponse(content=content, metadata={"model": self.model, "stub": True})
+
+
+class TogetherBackend(LLMBackend):
+    """Together's hosted models through langchain-together's ChatTogether (imported lazily)."""
+
+    def __init__(self, model: str = DEFAULT_MODEL, api_key: str = None):
+        from langchain_together import ChatTogether
+
+        self.model = model
+        api_key = api_key or os.getenv("TOGETHER_API_KEY", "your_together_api_key_here")
+        if not api_key:
+            raise ValueError("TOGETHER_API_KEY not found in environment variables.")
+        self.client = ChatTogether(together_api_key=api_key, model=model)
+
+    def _response(self, message) -> LLMResponse:
+        metadata = {"model": self.model, **(getattr(message, "response_metadata", None) or {})}
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            metadata["token_usage"] = {"prompt_tokens": usage.get("input_tokens"),
+                                       "completion_tokens": usage.get("output_tokens")}
+        return LLMResponse(content=message.content, metadata=metadata)
+
+    def invoke(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+               **kwargs) -> LLMResponse:
+        message = self.client.invoke(prompt, max_tokens=max_tokens, temperature=temperature)
+        return self._response(message)
+
+    async def ainvoke(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+                      **kwargs) -> LLMResponse:
+        message = await self.client.ainvoke(prompt, max_tokens=max_tokens, temperature=temperature)
+        return self._response(message)
+
+    def stream(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+               **kwargs) -> Iterator[str]:
+        for chunk in self.client.stream(prompt, max_tokens=max_tokens, temperature=temperature):
+            if chunk.content:
+                yield chunk.content
+
+
+class LlamaCppBackend(LLMBackend):
+    """
+    A local model served by llama.cpp's `llama-server` (or any OpenAI-compatible server) on
+    localhost, e.g. `llama-server -m model.gguf --port 8081`. Runs fully offline on CPU.
+    """
+
+    def __init__(self, base_url: str = None, model: str = "local", timeout: float = 300,
+                 session=None):
+        import requests
+
+        base_url = base_url or os.getenv("LLAMACPP_BASE_URL", DEFAULT_LLAMACPP_URL)
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def _payload(self, prompt: str, max_tokens: int, temperature: float,
+                 stream: bool = False) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": stream,
+        }
+
+    def invoke(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+               **kwargs) -> LLMResponse:
+        response = self.session.post(f"{self.base_url}/chat/completions",
+                                     json=self._payload(prompt, max_tokens, temperature),
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        return LLMResponse(content=body["choices"][0]["message"]["content"],
+                           metadata={"model": body.get("model", self.model),
+                                     "token_usage": body.get("usage") or {}})
+
+    def stream(self, prompt: str, max_tokens: int = 512, temperature: float = 0.2,
+               **kwargs) -> Iterator[str]:
+        payload = self._payload(prompt, max_tokens, temperature, stream=True)
+        with self.session.post(f"{self.base_url}/chat/completions", json=payload, stream=True,
+                               timeout=self.timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+
+class ReplayBackend(LLMBackend):
+    """
+    Serves recorded responses keyed by a hash of the prompt, for reproducible offline runs.
+    Recorded answers carry `metadata["cached"] = True`, which InstrumentedLLM counts as cached.
+    With `record_from` set, prompts that are not in the file are sent to that backend and the
+    answers are added to the recording (call `save()` to write it). Otherwise a miss raises
+    KeyError when `strict`, or returns a deterministic stub answer.
+    """
+
+    def __init__(self, path: str = None, record_from: LLMBackend = None, strict: bool = False):
+        self.path = path or os.getenv("LLM_REPLAY_FILE", DEFAULT_REPLAY_FILE)
+        self.record_from = record_from
+        self.strict = strict
+        self.model = "replay"
+        self.hits = 0
+        self.misses = 0
+        self._stub = StubLLM(model="replay-miss")
+        self._lock = threading.Lock()
+        self.recordings = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.recordings = json.load(f)
+
+    def invoke(self, prompt: str, **kwargs) -> LLMResponse:
+        key = prompt_key(prompt)
+        recorded = self.recordings.get(key)
+        if recorded is not None:
+            self.hits += 1
+            return LLMResponse(content=recorded["content"],
+                               metadata={"model": recorded.get("model", self.model),
+                                         "cached": True})
+        self.misses += 1
+        if self.record_from is not None:
+            response = self.record_from.invoke(prompt, **kwargs)
+            with self._lock:
+                self.recordings[key] = {"prompt": prompt[:200], "content": response.content,
+                                        "model": getattr(self.record_from, "model", "unknown")}
+            return response
+        if self.strict:
+            raise KeyError(f"No recorded response for prompt {key}")
+        response = self._stub.invoke(prompt)
+        response.metadata["cached"] = False
+        return response
+
+    def save(self, path: str = None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._lock:
+            recordings = dict(sorted(self.recordings.items()))
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(recordings, f, ensure_ascii=False, indent=2)
+
+
+@dataclass
+class LLMCall:
+    """One instrumented LLM call."""
+    label: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    seconds: float
+    cached: bool = False
+    error: str = None
+    over_budget: bool = False
+
+
+class UsageTracker:
+    """
+    Aggregates LLM calls for one scope (a report, a batch, or the whole process).
+    Safe to share between threads.
+    """
+
+    def __init__(self, name: str = "session"):
+        self.name = name
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, call: LLMCall):
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> dict:
+        with self._lock:
+            calls = list(self.calls)
+        by_label = {}
+        for call in calls:
+            entry = by_label.setdefault(call.label, {"calls": 0, "prompt_tokens": 0,
+                                                     "completion_tokens": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["prompt_tokens"] += call.prompt_tokens
+            entry["completion_tokens"] += call.completion_tokens
+            entry["seconds"] = round(entry["seconds"] + call.seconds, 3)
+        prompt_tokens = sum(c.prompt_tokens for c in calls)
+        completion_tokens = sum(c.completion_tokens for c in calls)
+        return {
+            "scope": self.name,
+            "calls": len(calls),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "seconds": round(sum(c.seconds for c in calls), 3),
+            "cached_calls": sum(1 for c in calls if c.cached),
+            "errors": sum(1 for c in calls if c.error),
+            "over_budget": sum(1 for c in calls if c.over_budget),
+            "by_label": by_label,
+        }
+
+
+_active_trackers = contextvars.ContextVar("llm_usage_trackers", default=())
+
+
+@contextmanager
+def track_usage(name: str):
+    """
+    Collects every instrumented LLM call made inside the block, in this thread or task.
+    Scopes nest: a call inside `track_usage("report")` within `track_usage("batch")` counts
+    for both.
+    """
+    tracker = UsageTracker(name)
+    token = _active_trackers.set(_active_trackers.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        _active_trackers.reset(token)
+
+
+def format_usage(summary: dict) -> str:
+    """One line for a UsageTracker summary, for logs and the CLI."""
+    return (f"{summary['calls']} LLM calls ({summary['cached_calls']} cached), "
+            f"{summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion tokens "
+            f"in {summary['seconds']:.2f}s")
+
+
+def _response_usage(response):
+    """Provider-reported (prompt, completion) token counts from a LangChain message, if any."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens") is not None:
+        return usage["input_tokens"], usage.get("output_tokens", 0)
+    metadata = (getattr(response, "response_metadata", None) or getattr(response, "metadata", None)
+                or {})
+    token_usage = metadata.get("token_usage") or {}
+    if token_usage.get("prompt_tokens") is not None:
+        return token_usage["prompt_tokens"], token_usage.get("completion_tokens", 0)
+    return None
+
+
+class InstrumentedLLM(LLMBackend):
+    """
+    Wraps a backend (or any LangChain-style client with `.invoke(prompt, **kwargs) -> .content`)
+    and records prompt and completion tokens, wall time, model and cache status of every call.
+    A call counts as cached when the backend sets `metadata["cached"]` (as ReplayBackend does).
+    Calls are added to `self.tracker` (process totals) and to any scopes opened with
+    `track_usage`.
+    Prompts over `max_prompt_tokens` are still sent but logged and flagged as over budget.
+    """
+
+    def __init__(self, llm, model: str = None,
+                 max_prompt_tokens: int = DEFAULT_PROMPT_TOKEN_BUDGET):
+        self.llm = llm
+        self.model = (model or getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                      or type(llm).__name__)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.tracker = UsageTracker("session")
+
+    def _prompt_tokens(self, prompt: str, label: str):
+        prompt_tokens = count_tokens(prompt)
+        over_budget = bool(self.max_prompt_tokens) and prompt_tokens > self.max_prompt_tokens
+        if over_budget:
+            logger.warning("%s prompt is %d tokens, over the %d budget", label, prompt_tokens,
+                           self.max_prompt_tokens)
+        return prompt_tokens, over_budget
+
+    def _record(self, label, prompt_tokens, over_budget, seconds, response=None, error=None,
+                content=None):
+        completion_tokens = 0
+        cached = False
+        if response is not None:
+            reported = _response_usage(response)
+            if reported:
+                prompt_tokens, completion_tokens = reported
+            else:
+                completion_tokens = count_tokens(response.content)
+            metadata = (getattr(response, "metadata", None)
+                        or getattr(response, "response_metadata", None) or {})
+            cached = bool(metadata.get("cached"))
+        elif content is not None:
+            completion_tokens = count_tokens(content)
+        call = LLMCall(label, self.model, prompt_tokens, completion_tokens, seconds, cached, error,
+                       over_budget)
+        self.tracker.add(call)
+        for tracker in _active_trackers.get():
+            tracker.add(call)
+        current_span().set(model=self.model, prompt_tokens=prompt_tokens,
+                           completion_tokens=completion_tokens, cached=cached)
+        logger.info("%s [%s] %d -> %d tokens in %.2fs%s%s", label, self.model, prompt_tokens,
+                    completion_tokens, seconds, " (cached)" if cached else "",
+                    " (failed)" if error else "")
+
+    def invoke(self, prompt: str, label: str = "llm", **kwargs):
+        prompt_tokens, over_budget = self._prompt_tokens(prompt, label)
+        start = time.perf_counter()
+        response, error = None, None
+        with span(f"llm.{label}"):
+            try:
+                response = self.llm.invoke(prompt, **kwargs)
+                return response
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self._record(label, prompt_tokens, over_budget, time.perf_counter() - start,
+                             response, error)
+
+    async def ainvoke(self, prompt: str, label: str = "llm", **kwargs):
+        prompt_tokens, over_budget = self._prompt_tokens(prompt, label)
+        start = time.perf_counter()
+        response, error = None, None
+        with span(f"llm.{label}"):
+            try:
+                if hasattr(self.llm, "ainvoke"):
+                    response = await self.llm.ainvoke(prompt, **kwargs)
+                else:
+                    response = await asyncio.to_thread(self.llm.invoke, prompt, **kwargs)
+                return response
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self._record(label, prompt_tokens, over_budget, time.perf_counter() - start,
+                             response, error)
+
+    def stream(self, prompt: str, label: str = "llm", **kwargs) -> Iterator[str]:
+        prompt_tokens, over_budget = self._prompt_tokens(prompt, label)
+        start = time.perf_counter()
+        chunks, error = [], None
+        try:
+            if hasattr(self.llm, "stream"):
+                for chunk in self.llm.stream(prompt, **kwargs):
+                    chunks.append(chunk)
+                    yield chunk
+            else:
+                chunks.append(self.llm.invoke(prompt, **kwargs).content)
+                yield chunks[-1]
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._record(label, prompt_tokens, over_budget, time.perf_counter() - start,
+                         error=error, content="".join(chunks))
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+def create_llm(backend: str = None, model: str = None, **kwargs) -> LLMBackend:
+    """
+    Builds the configured backend, instrumented. `backend` (or the LLM_BACKEND environment
+    variable) is one of "together" (default), "llamacpp", "replay" or "stub". Together calls also
+    go through the shared rate limiter; the local backends do not need one.
+    """
+    name = (backend or os.getenv("LLM_BACKEND", "together")).lower()
+    if name == "together":
+        from .rate_limit import RateLimitedLLM
+
+        model = model or DEFAULT_MODEL
+        return RateLimitedLLM(InstrumentedLLM(TogetherBackend(model=model, **kwargs), model=model))
+    if name in ("llamacpp", "llama.cpp", "local"):
+        return InstrumentedLLM(LlamaCppBackend(model=model or "local", **kwargs))
+    if name == "replay":
+        return InstrumentedLLM(ReplayBackend(**kwargs))
+    if name == "stub":
+        return InstrumentedLLM(StubLLM(**kwargs))
+    raise ValueError(f"Unknown LLM backend '{name}'. Use together, llamacpp, replay or stub.")
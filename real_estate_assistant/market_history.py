@@ -0,0 +1,264 @@
+# real_estate_assistant/market_history.py
+
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .agents.retriever import RetrieverAgent
+from .market_index import month_columns, month_period, resolve_district
+
+DEFAULT_STORE_DIR = "data/market_history"
+MANIFEST_NAME = "_sources.json"
+# `bulletin` is the month of the bulletin a row came from; each bulletin also repeats earlier
+# months.
+STORE_COLUMNS = ["District", "Type", "price", "change", "percent", "source", "bulletin"]
+
+_FILENAME_PERIOD_PATTERN = re.compile(r'(20\d\d)[-_.]?(0[1-9]|1[0-2])')
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_bulletin(source: str) -> dict:
+    """
+    Worker: downloads (for URLs) and parses one monthly bulletin into long-format rows.
+    Runs in a separate process, so it must stay a top-level function.
+    """
+    retriever = RetrieverAgent()
+    if source.startswith("http"):
+        price_data = retriever.extract_apartment_price_from_pdf(source)
+    else:
+        price_data = retriever.parse_apartment_price_pdf(source)
+    if "error" in price_data:
+        return {"source": source, "error": price_data["error"]}
+
+    period = price_data.get("period")
+    if not period:
+        match = _FILENAME_PERIOD_PATTERN.search(os.path.basename(source))
+        if match:
+            period = f"{match.group(1)}-{match.group(2)}"
+    if not period:
+        return {"source": source, "error": "Could not determine bulletin month."}
+
+    frames = []
+    for key, apartment_type in (("new_apartment_prices", "New"), ("old_apartment_prices", "Old")):
+        df = price_data.get(key)
+        if df is None or df.empty:
+            continue
+        districts = [resolve_district(d) or d for d in df["District"]]
+        months = month_columns(df.columns)
+        for month in months:
+            # The year-over-year change columns belong to the latest month only
+            latest = month == months[-1]
+            frames.append(pd.DataFrame({
+                "District": districts,
+                "Type": apartment_type,
+                "period": month_period(month),
+                "price": pd.to_numeric(df[month], errors="coerce"),
+                "change": pd.to_numeric(df["Value"], errors="coerce") if latest else float("nan"),
+                "percent": (pd.to_numeric(df["Percent"], errors="coerce") if latest
+                            else float("nan")),
+                "source": source,
+                "bulletin": period,
+            }))
+    if not frames:
+        return {"source": source, "error": "No price tables found in bulletin."}
+    return {"source": source, "period": period, "rows": pd.concat(frames, ignore_index=True)}
+
+
+class MarketHistoryStore:
+    """
+    Time-indexed store of monthly 1212.mn apartment prices, kept as Parquet partitioned by month
+    (store_dir/period=YYYY-MM/data.parquet).
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        self._table = None
+        self._series = None
+
+    def _manifest_path(self):
+        return os.path.join(self.store_dir, MANIFEST_NAME)
+
+    def ingested_sources(self) -> dict:
+        """Returns {source: period} for every bulletin already in the store."""
+        path = self._manifest_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def periods(self) -> list:
+        if not os.path.isdir(self.store_dir):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.store_dir)
+                      if name.startswith("period="))
+
+    def _partition_path(self, period: str) -> str:
+        return os.path.join(self.store_dir, f"period={period}", "data.parquet")
+
+    def append(self, period: str, rows: pd.DataFrame, source: str = None):
+        """
+        Merges one bulletin's rows into the month partitions named by their 'period' column
+        (rows without one go to `period`). Each bulletin repeats earlier months, so for every
+        district and type a month keeps the row from that month's own bulletin, else the one
+        from the latest bulletin. The result does not depend on the order bulletins arrive in.
+        """
+        if "period" not in rows:
+            rows = rows.assign(period=period)
+        if "bulletin" not in rows:
+            rows = rows.assign(bulletin=period)
+
+        for month, month_rows in rows.groupby("period"):
+            path = self._partition_path(month)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            merged = month_rows[STORE_COLUMNS]
+            if os.path.exists(path):
+                existing = pd.read_parquet(path).reindex(columns=STORE_COLUMNS)
+                merged = pd.concat([existing, merged], ignore_index=True)
+            own_month = merged["bulletin"] == month
+            merged = (
+                merged.assign(_own=own_month)
+                .sort_values(["_own", "bulletin"], kind="stable")
+                .drop_duplicates(["District", "Type"], keep="last")
+                .drop(columns="_own")
+                .sort_values(["Type", "District"])
+            )
+            tmp_path = path + ".tmp"
+            merged.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+
+        if source:
+            manifest = self.ingested_sources()
+            manifest[source] = period
+            with open(self._manifest_path(), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=4)
+
+        self._table = None
+        self._series = None
+
+    def load(self) -> pd.DataFrame:
+        """
+        Loads the whole store as a DataFrame with a 'period' column (cached until the next
+        append).
+        """
+        if self._table is None:
+            frames = [
+                pd.read_parquet(self._partition_path(period))
+                .assign(period=pd.Period(period, freq="M"))
+                for period in self.periods()
+            ]
+            columns = STORE_COLUMNS + ["period"]
+            if frames:
+                self._table = pd.concat(frames, ignore_index=True)
+            else:
+                self._table = pd.DataFrame(columns=columns)
+        return self._table
+
+    def district_series(self, district: str, apartment_type: str = "New") -> pd.Series:
+        """
+        Returns the monthly price/m² series (MNT million) for a district, indexed by period.
+        """
+        if self._series is None:
+            table = self.load()
+            self._series = {
+                key: group.set_index("period")["price"].sort_index()
+                for key, group in table.groupby(["District", "Type"])
+            }
+        canonical = resolve_district(district) or district
+        series = self._series.get((canonical, apartment_type))
+        if series is None:
+            return pd.Series(dtype=float, name="price")
+        return series
+
+    def trend(self, district: str, apartment_type: str = "New", months: int = 12) -> dict:
+        """
+        Summarizes the change in a district's price/m² over the last `months` months.
+        """
+        series = self.district_series(district, apartment_type).tail(months + 1)
+        if len(series) < 2:
+            return {"district": district, "type": apartment_type, "months": len(series),
+                    "change_pct": None}
+        first, last = series.iloc[0], series.iloc[-1]
+        return {
+            "district": district,
+            "type": apartment_type,
+            "months": len(series) - 1,
+            "start": str(series.index[0]),
+            "end": str(series.index[-1]),
+            "start_price": float(first),
+            "end_price": float(last),
+            "change_pct": round(float((last - first) / first * 100), 2),
+        }
+
+
+def list_bulletin_sources(path_or_urls) -> list:
+    """
+    Expands a directory of PDFs, a text file of URLs (one per line) or a list into bulletin sources.
+    """
+    if isinstance(path_or_urls, (list, tuple)):
+        return list(path_or_urls)
+    if os.path.isdir(path_or_urls):
+        return sorted(
+            os.path.join(path_or_urls, name)
+            for name in os.listdir(path_or_urls)
+            if name.lower().endswith(".pdf")
+        )
+    with open(path_or_urls, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def ingest_bulletins(sources, store: MarketHistoryStore = None, max_workers: int = 4,
+                     force=False) -> dict:
+    """
+    Parses monthly bulletins in parallel worker processes and appends them to the store.
+    Sources already recorded in the store's manifest are skipped unless force=True.
+    """
+    store = store or MarketHistoryStore()
+    sources = list_bulletin_sources(sources)
+    if not force:
+        done = store.ingested_sources()
+        sources = [source for source in sources if source not in done]
+
+    summary = {"ingested": [], "errors": []}
+    if not sources:
+        return summary
+
+    logger.info("Ingesting %d bulletins with %d workers", len(sources), max_workers)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_parse_bulletin, source): source for source in sources}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                summary["errors"].append({"source": futures[future], "error": str(e)})
+                continue
+            if "error" in result:
+                summary["errors"].append(result)
+                continue
+            store.append(result["period"], result["rows"], source=result["source"])
+            summary["ingested"].append({"source": result["source"], "period": result["period"]})
+    return summary
+
+
+if __name__ == '__main__':
+    import sys
+
+    from .utils import configure_logging
+
+    configure_logging()
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m real_estate_assistant.market_history "
+              "<pdf_dir | url_list.txt> [store_dir]")
+        sys.exit(1)
+
+    history = MarketHistoryStore(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STORE_DIR)
+    result = ingest_bulletins(sys.argv[1], history)
+    print(f"Ingested: {result['ingested']}")
+    print(f"Errors: {result['errors']}")
+    print(f"Periods in store: {history.periods()}")
+    print(history.trend("Bayangol"))
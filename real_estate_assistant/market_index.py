@@ -0,0 +1,212 @@
+# real_estate_assistant/market_index.py
+
+import difflib
+import hashlib
+import re
+
+PRICE_COLUMN = "Price"  # MNT million per m² in the bulletin's latest month
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+MONTH_PATTERN = re.compile(r'\b(20\d\d)\s+(' + "|".join(MONTHS) + r')\b', re.IGNORECASE)
+
+# Canonical district names as they appear in the English section of the 1212.mn bulletin,
+# with the Mongolian names, abbreviations and transliteration variants used in listings.
+DISTRICT_ALIASES = {
+    "Bayangol": ["bayangol", "баянгол", "бгд", "bgd"],
+    "Bayanzurkh": ["bayanzurkh", "bayanzurh", "баянзүрх", "баянзурх", "бзд", "bzd"],
+    "Sukhbaatar": ["sukhbaatar", "suhbaatar", "сүхбаатар", "сухбаатар", "сбд", "sbd"],
+    "Songinokhairkhan": ["songinokhairkhan", "songinohairhan", "сонгинохайрхан", "схд", "shd"],
+    "Khan-Uul": ["khan-uul", "khanuul", "han-uul", "хан-уул", "хануул", "худ", "hud"],
+    "Chingeltei": ["chingeltei", "чингэлтэй", "чингэлтэи", "чд", "chd"],
+    "Nalaikh": ["nalaikh", "nalaih", "налайх"],
+    "Baganuur": ["baganuur", "багануур"],
+    "Bagakhangai": ["bagakhangai", "bagahangai", "багахангай"],
+    "Ulaanbaatar": ["ulaanbaatar", "улаанбаатар", "уб", "ub"],
+}
+
+CITY = "Ulaanbaatar"
+
+_ALIAS_TO_DISTRICT = {
+    alias: district for district, aliases in DISTRICT_ALIASES.items() for alias in aliases
+}
+# Abbreviations are only trusted as whole words; full names may carry case suffixes ("Баянзүрхийн").
+_ABBREVIATIONS = {alias for alias in _ALIAS_TO_DISTRICT if len(alias) <= 3}
+_FULL_NAMES = sorted((a for a in _ALIAS_TO_DISTRICT if len(a) > 3), key=len, reverse=True)
+_WORD_PATTERN = re.compile(r'[\w-]+')
+
+_INDEX_CACHE = {}
+_INDEX_CACHE_SIZE = 8
+
+
+def _normalize(text: str) -> str:
+    return str(text).strip().lower().replace("ё", "е")
+
+
+def resolve_district(text: str) -> str | None:
+    """
+    Maps a district name, abbreviation or free text (e.g. 'БГД 3-р хороо', 'Bayangol district')
+    to its canonical district name. Falls back to fuzzy matching for misspellings.
+    """
+    if not isinstance(text, str) or not text.strip():
+        return None
+    lowered = _normalize(text)
+    words = _WORD_PATTERN.findall(lowered)
+
+    candidates = [_ALIAS_TO_DISTRICT[word] for word in words if word in _ABBREVIATIONS]
+    candidates += [_ALIAS_TO_DISTRICT[alias] for alias in _FULL_NAMES if alias in lowered]
+    if not candidates:
+        for word in words:
+            if len(word) < 5:
+                continue
+            match = difflib.get_close_matches(word, _FULL_NAMES, n=1, cutoff=0.8)
+            if match:
+                candidates.append(_ALIAS_TO_DISTRICT[match[0]])
+
+    # "УБ, БГД ..." names the city first; prefer the more specific district.
+    for district in candidates:
+        if district != CITY:
+            return district
+    return candidates[0] if candidates else None
+
+
+def month_period(label: str) -> str | None:
+    """Converts a bulletin month column label ('2025 Mar') to 'YYYY-MM'."""
+    match = MONTH_PATTERN.fullmatch(str(label).strip())
+    if not match:
+        return None
+    return f"{int(match.group(1)):04d}-{MONTHS.index(match.group(2).title()) + 1:02d}"
+
+
+def month_columns(columns) -> list:
+    """The month columns ('2024 Mar', '2025 Jan', ...) among `columns`, oldest first."""
+    return sorted((c for c in columns if month_period(c)), key=month_period)
+
+
+def market_data_version(market_data: dict) -> str:
+    """
+    Content hash of the raw market price tables; changes whenever the bulletin data changes.
+    The retriever stores it under "version" when it parses a bulletin, so callers normally
+    read that instead of hashing the tables again.
+    """
+    import pandas as pd
+
+    digest = hashlib.blake2b(digest_size=16)
+    for key in ("new_apartment_prices", "old_apartment_prices"):
+        df = market_data.get(key)
+        digest.update(key.encode("utf-8"))
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            digest.update("|".join(map(str, df.columns)).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class MarketIndex:
+    """
+    Precomputed district/type lookup over the 1212.mn price tables. The latest month column
+    of the tables (`month`) is copied to PRICE_COLUMN, which is what reports show.
+    """
+
+    def __init__(self, market_data: dict):
+        import numpy as np
+        import pandas as pd
+
+        self.version = _stored_version(market_data)
+        self.price_column = price_column = PRICE_COLUMN
+
+        frames = []
+        for key, apartment_type in (("new_apartment_prices", "New"),
+                                    ("old_apartment_prices", "Old")):
+            df = market_data.get(key)
+            if isinstance(df, pd.DataFrame) and not df.empty:
+                frames.append(df.assign(Type=apartment_type))
+        combined_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        months = month_columns(combined_df.columns)
+        self.month = months[-1] if months else None
+        if self.month is None:
+            combined_df = pd.DataFrame()
+        elif not combined_df.empty:
+            combined_df[price_column] = pd.to_numeric(combined_df[self.month], errors="coerce")
+            combined_df = combined_df.dropna(subset=[price_column]).reset_index(drop=True)
+        self.df = combined_df
+
+        self._stats = {}
+        self._district_means = {}
+        self.sorted_prices = np.empty(0)
+        self.average_price = None
+        self.top_rows = []
+        if combined_df.empty:
+            return
+
+        prices = combined_df[price_column].to_numpy(dtype=float)
+        self.sorted_prices = np.sort(prices)
+        self.average_price = float(prices.mean())
+
+        for row in combined_df.to_dict("records"):
+            district = resolve_district(row["District"]) or row["District"]
+            self._stats[(district, row["Type"])] = row
+
+        for district in {district for district, _ in self._stats}:
+            values = [row[price_column] for (d, _), row in self._stats.items() if d == district]
+            self._district_means[district] = float(np.mean(values))
+
+        top = combined_df.nlargest(3, price_column)
+        self.top_rows = top.to_dict("records")
+
+    def __len__(self):
+        return len(self.df)
+
+    def _canonical(self, district: str) -> str:
+        if district in self._district_means:
+            return district
+        return resolve_district(district) or district
+
+    def lookup(self, district: str, apartment_type: str = None):
+        """
+        O(1) lookup of a district's row for one type ('New'/'Old'), or of the mean over both types.
+        Accepts any alias understood by resolve_district.
+        """
+        canonical = self._canonical(district)
+        if apartment_type is None:
+            return self._district_means.get(canonical)
+        return self._stats.get((canonical, apartment_type))
+
+    def district_stats(self, district: str) -> dict:
+        """Returns the per-type rows for a district, keyed by 'New'/'Old'."""
+        canonical = self._canonical(district)
+        return {
+            apartment_type: self._stats[(canonical, apartment_type)]
+            for apartment_type in ("New", "Old")
+            if (canonical, apartment_type) in self._stats
+        }
+
+    def percentile(self, price_per_m2: float) -> float:
+        """Percentile of a price per m² among all district averages (midpoint for ties)."""
+        import numpy as np
+
+        below = np.searchsorted(self.sorted_prices, price_per_m2, side="left")
+        not_above = np.searchsorted(self.sorted_prices, price_per_m2, side="right")
+        return float((below + not_above) / 2 / self.sorted_prices.size * 100)
+
+
+def _stored_version(market_data: dict) -> str:
+    """The version stored in the market data; hashed and stored on first use if missing."""
+    version = market_data.get("version")
+    if version is None:
+        version = market_data["version"] = market_data_version(market_data)
+    return version
+
+
+def get_market_index(market_data: dict) -> MarketIndex:
+    """
+    Returns the MarketIndex for this market data, building it only once per data version.
+    The version is computed once per market data dict, not on every call.
+    """
+    version = _stored_version(market_data)
+    index = _INDEX_CACHE.get(version)
+    if index is None:
+        index = MarketIndex(market_data)
+        if len(_INDEX_CACHE) >= _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.pop(next(iter(_INDEX_CACHE)))
+        _INDEX_CACHE[version] = index
+    return index
@@ -0,0 +1,372 @@
+# real_estate_assistant/pipeline.py
+"""
+Asyncio-native analysis pipeline: fetch -> extract -> market context -> report -> output.
+
+The waits are awaited on the event loop: listing pages and the bulletin come over one aiohttp
+session (through the same per-host limits as the synchronous fetches), and the report's LLM
+sections go out concurrently through `ainvoke`. The CPU stages (parsing and hybrid extraction,
+the bulletin tables, market context and comparables, the vector store, rendering) run in a
+thread pool. A server or a batch can therefore keep many analyses in flight on one loop
+without a thread per analysis.
+
+`Pipeline` wraps it for synchronous callers such as the CLI. It has the same methods, and each
+call runs to completion on a private event loop that keeps the HTTP connections open between
+calls.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .agents.build_index import (
+    DEFAULT_DATA_PATH,
+    DEFAULT_INDEX_PATH,
+    dedupe_path,
+    write_vector_store,
+)
+from .agents.extractor import HybridExtractor
+from .agents.retriever import DEFAULT_BULLETIN_URL, RetrieverAgent
+from .agents.writer import WriterAgent, extract_market_context
+from .comparables import get_comparables_index
+from .dedupe import Deduplicator
+from .generate_pdf import create_combined_pdf_report, create_pdf_archive
+from .listing import Listing, as_listing
+from .llm import track_usage
+from .report_formats import write_report
+from .tracing import current_span, traced
+
+DEFAULT_WORKERS = 4
+DEFAULT_CONCURRENCY = 8  # Listings the batch methods work on at once
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPipeline:
+    """
+    The analysis stages as coroutines over shared agents, which stay warm between analyses.
+    - The aiohttp session is opened on first use, in the loop driving the pipeline, and
+      closed by `aclose` (or `async with`).
+    - CPU stages run in `executor`. Without one, the pipeline creates a pool of
+      `max_workers` threads and owns it.
+    - The parsed bulletin is kept for `market_data_ttl` seconds. With None, it is kept for
+      the pipeline's lifetime.
+    - Comparables come from `comparables`, or by default from the local store
+      (get_comparables_index).
+    - Listings are indexed into the vector store at `index_path`/`data_path`. Its
+      Deduplicator (`deduplicator`, by default the one saved next to the index) is kept for
+      the pipeline's lifetime, and reports list the reposts it has seen of their listing.
+    """
+
+    def __init__(self, writer: WriterAgent = None, extractor: HybridExtractor = None,
+                 retriever: RetrieverAgent = None, executor: ThreadPoolExecutor = None,
+                 max_workers: int = DEFAULT_WORKERS, concurrency: int = DEFAULT_CONCURRENCY,
+                 market_data_ttl: float = None, bulletin_url: str = None, comparables=None,
+                 index_path: str = DEFAULT_INDEX_PATH, data_path: str = DEFAULT_DATA_PATH,
+                 deduplicator: Deduplicator = None):
+        self.writer = writer or WriterAgent()
+        self.retriever = retriever or (extractor.retriever if extractor else RetrieverAgent())
+        self.extractor = extractor or HybridExtractor(self.retriever, llm_client=self.writer.llm)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix="pipeline")
+        self.concurrency = concurrency
+        self.market_data_ttl = market_data_ttl
+        self.bulletin_url = bulletin_url or DEFAULT_BULLETIN_URL
+        self.comparables = comparables
+        self.index_path = index_path
+        self.data_path = data_path
+        self.deduplicator = deduplicator
+        self._store_lock = asyncio.Lock()
+        self._session = None
+        self._market_data = None
+        self._market_loaded_at = 0.0
+        self._market_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _client(self):
+        if self._session is None:
+            import aiohttp
+
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def offload(self, func, *args):
+        """Runs a blocking call in the executor, inside the caller's span."""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def _gather(self, func, items: list) -> list:
+        """
+        `await func(item)` for every item, at most `concurrency` at a time; results in input order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(item):
+            async with semaphore:
+                return await func(item)
+
+        return list(await asyncio.gather(*(limited(item) for item in items)))
+
+    async def _as_completed(self, func, items: list):
+        """
+        Like _gather, but yields (position, result) pairs as each call finishes rather than
+        all results at the end.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def limited(position, item):
+            async with semaphore:
+                return position, await func(item)
+
+        calls = [limited(position, item) for position, item in enumerate(items)]
+        for next_done in asyncio.as_completed(calls):
+            yield await next_done
+
+    async def fetch(self, url: str) -> str:
+        return await self.retriever.afetch_listing_data(self._client(), url)
+
+    async def extract(self, url: str) -> Listing:
+        """
+        Like HybridExtractor.extract: the fetch is awaited, then parsing and LLM gap filling run
+        in the executor.
+        """
+        html_content = await self.fetch(url)
+        if html_content.startswith("Error:"):
+            return Listing.failed(url, html_content)
+        return await self.offload(self.extractor.extract_from_html, html_content, url)
+
+    async def extract_many(self, urls: list) -> list:
+        return await self._gather(self.extract, urls)
+
+    @traced("retriever.market_data")
+    async def market_data(self) -> dict:
+        """
+        The bulletin's price tables. They are downloaded on the first call and again once
+        `market_data_ttl` has passed. If a refresh fails, the previous tables are kept.
+        """
+        async with self._market_lock:
+            age = time.monotonic() - self._market_loaded_at
+            fresh = self.market_data_ttl is None or age <= self.market_data_ttl
+            if self._market_data is not None and fresh:
+                current_span().set(cached=True)
+                return self._market_data
+
+            logger.info("Downloading PDF from %s", self.bulletin_url)
+            try:
+                pdf_path = await self.retriever.adownload_pdf(self._client(), self.bulletin_url)
+                data = await self.offload(self.retriever.parse_downloaded_pdf, pdf_path)
+            except Exception as e:
+                data = {"error": f"Failed to download PDF: {e}"}
+            if "error" in data and self._market_data is not None:
+                logger.warning("Market data refresh failed, keeping previous data: %s",
+                               data["error"])
+            else:
+                self._market_data = data
+            self._market_loaded_at = time.monotonic()
+            return self._market_data
+
+    async def market_context(self, listing: Listing, market_data: dict = None) -> dict:
+        """
+        extract_market_context with the local comparables; market data defaults to
+        `market_data()`.
+        """
+        if market_data is None:
+            market_data = await self.market_data()
+        deduplicator = await self.store_deduplicator()
+        return await self.offload(self._market_context, listing, market_data, deduplicator)
+
+    def _market_context(self, listing: Listing, market_data: dict,
+                        deduplicator: Deduplicator) -> dict:
+        comparables = self.comparables if self.comparables is not None else get_comparables_index()
+        return extract_market_context(market_data or {}, listing, comparables, deduplicator)
+
+    async def report_data(self, listing: Listing, market_context: dict, translate=False) -> dict:
+        return await self.writer.agenerate_report_data(listing, market_context, translate)
+
+    async def save_report(self, listing: Listing, market_context: dict, translate=False,
+                          fmt: str = "pdf") -> str:
+        """Writes the report in `fmt`. Returns the path, or an "Error: ..." string."""
+        if fmt == "pdf":
+            return await self.writer.agenerate_pdf_report(listing, market_context, translate)
+        report_data = await self.report_data(listing, market_context, translate)
+        return await self.offload(write_report, report_data, fmt)
+
+    async def store_deduplicator(self) -> Deduplicator:
+        """The vector store's Deduplicator, loaded from next to the index on first use."""
+        async with self._store_lock:
+            if self.deduplicator is None:
+                self.deduplicator = await self.offload(Deduplicator.load,
+                                                       dedupe_path(self.index_path))
+            return self.deduplicator
+
+    async def write_vector_store(self, listings: list, market_data: dict = None) -> int:
+        """
+        Indexes the listings and market tables (agents.build_index.write_vector_store), leaving
+        out reposts of listings the store has already seen.
+        """
+        if market_data is None:
+            market_data = await self.market_data()
+        deduplicator = await self.store_deduplicator()
+        async with self._store_lock:
+            return await self.offload(write_vector_store, listings, market_data, self.index_path,
+                                      self.data_path, deduplicator)
+
+    @traced("pipeline.analyze")
+    async def analyze(self, url: str, translate=False) -> tuple:
+        """
+        Returns (listing, report data) for a listing URL. Report data is None when extraction
+        failed. The listing and the market data are fetched concurrently.
+        """
+        listing, market_data = await asyncio.gather(self.extract(url), self.market_data())
+        if listing.error:
+            return listing, None
+        market_context = await self.market_context(listing, market_data)
+        return listing, await self.report_data(listing, market_context, translate)
+
+    async def analyze_many(self, urls: list, translate=False) -> list:
+        """`analyze` for every URL, up to `concurrency` at a time; results in input order."""
+        return await self._gather(lambda url: self.analyze(url, translate), urls)
+
+    async def batch_pdf_report(self, listings: list, market_data: dict = None, translate=False,
+                               output_path: str = None, archive=False) -> str:
+        """
+        WriterAgent.generate_batch_pdf_report, with up to `concurrency` listings' reports written
+        at once. Each report goes to the renderer as soon as it is done: the zip gets its PDFs
+        in the order the reports finish, the combined PDF its sections in listing order.
+        """
+        listings = [listing for listing in map(as_listing, listings) if listing.error is None]
+        logger.info("Generating %s for %d listings",
+                    "PDF archive" if archive else "combined PDF report", len(listings))
+        if not listings:
+            return "Error: No listing details provided to generate report."
+        if market_data is None:
+            market_data = await self.market_data()
+
+        async def report_for(listing):
+            market_context = await self.market_context(listing, market_data)
+            return await self.report_data(listing, market_context, translate)
+
+        # The renderer blocks on the queue for the whole batch, so it gets its own thread
+        # rather than one of the executor's, which the reports themselves need
+        reports = queue.Queue()
+        if archive:
+            render = asyncio.to_thread(create_pdf_archive, iter(reports.get, None),
+                                       output_path or "real_estate_reports.zip")
+        else:
+            render = asyncio.to_thread(create_combined_pdf_report, iter(reports.get, None),
+                                       output_path or "real_estate_portfolio.pdf")
+        render = asyncio.ensure_future(render)
+        finished, next_position = {}, 0
+        try:
+            with track_usage("batch") as usage:
+                async for position, report_data in self._as_completed(report_for, listings):
+                    if archive:
+                        reports.put(report_data)
+                        continue
+                    finished[position] = report_data
+                    while next_position in finished:
+                        reports.put(finished.pop(next_position))
+                        next_position += 1
+        finally:
+            reports.put(None)
+        self.writer.log_batch_usage(usage, len(listings))
+        return await render
+
+
+class Pipeline:
+    """
+    Synchronous wrapper around AsyncPipeline for the CLI and scripts. It takes the same
+    arguments and has the same methods, and blocks until each call is done. Use it as a
+    context manager, or call `close()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self.pipeline = AsyncPipeline(*args, **kwargs)
+        self.writer = self.pipeline.writer
+        self.retriever = self.pipeline.retriever
+        self.extractor = self.pipeline.extractor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _run(self, coroutine):
+        return self._loop.run_until_complete(coroutine)
+
+    def close(self):
+        if not self._loop.is_closed():
+            self._run(self.pipeline.aclose())
+            self._loop.close()
+
+    def extract(self, url: str) -> Listing:
+        return self._run(self.pipeline.extract(url))
+
+    def extract_many(self, urls: list) -> list:
+        return self._run(self.pipeline.extract_many(urls))
+
+    def market_data(self) -> dict:
+        return self._run(self.pipeline.market_data())
+
+    def market_context(self, listing: Listing, market_data: dict = None) -> dict:
+        return self._run(self.pipeline.market_context(listing, market_data))
+
+    def report_data(self, listing: Listing, market_context: dict, translate=False) -> dict:
+        return self._run(self.pipeline.report_data(listing, market_context, translate))
+
+    def save_report(self, listing: Listing, market_context: dict, translate=False,
+                    fmt: str = "pdf") -> str:
+        return self._run(self.pipeline.save_report(listing, market_context, translate, fmt))
+
+    def write_vector_store(self, listings: list, market_data: dict = None) -> int:
+        return self._run(self.pipeline.write_vector_store(listings, market_data))
+
+    def analyze(self, url: str, translate=False) -> tuple:
+        return self._run(self.pipeline.analyze(url, translate))
+
+    def analyze_many(self, urls: list, translate=False) -> list:
+        return self._run(self.pipeline.analyze_many(urls, translate))
+
+    def batch_pdf_report(self, listings: list, market_data: dict = None, translate=False,
+                         output_path: str = None, archive=False) -> str:
+        return self._run(self.pipeline.batch_pdf_report(listings, market_data, translate,
+                                                        output_path, archive))
+
+
+if __name__ == '__main__':
+    import sys
+
+    from .llm import StubLLM
+    from .utils import configure_logging
+
+    configure_logging()
+    urls = sys.argv[1:] or ["https://www.unegui.mn/adv/9129580_tomor-zamd-2-oroo-zarna/"]
+
+    async def demo():
+        async with AsyncPipeline(WriterAgent(llm=StubLLM())) as pipeline:
+            start = time.perf_counter()
+            results = await pipeline.analyze_many(urls)
+            elapsed = time.perf_counter() - start
+            print(f"{len(urls)} listings analyzed concurrently in {elapsed:.2f}s")
+            for listing, report_data in results:
+                print(f"  {listing.url}: {listing.error or report_data['verdict']}")
+
+    asyncio.run(demo())
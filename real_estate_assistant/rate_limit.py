@@ -0,0 +1,346 @@
+# real_estate_assistant/rate_limit.py
+"""
+Client-side rate limiting for the Together API.
+
+A `RateLimiter` holds token buckets for requests/min and tokens/min and is shared by every
+thread and asyncio task in the process. `AdaptiveConcurrency` caps calls in flight and adjusts
+the cap to observed latency and errors (additive increase, multiplicative decrease).
+`RateLimitedLLM` combines both with jittered exponential backoff on 429 and 5xx responses.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+from .llm import LLMBackend
+from .utils import count_tokens
+
+DEFAULT_REQUESTS_PER_MINUTE = 600
+DEFAULT_TOKENS_PER_MINUTE = 180_000
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+TARGET_LATENCY = 20.0  # Seconds; slower calls shrink the concurrency limit
+ASYNC_POLL_INTERVAL = 0.02
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Refills continuously at `rate_per_minute`, holding at most `capacity` (default: one minute's
+    worth).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Requests/min and tokens/min budgets shared across threads and asyncio tasks.
+    `acquire` blocks the calling thread; `acquire_async` sleeps without blocking the event loop.
+    `request_burst` caps how many requests may start back to back (default: a minute's worth).
+    """
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE, request_burst: float = None):
+        self.requests = TokenBucket(requests_per_minute, request_burst)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Takes the budget and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.blocked_until - now,
+                       self.requests.wait_time(1, now),
+                       self.tokens.wait_time(tokens, now))
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                return 0.0
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens: int = 0):
+        while (wait := self._try_acquire(tokens)) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0):
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stops all callers for `seconds`, e.g. when the provider answers 429 with Retry-After."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """
+    Limits calls in flight. The limit grows by 1/limit per fast successful call and halves on
+    throttling or errors; calls slower than `target_latency` shrink it by 10%.
+    Waiting threads sleep on a condition and waiting asyncio tasks on futures; `release` wakes
+    both.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 16,
+                 target_latency: float = TARGET_LATENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (loop, future) pairs, woken from any thread by `release`
+
+    def _try_enter(self) -> bool:
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def acquire(self):
+        with self._cond:
+            while not self._try_enter():
+                self._cond.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._try_enter():
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._cond:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(self, latency: float, ok: bool = True):
+        with self._cond:
+            self.in_flight -= 1
+            if not ok:
+                self.limit = max(self.minimum, self.limit / 2)
+            elif latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * 0.9)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:  # The waiter's event loop has been closed
+                pass
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def error_status(exc: Exception):
+    """HTTP status carried by a client exception (Together SDK, requests, httpx), if any."""
+    for attr in ("status_code", "status", "http_status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    status = error_status(exc)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    name = type(exc).__name__
+    return any(marker in name
+               for marker in ("RateLimit", "Timeout", "Connection", "ServiceUnavailable"))
+
+
+def retry_after(exc: Exception):
+    """Seconds from a Retry-After header on the exception's response, if present."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimitedLLM(LLMBackend):
+    """
+    Wraps a client with `.invoke(prompt, **kwargs)` (its `ainvoke` is awaited when it has one).
+    Each call first takes its estimated tokens (prompt plus `max_tokens`) from the shared limiter
+    and a concurrency slot, and is retried with jittered backoff on 429/5xx and connection
+    errors. Other errors are raised at once.
+    """
+
+    def __init__(self, llm, limiter: RateLimiter = None, concurrency: AdaptiveConcurrency = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        self.llm = llm
+        self.model = getattr(llm, "model", type(llm).__name__)
+        self.limiter = limiter or get_shared_limiter()
+        self.concurrency = concurrency or get_shared_concurrency()
+        self.max_retries = max_retries
+        self.retries = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _estimate_tokens(self, prompt: str, kwargs: dict) -> int:
+        return count_tokens(prompt) + int(kwargs.get("max_tokens") or 0)
+
+    def _on_failure(self, exc: Exception, attempt: int) -> float:
+        """
+        Records a failed attempt and returns the delay before the next one; re-raises if final.
+        """
+        if attempt >= self.max_retries or not is_retryable(exc):
+            raise exc
+        throttled = error_status(exc) == 429
+        # Several threads and tasks fail at once under throttling
+        with self._lock:
+            self.retries += 1
+            if throttled:
+                self.throttled += 1
+        delay = backoff_delay(attempt)
+        if throttled:
+            delay = max(delay, retry_after(exc) or 0.0)
+            self.limiter.pause(delay)
+        logger.warning("%s (status %s), retry %d/%d in %.1fs", type(exc).__name__,
+                       error_status(exc), attempt + 1, self.max_retries, delay)
+        return delay
+
+    def invoke(self, prompt: str, **kwargs):
+        tokens = self._estimate_tokens(prompt, kwargs)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            self.concurrency.acquire()
+            start, ok = time.monotonic(), False
+            try:
+                response = self.llm.invoke(prompt, **kwargs)
+                ok = True
+                return response
+            except Exception as e:
+                delay = self._on_failure(e, attempt)
+            finally:
+                self.concurrency.release(time.monotonic() - start, ok)
+            time.sleep(delay)
+
+    async def ainvoke(self, prompt: str, **kwargs):
+        tokens = self._estimate_tokens(prompt, kwargs)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire_async(tokens)
+            await self.concurrency.acquire_async()
+            start, ok = time.monotonic(), False
+            try:
+                if hasattr(self.llm, "ainvoke"):
+                    response = await self.llm.ainvoke(prompt, **kwargs)
+                else:
+                    response = await asyncio.to_thread(self.llm.invoke, prompt, **kwargs)
+                ok = True
+                return response
+            except Exception as e:
+                delay = self._on_failure(e, attempt)
+            finally:
+                self.concurrency.release(time.monotonic() - start, ok)
+            await asyncio.sleep(delay)
+
+    def stream(self, prompt: str, **kwargs):
+        """Streams after taking the budget; a stream that fails midway is not retried."""
+        self.limiter.acquire(self._estimate_tokens(prompt, kwargs))
+        self.concurrency.acquire()
+        start, ok = time.monotonic(), False
+        try:
+            yield from self.llm.stream(prompt, **kwargs)
+            ok = True
+        finally:
+            self.concurrency.release(time.monotonic() - start, ok)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter() -> RateLimiter:
+    """Process-wide limiter; budgets come from TOGETHER_RPM / TOGETHER_TPM when set."""
+    with _shared_lock:
+        if "limiter" not in _shared:
+            _shared["limiter"] = RateLimiter(
+                float(os.getenv("TOGETHER_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+                float(os.getenv("TOGETHER_TPM", DEFAULT_TOKENS_PER_MINUTE)),
+            )
+        return _shared["limiter"]
+
+
+def get_shared_concurrency() -> AdaptiveConcurrency:
+    with _shared_lock:
+        if "concurrency" not in _shared:
+            _shared["concurrency"] = AdaptiveConcurrency()
+        return _shared["concurrency"]
+
+
+if __name__ == '__main__':
+    class FlakyLLM:
+        """Answers 429 on every third call."""
+
+        class RateLimitError(Exception):
+            status_code = 429
+
+        def __init__(self):
+            self.calls = 0
+
+        def invoke(self, prompt, **kwargs):
+            self.calls += 1
+            time.sleep(0.01)
+            if self.calls % 3 == 0:
+                raise self.RateLimitError("Too many requests")
+            return f"ok {self.calls}"
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 2 requests/s after a burst of 5
+    limiter = RateLimiter(requests_per_minute=120, tokens_per_minute=60_000, request_burst=5)
+    llm = RateLimitedLLM(FlakyLLM(), limiter=limiter, concurrency=AdaptiveConcurrency(initial=2))
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: llm.invoke(f"prompt {i}", max_tokens=50), range(12)))
+    elapsed = time.monotonic() - start
+    print(f"{len(results)} calls succeeded in {elapsed:.1f}s with {llm.retries} retries "
+          f"({llm.throttled} throttled); concurrency limit now {llm.concurrency.limit:.2f}")
+    print(f"Async: {asyncio.run(llm.ainvoke('async prompt', max_tokens=50))}")
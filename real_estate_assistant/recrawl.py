@@ -0,0 +1,297 @@
+# real_estate_assistant/recrawl.py
+"""
+Change-detection recrawler for tracked listings.
+
+Each listing's row in a small SQLite store keeps the HTTP validators (ETag, Last-Modified) from
+its last fetch and a fingerprint of the page region that holds the listing (see
+SourceAdapter.content_region). A recrawl sends conditional GETs; a 304, or a page whose region
+hashes the same, costs one request and a hash, and parsing, embedding and index updates are
+skipped. Only changed listings are parsed and handed to `on_change`, so a daily refresh costs
+in proportion to what changed rather than to how many listings are tracked.
+
+Listings that change are checked again soon; each unchanged check doubles the wait up to
+MAX_INTERVAL, and due listings are visited most recently changed first. Every price seen is
+appended to a per-listing time series.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from .agents.retriever import RetrieverAgent
+from .listing import Listing
+from .sources.registry import adapter_for
+from .tracing import current_span, traced
+
+DEFAULT_DB_PATH = "data/recrawl.sqlite"
+MIN_INTERVAL = 6 * 3600  # Seconds until a listing that just changed is checked again
+MAX_INTERVAL = 14 * 86400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fingerprint TEXT,
+    listing TEXT,
+    price_mnt REAL,
+    first_seen REAL NOT NULL,
+    last_checked REAL,
+    last_changed REAL,
+    interval REAL NOT NULL,
+    next_check REAL NOT NULL,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    gone INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS listings_due ON listings (gone, next_check);
+CREATE TABLE IF NOT EXISTS price_history (
+    url TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    price_mnt REAL NOT NULL,
+    PRIMARY KEY (url, observed_at)
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def content_fingerprint(html_content: str, url: str) -> str:
+    """Hash of the listing region of the page, whitespace-normalized."""
+    region = " ".join(adapter_for(url).content_region(html_content).split())
+    return hashlib.blake2b(region.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RecrawlStore:
+    """SQLite-backed state of every tracked listing, plus the price history."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def transaction(self):
+        """Commits on success, rolls back on error: `with store.transaction(): ...`."""
+        return self._conn
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM listings WHERE gone = 0").fetchone()[0]
+
+    def track(self, urls, now: float = None) -> int:
+        """Adds URLs not tracked yet, due immediately. Returns how many were new."""
+        now = time.time() if now is None else now
+        with self._conn:
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO listings (url, first_seen, interval, next_check) "
+                "VALUES (?, ?, ?, ?)",
+                [(url, now, MIN_INTERVAL, now) for url in dict.fromkeys(urls)],
+            )
+        return cursor.rowcount
+
+    def due(self, now: float, limit: int = None) -> list:
+        """
+        Listings due for a check: never fetched first, then the most recently changed, so a
+        limited budget goes to the listings most likely to have changed again.
+        """
+        query = ("SELECT * FROM listings WHERE gone = 0 AND next_check <= ? "
+                 "ORDER BY last_changed IS NOT NULL, last_changed DESC, next_check")
+        params = [now]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._conn.execute(query, params).fetchall()
+
+    def listing(self, url: str) -> Listing | None:
+        """The last parsed version of a tracked listing."""
+        row = self._conn.execute("SELECT listing FROM listings WHERE url = ?", (url,)).fetchone()
+        return Listing.from_dict(json.loads(row["listing"])) if row and row["listing"] else None
+
+    def listings(self) -> list:
+        """The last parsed version of every listing still online."""
+        rows = self._conn.execute(
+            "SELECT listing FROM listings WHERE gone = 0 AND listing IS NOT NULL")
+        return [Listing.from_dict(json.loads(row["listing"])) for row in rows]
+
+    def price_series(self, url: str) -> list:
+        """
+        [(observed_at, price_mnt), ...] for a listing, oldest first; one entry per price change.
+        """
+        rows = self._conn.execute(
+            "SELECT observed_at, price_mnt FROM price_history WHERE url = ? ORDER BY observed_at",
+            (url,),
+        ).fetchall()
+        return [(row["observed_at"], row["price_mnt"]) for row in rows]
+
+    def stats(self) -> dict:
+        row = self._conn.execute(
+            "SELECT COUNT(*) AS tracked, SUM(gone) AS gone, SUM(checks) AS checks, "
+            "SUM(changes) AS changes FROM listings"
+        ).fetchone()
+        return {key: row[key] or 0 for key in row.keys()}
+
+    def mark_error(self, row, now: float):
+        # Try again at the same interval; an unreachable host says nothing about the listing
+        self._conn.execute("UPDATE listings SET last_checked = ?, next_check = ? WHERE url = ?",
+                           (now, now + row["interval"], row["url"]))
+
+    def mark_gone(self, row, now: float):
+        self._conn.execute("UPDATE listings SET gone = 1, last_checked = ?, last_changed = ?, "
+                           "checks = checks + 1 WHERE url = ?", (now, now, row["url"]))
+
+    def mark_unchanged(self, row, result: dict, now: float):
+        """Backs off: the next check waits twice as long, up to MAX_INTERVAL."""
+        interval = min(row["interval"] * 2, MAX_INTERVAL)
+        self._conn.execute(
+            "UPDATE listings SET etag = ?, last_modified = ?, last_checked = ?, interval = ?, "
+            "next_check = ?, checks = checks + 1 WHERE url = ?",
+            (result["etag"], result["last_modified"], now, interval, now + interval, row["url"]),
+        )
+
+    def record_change(self, row, result: dict, fingerprint: str, listing: Listing,
+                      now: float) -> bool:
+        """Stores the new version and checks it again soon. True when a known price changed."""
+        self._conn.execute(
+            "UPDATE listings SET etag = ?, last_modified = ?, fingerprint = ?, listing = ?, "
+            "price_mnt = ?, last_checked = ?, last_changed = ?, interval = ?, next_check = ?, "
+            "checks = checks + 1, changes = changes + 1 WHERE url = ?",
+            (result["etag"], result["last_modified"], fingerprint, json.dumps(listing.to_dict()),
+             listing.price_mnt, now, now, MIN_INTERVAL, now + MIN_INTERVAL, row["url"]),
+        )
+        if listing.price_mnt is None or listing.price_mnt == row["price_mnt"]:
+            return False
+        self._conn.execute("INSERT OR REPLACE INTO price_history (url, observed_at, price_mnt) "
+                           "VALUES (?, ?, ?)", (row["url"], now, listing.price_mnt))
+        return row["price_mnt"] is not None
+
+
+class Recrawler:
+    """
+    Checks due listings through the retriever (so the per-host fetch limits apply) and calls
+    `on_change(changes)` with the (previous, current) listings that changed, previous being None
+    on a listing's first fetch and current None when it was taken down. Pass
+    agents.build_index.update_vector_store (bound to the index paths) to keep the index current.
+    """
+
+    def __init__(self, store: RecrawlStore, retriever: RetrieverAgent = None, on_change=None):
+        self.store = store
+        self.retriever = retriever or RetrieverAgent()
+        self.on_change = on_change
+
+    @traced("recrawl.run")
+    def run(self, limit: int = None, now: float = None) -> dict:
+        """
+        One pass over the listings that are due (at most `limit`). Returns counts per outcome and
+        the list of changes passed to `on_change`. A page that cannot be parsed counts as an
+        error and is retried at the same interval; the rest of the pass is still recorded.
+        """
+        now = time.time() if now is None else now
+        due = self.store.due(now, limit)
+        stats = {"checked": len(due), "not_modified": 0, "unchanged": 0, "changed": 0, "gone": 0,
+                 "errors": 0, "price_changes": 0}
+        changes = []
+        if not due:
+            return {**stats, "changes": changes}
+
+        rows = {row["url"]: row for row in due}
+
+        def fetch(url):
+            return self.retriever.fetch_if_modified(url, rows[url]["etag"],
+                                                    rows[url]["last_modified"])
+
+        results = self.retriever.scheduler.map(fetch, list(rows))
+
+        with self.store.transaction():
+            for (url, row), result in zip(rows.items(), results):
+                if "error" in result:
+                    stats["errors"] += 1
+                    self.store.mark_error(row, now)
+                elif result["status"] == 304:
+                    stats["not_modified"] += 1
+                    self.store.mark_unchanged(row, result, now)
+                elif result["html"] is None:
+                    stats["gone"] += 1
+                    self.store.mark_gone(row, now)
+                    if row["listing"]:
+                        changes.append((self.store.listing(url), None))
+                else:
+                    try:
+                        fingerprint = content_fingerprint(result["html"], url)
+                        listing = None  # Not parsed when the listing region is unchanged
+                        if fingerprint != row["fingerprint"]:
+                            listing = self.retriever.parse_listing_html(result["html"], url)
+                    except Exception:
+                        logger.exception("Could not process %s", url)
+                        stats["errors"] += 1
+                        self.store.mark_error(row, now)
+                        continue
+                    if listing is None:
+                        stats["unchanged"] += 1
+                        self.store.mark_unchanged(row, result, now)
+                        continue
+                    changes.append((self.store.listing(url), listing))
+                    stats["changed"] += 1
+                    stats["price_changes"] += self.store.record_change(row, result, fingerprint,
+                                                                       listing, now)
+
+        current_span().set(**stats)
+        logger.info("Recrawled %d listings: %d changed (%d price changes), %d not modified, "
+                    "%d unchanged, %d gone, %d errors", stats["checked"], stats["changed"],
+                    stats["price_changes"], stats["not_modified"], stats["unchanged"],
+                    stats["gone"], stats["errors"])
+        if changes and self.on_change is not None:
+            self.on_change(changes)
+        return {**stats, "changes": changes}
+
+
+if __name__ == '__main__':
+    import argparse
+    from functools import partial
+
+    from .utils import configure_logging
+
+    parser = argparse.ArgumentParser(
+        description="Recrawl tracked listings, processing only those that changed")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Recrawl state database")
+    parser.add_argument("--add", metavar="FILE",
+                        help="Track the listing URLs in FILE (one per line)")
+    parser.add_argument("--limit", type=int, help="Check at most this many due listings")
+    parser.add_argument("--index", help="FAISS index to update with changed listings (with --data)")
+    parser.add_argument("--data", default="vector_data.pkl", help="Texts stored alongside --index")
+    parser.add_argument("--loop", type=float, metavar="SECONDS",
+                        help="Keep recrawling, pausing between passes")
+    args = parser.parse_args()
+    configure_logging()
+
+    store = RecrawlStore(args.db)
+    if args.add:
+        with open(args.add, encoding="utf-8") as f:
+            added = store.track(line.strip() for line in f if line.strip())
+        print(f"Tracking {added} new listings ({len(store)} in total)")
+
+    on_change = None
+    if args.index:
+        from .agents.build_index import update_vector_store
+
+        on_change = partial(update_vector_store, output_index=args.index, output_data=args.data)
+
+    recrawler = Recrawler(store, on_change=on_change)
+    while True:
+        result = recrawler.run(limit=args.limit)
+        for previous, current in result["changes"]:
+            if current is None:
+                print(f"Gone: {previous.url}")
+            elif previous is not None and previous.price_mnt != current.price_mnt:
+                print(f"Price: {current.url} {previous.price_text} -> {current.price_text}")
+        print(store.stats())
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+    store.close()
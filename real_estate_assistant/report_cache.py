@@ -0,0 +1,158 @@
+# real_estate_assistant/report_cache.py
+"""
+Content-addressed cache of finished reports.
+
+A report is fully determined by the listing's fields, the market data it is compared with, the
+language and the model that wrote it. The cache key hashes exactly those, so analyzing the same
+listing again skips both LLM sections and the PDF render, and any change to an input (a new
+price, a new bulletin, the other language, another model) is a different key: nothing has to be
+invalidated by hand. Entries are <key>.json (the structured report) and <key>.pdf; when the
+directory grows past `max_bytes`, the least recently used files are deleted.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from .listing import as_listing
+from .report_formats import serialize_report
+from .utils import evict_to_size
+
+DEFAULT_CACHE_DIR = "data/report_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def listing_hash(listing) -> str:
+    """Hash of the listing fields a report is written from, with whitespace normalized."""
+    listing = as_listing(listing)
+    fields = {
+        "url": listing.url,
+        **{name: " ".join(getattr(listing, name).split())
+           for name in ("title", "location", "description")},
+        "price_mnt": listing.price_mnt,
+        "area_m2": listing.area_m2,
+        "rooms": listing.rooms,
+        "district": listing.resolved_district,
+    }
+    content = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def context_version(market_context: dict) -> str:
+    """
+    Version of everything in the market context that reaches the report: the market price
+    tables and, when present, the comparable listings table and the listing's reposts.
+    """
+    index = market_context.get("market_index")
+    version = index.version if index is not None else "none"
+    table = market_context.get("comparables_table") or ""
+    duplicates = " ".join(market_context.get("duplicates") or ())
+    return hashlib.blake2b(f"{version}|{table}|{duplicates}".encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+
+def _json_default(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class ReportCache:
+    """
+    Reports and their PDFs on disk by cache key (see `key`), with LRU eviction past `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "pdf_hits": 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, listing, market_context: dict, translate: bool, model: str) -> str:
+        parts = [listing_hash(listing), context_version(market_context),
+                 "mn" if translate else "en", model or "none"]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def _touch(self, path: str) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def get(self, key: str, market_context: dict = None) -> dict | None:
+        """
+        The cached report data, or None. The market table is not stored with it (it is the
+        same for every listing); pass the market context to put its DataFrame back.
+        """
+        path = self._path(key, "json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                report_data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        self._touch(path)
+        with self._lock:
+            self.stats["hits"] += 1
+        report_data.pop("market_data", None)
+        report_data["market_data_df"] = (market_context or {}).get("market_data_df")
+        return report_data
+
+    def put(self, key: str, report_data: dict):
+        serialized = serialize_report(report_data)
+        serialized.pop("market_data", None)
+        serialized.pop("llm_usage", None)
+        path = self._path(key, "json")
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            json.dump(serialized, f, ensure_ascii=False, default=_json_default)
+        os.replace(path + ".part", path)
+        self.evict()
+
+    def pdf_path(self, key: str) -> str | None:
+        """The cached PDF for `key`, if one was rendered."""
+        path = self._path(key, "pdf")
+        if not self._touch(path):
+            return None
+        with self._lock:
+            self.stats["pdf_hits"] += 1
+        return os.path.abspath(path)
+
+    def pdf_target(self, key: str) -> str:
+        """Where to render the PDF for `key` so that pdf_path finds it next time."""
+        return self._path(key, "pdf")
+
+    def evict(self) -> int:
+        return evict_to_size(self.cache_dir, self.max_bytes)
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    from .listing import Listing
+
+    listing = Listing(url="https://www.unegui.mn/adv/9129580/",
+                      title="Төмөр замд 2 өрөө байр зарна", location="Баянгол дүүрэг",
+                      price_mnt=239e6, area_m2=49.5, rooms=2)
+    context = {"market_index": None, "comparables_table": None}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ReportCache(tmp, max_bytes=2048)
+        key = cache.key(listing, context, translate=False, model="stub")
+        print(f"Key: {key}, cached: {cache.get(key) is not None}")
+        cache.put(key, {"title": listing.title, "price": listing.price_text,
+                        "conclusion": "x" * 1500})
+        print(f"After put: {cache.get(key)['price']}")
+        listing.price_mnt = 229e6
+        print(f"New price, same key: {cache.key(listing, context, False, 'stub') == key}")
+        print(f"Other language, same key: {cache.key(listing, context, True, 'stub') == key}")
+        cache.put(cache.key(listing, context, False, "stub"),
+                  {"title": listing.title, "conclusion": "y" * 1500})
+        print(f"After a second entry over max_bytes: first still cached: "
+              f"{cache.get(key) is not None}")
+        print(cache.stats)
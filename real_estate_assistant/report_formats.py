@@ -0,0 +1,200 @@
+# real_estate_assistant/report_formats.py
+"""
+Output formats for the structured report data produced by WriterAgent.generate_report_data.
+
+JSON, standalone HTML and Markdown are plain string rendering and cost milliseconds; PDF goes
+through WeasyPrint, by far the heaviest step. ReportRenderer keeps recent reports by content
+hash so a caller can take the data (or HTML/Markdown) now and ask for the PDF later: it is
+rendered on the first request and served from disk afterwards.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from .generate_pdf import create_pdf_report, generate_html_report, report_filename
+from .market_index import PRICE_COLUMN
+from .tracing import traced
+from .utils import evict_to_size
+
+FORMATS = ("json", "html", "markdown", "pdf")
+CONTENT_TYPES = {
+    "json": "application/json",
+    "html": "text/html; charset=utf-8",
+    "markdown": "text/markdown; charset=utf-8",
+    "pdf": "application/pdf",
+}
+EXTENSIONS = {"json": "json", "html": "html", "markdown": "md", "pdf": "pdf"}
+MAX_KEPT_REPORTS = 256
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_report(report_data: dict) -> dict:
+    """Makes report data JSON-serializable (the market DataFrame becomes a list of rows)."""
+    serialized = dict(report_data)
+    df = serialized.pop("market_data_df", None)
+    serialized["market_data"] = df.to_dict("records") if df is not None else []
+    return serialized
+
+
+def report_hash(report_data: dict) -> str:
+    """Content hash of the report data; the same analysis always gets the same id."""
+    serialized = serialize_report(report_data)
+    serialized.pop("llm_usage", None)  # Timings and token counts differ between identical reports
+    content = json.dumps(serialized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_json(report_data: dict) -> str:
+    return json.dumps(serialize_report(report_data), ensure_ascii=False, indent=2, default=str)
+
+
+def render_markdown(report_data: dict) -> str:
+    lines = [
+        f"# {report_data.get('title', 'N/A')}",
+        "",
+        "| | |",
+        "|---|---|",
+        f"| Price | {report_data.get('price', 'N/A')} |",
+        f"| Area | {report_data.get('area', 'N/A')} |",
+        f"| Location | {report_data.get('location', 'N/A')} |",
+    ]
+    score = report_data.get("score") or {}
+    if score.get("price_per_m2") is not None:
+        lines.append(f"| Price per m² | MNT {score['price_per_m2']:.2f}M |")
+    if score.get("verdict") is not None:
+        lines.append(f"| Verdict | {report_data.get('verdict')} ({score['deviation_pct']:+.1f}%, "
+                     f"{score['percentile']:.0f}th percentile) |")
+    lines += ["", "## Market Analysis", "", report_data.get("market_analysis") or "N/A",
+              "", "## Conclusion", "", report_data.get("conclusion") or "N/A"]
+
+    df = report_data.get("market_data_df")
+    if df is not None and not df.empty:
+        lines += ["", "## Market Data", "", "| District | MNT M per m² | Change | % | Type |",
+                  "|---|---|---|---|---|"]
+        lines.extend(
+            f"| {row.get('District', 'N/A')} | {row.get(PRICE_COLUMN, 'N/A')} | "
+            f"{row.get('Value', 'N/A')} | {row.get('Percent', 'N/A')} | {row.get('Type', 'N/A')} |"
+            for row in df.to_dict("records")
+        )
+    if report_data.get("url"):
+        lines += ["", f"Source: {report_data['url']}"]
+    if report_data.get("duplicate_urls"):
+        lines += ["", f"Also posted as: {', '.join(report_data['duplicate_urls'])}"]
+    return "\n".join(lines) + "\n"
+
+
+_RENDERERS = {"json": render_json, "html": generate_html_report, "markdown": render_markdown}
+
+
+@traced("report.render")
+def render_report(report_data: dict, fmt: str) -> str:
+    """Renders one of the text formats (json, html, markdown)."""
+    if fmt not in _RENDERERS:
+        raise ValueError(f"Unknown text format {fmt!r}; expected one of {', '.join(_RENDERERS)}")
+    return _RENDERERS[fmt](report_data)
+
+
+def write_report(report_data: dict, fmt: str = "pdf", filename: str = None) -> str:
+    """
+    Writes the report in `fmt` to `filename`; returns its absolute path (or an "Error: ..."
+    string).
+    """
+    filename = filename or report_filename(report_data, EXTENSIONS[fmt])
+    if fmt == "pdf":
+        return create_pdf_report(report_data, filename)
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(render_report(report_data, fmt))
+    logger.info("Report written: %s", filename)
+    return os.path.abspath(filename)
+
+
+class ReportRenderer:
+    """
+    Recent reports by id (report_hash), renderable in any format on demand. PDFs are written
+    to `output_dir` as report_<id>.pdf the first time they are asked for and reused after that,
+    also across restarts; with `max_bytes`, the least recently rendered are deleted beyond it.
+    """
+
+    def __init__(self, output_dir: str = "reports", max_reports: int = MAX_KEPT_REPORTS,
+                 max_bytes: int = None):
+        self.output_dir = output_dir
+        self.max_reports = max_reports
+        self.max_bytes = max_bytes
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+        self._rendering = {}  # report id -> lock, so one PDF is not rendered twice at once
+        os.makedirs(output_dir, exist_ok=True)
+
+    def add(self, report_data: dict) -> str:
+        report_id = report_hash(report_data)
+        with self._lock:
+            self._reports[report_id] = report_data
+            self._reports.move_to_end(report_id)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+        return report_id
+
+    def get(self, report_id: str) -> dict | None:
+        with self._lock:
+            return self._reports.get(report_id)
+
+    def render(self, report_id: str, fmt: str) -> str | None:
+        """A text format of a kept report; None when the id is unknown (or was evicted)."""
+        report_data = self.get(report_id)
+        return None if report_data is None else render_report(report_data, fmt)
+
+    def pdf_path(self, report_id: str) -> str | None:
+        """
+        Path of the report's PDF, rendering it on the first call. None when the id is unknown
+        and no PDF was rendered for it before; an "Error: ..." string when rendering failed.
+        """
+        path = os.path.join(self.output_dir, f"report_{report_id}.pdf")
+        if os.path.exists(path):
+            os.utime(path)  # Recently used: evicted last
+            return os.path.abspath(path)
+        report_data = self.get(report_id)
+        if report_data is None:
+            return None
+        with self._lock:
+            render_lock = self._rendering.setdefault(report_id, threading.Lock())
+        try:
+            with render_lock:
+                if not os.path.exists(path):
+                    # Rendered under a temporary name so a half-written file is never served
+                    result = create_pdf_report(report_data, path + ".part")
+                    if result.startswith("Error:"):
+                        return result
+                    os.replace(path + ".part", path)
+                    if self.max_bytes is not None:
+                        evict_to_size(self.output_dir, self.max_bytes)
+        finally:
+            with self._lock:
+                self._rendering.pop(report_id, None)
+        return os.path.abspath(path)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    sample = {
+        "title": "Бгд төмөр замд 2 өрөө 49.5мкв байр",
+        "price": "MNT 239,000,000",
+        "area": "49.5 m²",
+        "location": "Баянгол дүүрэг",
+        "market_analysis": "### Price Position\nBelow the district average.",
+        "conclusion": "**Good deal**",
+        "score": {"price_per_m2": 4.83, "verdict": "good", "deviation_pct": -8.2,
+                  "percentile": 35.0},
+        "verdict": "Good deal",
+        "url": "https://www.unegui.mn/adv/9129580/",
+        "market_data_df": pd.DataFrame({"District": ["Bayangol"], PRICE_COLUMN: [5.26],
+                                        "Value": [0.64], "Percent": [17.0], "Type": ["New"]}),
+    }
+    print(f"Report id: {report_hash(sample)}")
+    print(render_report(sample, "markdown"))
+    for fmt in ("json", "html", "markdown"):
+        print(f"{fmt}: {len(render_report(sample, fmt))} chars")
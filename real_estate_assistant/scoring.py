@@ -0,0 +1,128 @@
+# real_estate_assistant/scoring.py
+
+from .listing import Listing, as_listing
+
+# A listing within this band around the benchmark price/m² counts as an average deal.
+GOOD_DEAL_THRESHOLD = -10.0
+OVERPRICED_THRESHOLD = 10.0
+
+VERDICTS = {
+    "good": ("Good deal", "Ашигтай санал"),
+    "average": ("Average deal", "Дундаж санал"),
+    "overpriced": ("Overpriced", "Үнэ өндөр"),
+    None: ("Insufficient data", "Мэдээлэл хангалтгүй"),
+}
+
+
+def score_listing(listing_details: Listing, market_index) -> dict:
+    """
+    Computes the listing's price per m² against the district (or market) mean and its
+    percentile among the comparable district averages. The verdict is fully deterministic.
+    A zero benchmark (a bulletin row without a price) counts as missing.
+    """
+    listing_details = as_listing(listing_details)
+    price = listing_details.price_mnt
+    area = listing_details.area_m2
+
+    score = {
+        "price_mnt": price,
+        "area_m2": area,
+        "price_per_m2": None,
+        "district": None,
+        "benchmark_price_per_m2": None,
+        "benchmark_scope": None,
+        "deviation_pct": None,
+        "percentile": None,
+        "comparables": 0,
+        "verdict": None,
+    }
+
+    if not price or not area or market_index is None or not len(market_index):
+        return score
+
+    price_per_m2 = price / 1_000_000 / area
+    score["price_per_m2"] = round(price_per_m2, 3)
+
+    district = listing_details.resolved_district
+    benchmark = market_index.lookup(district) if district else None
+    if benchmark:
+        score["district"] = district
+        score["benchmark_scope"] = "district"
+    else:
+        benchmark = market_index.average_price
+        score["benchmark_scope"] = "market"
+    if not benchmark:
+        return score
+
+    deviation = (price_per_m2 - benchmark) / benchmark * 100
+    score["benchmark_price_per_m2"] = round(benchmark, 3)
+    score["deviation_pct"] = round(deviation, 1)
+    score["percentile"] = round(market_index.percentile(price_per_m2), 1)
+    score["comparables"] = len(market_index)
+
+    if deviation <= GOOD_DEAL_THRESHOLD:
+        score["verdict"] = "good"
+    elif deviation >= OVERPRICED_THRESHOLD:
+        score["verdict"] = "overpriced"
+    else:
+        score["verdict"] = "average"
+    return score
+
+
+def verdict_label(score: dict, translate=False) -> str:
+    """Returns the human-readable verdict in English or Mongolian."""
+    english, mongolian = VERDICTS[score.get("verdict")]
+    return mongolian if translate else english
+
+
+def describe_market_position(score: dict, translate=False) -> str:
+    """
+    Template narration of the score, used for the LLM-free fast path.
+    """
+    if score.get("verdict") is None:
+        if translate:
+            return "Үнэ эсвэл талбайн мэдээлэл дутуу тул зах зээлтэй харьцуулах боломжгүй байна."
+        return "The listing price or area is missing, so it cannot be compared with the market."
+
+    if translate:
+        if score["benchmark_scope"] == "district":
+            scope = f"{score['district']} дүүргийн"
+        else:
+            scope = "зах зээлийн"
+        return (
+            f"- 1 м² үнэ: {score['price_per_m2']:.2f} сая ₮\n"
+            f"- {scope} дундаж: {score['benchmark_price_per_m2']:.2f} сая ₮/м²\n"
+            f"- Зөрүү: {score['deviation_pct']:+.1f}%\n"
+            f"- Харьцуулсан {score['comparables']} дунджаас "
+            f"{score['percentile']:.0f}-р процентильд байна."
+        )
+    if score["benchmark_scope"] == "district":
+        scope = f"the {score['district']} district"
+    else:
+        scope = "the market"
+    return (
+        f"- Price per m²: MNT {score['price_per_m2']:.2f}M\n"
+        f"- Average for {scope}: MNT {score['benchmark_price_per_m2']:.2f}M per m²\n"
+        f"- Difference: {score['deviation_pct']:+.1f}%\n"
+        f"- Percentile among {score['comparables']} comparable averages: {score['percentile']:.0f}"
+    )
+
+
+def describe_verdict(score: dict, translate=False) -> str:
+    """
+    Template conclusion for the LLM-free fast path.
+    """
+    label = verdict_label(score, translate)
+    if score.get("verdict") is None:
+        return f"**{label}**"
+    if translate:
+        direction = "доогуур" if score["deviation_pct"] < 0 else "дээгүүр"
+        return (
+            f"**{label}**\n"
+            f"1 м² үнэ нь жишиг дунджаас {abs(score['deviation_pct']):.1f}% {direction} байна."
+        )
+    direction = "below" if score["deviation_pct"] < 0 else "above"
+    return (
+        f"**{label}**\n"
+        f"The price per m² is {abs(score['deviation_pct']):.1f}% {direction} the benchmark average."
+    )
@@ -0,0 +1,260 @@
+# real_estate_assistant/server.py
+"""
+Long-running HTTP service over the analysis pipeline.
+
+Agents, the LLM client, the HTTP connection pool, the market-data index, the vector store and
+the PDF renderer are created once and stay warm between requests. Analyses run on the event
+loop through the async pipeline (pipeline.py), whose CPU stages share a bounded thread pool with
+the other blocking calls; requests beyond the queue limit are rejected with 503 so callers can
+back off.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .agents.build_index import DEFAULT_DATA_PATH, DEFAULT_INDEX_PATH, VectorStore
+from .agents.extractor import HybridExtractor
+from .agents.retriever import RetrieverAgent
+from .agents.writer import WriterAgent
+from .generate_pdf import load_weasyprint
+from .pipeline import AsyncPipeline
+from .report_cache import ReportCache
+from .report_formats import CONTENT_TYPES, EXTENSIONS, FORMATS, ReportRenderer, serialize_report
+from .tracing import configure_tracing, span
+from .utils import configure_logging
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MARKET_DATA_TTL = 6 * 60 * 60  # The 1212.mn bulletin is monthly; refresh a few times a day at most.
+MAX_OUTPUT_BYTES = 512 * 1024 * 1024  # Rendered PDFs kept in output_dir
+
+logger = logging.getLogger(__name__)
+
+
+class ServerBusy(Exception):
+    """Raised when the request queue is full."""
+
+
+class AnalysisService:
+    """
+    Warm pipeline state shared by all requests, with a bounded work queue.
+    """
+
+    def __init__(self, llm=None, use_llm=True, max_workers: int = 4, max_queue: int = 32,
+                 output_dir: str = "reports", report_cache: ReportCache = None,
+                 index_path: str = DEFAULT_INDEX_PATH, data_path: str = DEFAULT_DATA_PATH):
+        self.retriever = RetrieverAgent()
+        self.report_cache = report_cache or ReportCache()
+        self.writer = WriterAgent(use_llm=use_llm, llm=llm, report_cache=self.report_cache)
+        self.extractor = HybridExtractor(self.retriever, llm_client=self.writer.llm)
+        self.output_dir = output_dir
+        self.reports = ReportRenderer(output_dir, max_bytes=MAX_OUTPUT_BYTES)
+        self.index_path = index_path
+        self.data_path = data_path
+        self.vector_store = None
+
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self.pipeline = AsyncPipeline(self.writer, self.extractor, self.retriever,
+                                      executor=self.executor, concurrency=max_workers,
+                                      market_data_ttl=MARKET_DATA_TTL, index_path=index_path,
+                                      data_path=data_path)
+        self.pending = 0
+        self.completed = 0
+
+    async def warm_up(self):
+        """
+        Loads market data, the vector store and the PDF renderer before the first request arrives.
+        """
+        await self.pipeline.market_data()
+        self.vector_store = await self.pipeline.offload(VectorStore.load, self.index_path,
+                                                        self.data_path)
+        if self.vector_store is not None:
+            self.pipeline.deduplicator = self.vector_store.deduplicator
+        await self.pipeline.offload(load_weasyprint)
+
+    @contextmanager
+    def _admitted(self):
+        """
+        Counts a request as pending; once `max_queue` are, new ones are rejected instead of
+        piling up.
+        """
+        if self.pending >= self.max_queue:
+            raise ServerBusy(f"{self.pending} requests pending")
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def submit(self, func, *args):
+        """Runs a blocking call in the worker pool, where requests wait in the executor queue."""
+        with self._admitted():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def analyze(self, url: str, translate: bool = False, render_pdf: bool = False,
+                      fmt: str = "json") -> dict:
+        """
+        The report data as JSON, plus `content` in `fmt` when that is html or markdown. The PDF is
+        rendered only when asked for (`render_pdf` or fmt "pdf"); otherwise `pdf_url` renders it
+        on first download.
+        """
+        with self._admitted(), \
+                span("request.analyze", url=url, translate=translate) as request_span:
+            listing_details, report_data = await self.pipeline.analyze(url, translate)
+            if report_data is None:
+                request_span.set(error=listing_details.error)
+                return {"error": listing_details.error, "listing": listing_details.to_dict()}
+
+            report_id = self.reports.add(report_data)
+            result = {"listing": listing_details.to_dict(), "report": serialize_report(report_data),
+                      "report_id": report_id, "pdf_url": f"/reports/{report_id}.pdf",
+                      "trace_id": request_span.trace_id}
+            if fmt in ("html", "markdown"):
+                result["content"] = await self.pipeline.offload(self.reports.render, report_id, fmt)
+            if render_pdf or fmt == "pdf":
+                result["pdf_path"] = await self.pipeline.offload(self.reports.pdf_path, report_id)
+            return result
+
+    def search(self, query: str, k: int = 5) -> list | None:
+        """Nearest rows of the vector store loaded at startup; None if there is no store."""
+        if self.vector_store is None:
+            return None
+        return self.vector_store.search(query, k)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "extraction": dict(self.extractor.stats),
+            "report_cache": dict(self.report_cache.stats),
+            "vector_store_rows": len(self.vector_store) if self.vector_store is not None else None,
+            "duplicate_clusters": (len(self.pipeline.deduplicator.clusters())
+                                   if self.pipeline.deduplicator is not None else None),
+            "llm_usage": self.writer.llm.tracker.summary() if self.writer.llm is not None else None,
+        }
+
+    async def close(self):
+        await self.pipeline.aclose()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(service: AnalysisService):
+    from aiohttp import web
+
+    async def read_json(request):
+        try:
+            return await request.json()
+        except Exception:
+            raise web.HTTPBadRequest(text='{"error": "Request body must be JSON."}',
+                                     content_type="application/json")
+
+    def busy(e: ServerBusy):
+        return web.HTTPServiceUnavailable(
+            text=f'{{"error": "Server busy: {e}"}}',
+            content_type="application/json",
+            headers={"Retry-After": "5"},
+        )
+
+    async def run(func, *args):
+        try:
+            return await service.submit(func, *args)
+        except ServerBusy as e:
+            raise busy(e)
+
+    async def analyze(request):
+        body = await read_json(request)
+        url = body.get("url")
+        if not url:
+            return web.json_response({"error": "Missing 'url'."}, status=400)
+        fmt = body.get("format", "json")
+        if fmt not in FORMATS:
+            return web.json_response(
+                {"error": f"Unknown format {fmt!r}; use one of {', '.join(FORMATS)}."}, status=400)
+        try:
+            result = await service.analyze(url, bool(body.get("translate")), bool(body.get("pdf")),
+                                           fmt)
+        except ServerBusy as e:
+            raise busy(e)
+        return web.json_response(result, status=502 if "error" in result else 200)
+
+    async def report(request):
+        report_id, extension = request.match_info["report_id"], request.match_info["extension"]
+        fmt = next((f for f, ext in EXTENSIONS.items() if ext == extension), None)
+        if fmt is None:
+            return web.json_response({"error": f"Unknown extension {extension!r}."}, status=404)
+        if fmt == "pdf":
+            path = await run(service.reports.pdf_path, report_id)
+            if path and path.startswith("Error:"):
+                return web.json_response({"error": path}, status=500)
+            if not path:
+                return web.json_response({"error": "Unknown report."}, status=404)
+            return web.FileResponse(path)
+        content = await run(service.reports.render, report_id, fmt)
+        if content is None:
+            return web.json_response({"error": "Unknown report."}, status=404)
+        return web.Response(text=content, headers={"Content-Type": CONTENT_TYPES[fmt]})
+
+    async def search(request):
+        body = await read_json(request)
+        query = body.get("query")
+        if not query:
+            return web.json_response({"error": "Missing 'query'."}, status=400)
+        try:
+            k = int(body.get("k", 5))
+        except (TypeError, ValueError):
+            return web.json_response({"error": "'k' must be an integer."}, status=400)
+        results = await run(service.search, query, max(k, 1))
+        if results is None:
+            return web.json_response(
+                {"error": "No vector store loaded; build one with build_index."}, status=503)
+        return web.json_response({"results": results})
+
+    async def health(request):
+        return web.json_response({"status": "ok", **service.stats()})
+
+    async def on_cleanup(app):
+        await service.close()
+
+    app = web.Application()
+    app.router.add_post("/analyze", analyze)
+    app.router.add_post("/search", search)
+    app.router.add_get(r"/reports/{report_id:[0-9a-f]+}.{extension}", report)
+    app.router.add_get("/health", health)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def run_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, stub_llm=False, use_llm=True,
+               max_workers: int = 4, max_queue: int = 32, trace_file: str = None):
+    from aiohttp import web
+
+    configure_tracing(trace_file)
+
+    llm = None
+    if stub_llm:
+        from .llm import StubLLM
+
+        llm = StubLLM()
+    service = AnalysisService(llm=llm, use_llm=use_llm, max_workers=max_workers,
+                              max_queue=max_queue)
+
+    async def warm_up(app):
+        logger.info("Warming up market data, vector store and PDF renderer")
+        await service.warm_up()
+        logger.info("Listening on http://%s:%d", host, port)
+
+    app = create_app(service)
+    app.on_startup.append(warm_up)
+    web.run_app(app, host=host, port=port, print=None)
+
+
+if __name__ == '__main__':
+    configure_logging()
+    run_server(stub_llm=True)
@@ -0,0 +1,192 @@
+# real_estate_assistant/sources/base.py
+"""
+Source adapters: one per listing site, declaring which URLs it handles, how to parse its pages
+and how politely its host must be fetched. The registry in sources/registry.py picks the adapter
+for a URL; sources/scheduler.py enforces the fetch limits.
+"""
+import json
+import re
+from urllib.parse import urlsplit
+
+from ..listing import NOT_FOUND, Listing
+from ..tracing import current_span
+
+_JSON_LD_TYPES = ("Product", "Offer", "Residence", "Apartment", "House", "SingleFamilyResidence",
+                  "RealEstateListing", "Accommodation")
+_LABEL_VALUE_PATTERN = re.compile(r'^\s*([^:]{2,40}):\s*(.+?)\s*$')
+_NOISE_PATTERN = re.compile(r'<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->',
+                            re.IGNORECASE | re.DOTALL)
+_BODY_PATTERN = re.compile(r'<body\b.*?</body\s*>', re.IGNORECASE | re.DOTALL)
+
+
+def url_host(url: str) -> str:
+    """Lowercased host without a leading 'www.'."""
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class SourceAdapter:
+    """
+    Base adapter. Subclasses set `name`, `hosts` (the domain and its subdomains match),
+    `listing_url_pattern` and the politeness limits, and implement `extract`. Fields `extract`
+    leaves empty are filled from the page's structured metadata (JSON-LD, schema.org
+    microdata, Open Graph), which most listing sites publish for search engines.
+    """
+
+    name = "generic"
+    hosts = ()
+    listing_url_pattern = None
+    requests_per_minute = None  # None: no limit beyond max_concurrency
+    burst = 1  # Requests that may start back to back before the per-minute rate applies
+    max_concurrency = 4
+
+    def matches(self, url: str) -> bool:
+        host = url_host(url)
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    def is_listing_url(self, url: str) -> bool:
+        return bool(self.listing_url_pattern and self.listing_url_pattern.search(url))
+
+    def parse(self, html_content: str, url: str) -> Listing:
+        """Rule-based extraction; fields that cannot be found reliably are left as "N/A"."""
+        from bs4 import BeautifulSoup
+
+        current_span().set(chars=len(html_content), source=self.name)
+        soup = BeautifulSoup(html_content, "lxml")
+        listing = Listing(url=url)
+        self.extract(soup, listing)
+        fill_from_metadata(soup, listing)
+        return listing
+
+    def extract(self, soup, listing: Listing):
+        """Site-specific extraction into `listing`."""
+
+    def content_region(self, html_content: str) -> str:
+        """
+        The part of the page that holds the listing, found without building a DOM, for change
+        detection: scripts, styles and comments removed. Defaults to the whole body; adapters
+        narrow it so counters, ads and "similar listings" blocks do not register as changes.
+        """
+        match = _BODY_PATTERN.search(html_content)
+        return _NOISE_PATTERN.sub("", match.group(0) if match else html_content)
+
+
+class GenericSource(SourceAdapter):
+    """Any other site: structured metadata and labelled values only."""
+
+    def extract(self, soup, listing: Listing):
+        title_tag = soup.find("h1")
+        if title_tag:
+            listing.title = " ".join(title_tag.get_text(" ", strip=True).split())
+        fill_from_labels(listing, labelled_values(soup))
+
+
+def labelled_values(soup) -> list:
+    """
+    (lowercased label, value) pairs from definition lists, two-cell table rows and
+    "Label: value" list items, the common ways listing pages lay out characteristics.
+    """
+    pairs = []
+    for dt in soup.find_all("dt"):
+        dd = dt.find_next_sibling("dd")
+        if dd:
+            pairs.append((dt.get_text(strip=True), dd.get_text(" ", strip=True)))
+    for row in soup.find_all("tr"):
+        cells = row.find_all(["th", "td"], recursive=False)
+        if len(cells) == 2:
+            pairs.append((cells[0].get_text(strip=True), cells[1].get_text(" ", strip=True)))
+    for item in soup.find_all("li"):
+        match = _LABEL_VALUE_PATTERN.match(item.get_text(" ", strip=True))
+        if match:
+            pairs.append(match.groups())
+    return [(label.lower().rstrip(":").strip(), " ".join(value.split()))
+            for label, value in pairs if value]
+
+
+def value_for(pairs: list, *labels: str):
+    """First value whose label starts with one of `labels` (lowercase)."""
+    for label in labels:
+        for key, value in pairs:
+            if key.startswith(label):
+                return value
+    return None
+
+
+# Labels used for the same field across Mongolian and English listing sites
+FIELD_LABELS = {
+    "price": ("үнэ", "price"),
+    "area": ("талбай", "хэмжээ", "area", "size"),
+    "rooms": ("өрөө", "rooms", "bedrooms"),
+    "location": ("байршил", "хаяг", "дүүрэг", "location", "address", "district"),
+}
+
+
+def fill_from_labels(listing: Listing, pairs: list):
+    for field, labels in FIELD_LABELS.items():
+        if listing.text(field) == NOT_FOUND:
+            value = value_for(pairs, *labels)
+            if value:
+                listing.set_text(field, value)
+
+
+def _json_ld_objects(soup):
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.string or "")
+        except (TypeError, ValueError):
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                stack.extend(item.get("@graph", []))
+                yield item
+
+
+def fill_from_metadata(soup, listing: Listing):
+    """Fills fields still missing from JSON-LD, schema.org microdata and Open Graph tags."""
+    for item in _json_ld_objects(soup):
+        types = item.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if not any(t in _JSON_LD_TYPES for t in types):
+            continue
+        if listing.title == NOT_FOUND and isinstance(item.get("name"), str):
+            listing.title = item["name"].strip()
+        offers = item.get("offers")
+        offers = offers[0] if isinstance(offers, list) and offers else offers
+        if (listing.price_mnt is None and isinstance(offers, dict)
+                and offers.get("price") is not None):
+            listing.set_text("price", str(offers["price"]))
+        if listing.price_mnt is None and item.get("price") is not None:
+            listing.set_text("price", str(item["price"]))
+        floor_size = item.get("floorSize")
+        if (listing.area_m2 is None and isinstance(floor_size, dict)
+                and floor_size.get("value") is not None):
+            listing.set_text("area", str(floor_size["value"]))
+        if listing.rooms is None and item.get("numberOfRooms") is not None:
+            listing.set_text("rooms", str(item["numberOfRooms"]))
+        address = item.get("address")
+        if listing.location == NOT_FOUND and address:
+            if isinstance(address, dict):
+                address = ", ".join(str(v) for k, v in address.items()
+                                    if not k.startswith("@") and v)
+            listing.location = str(address).strip() or NOT_FOUND
+        if listing.description == NOT_FOUND and isinstance(item.get("description"), str):
+            listing.description = item["description"].strip()
+
+    if listing.price_mnt is None:
+        price_tag = soup.find(attrs={"itemprop": "price"})
+        if price_tag:
+            listing.set_text("price", price_tag.get("content") or price_tag.get_text(strip=True))
+    if listing.location == NOT_FOUND:
+        address_tag = soup.find(attrs={"itemprop": "address"})
+        if address_tag:
+            listing.location = " ".join(address_tag.get_text(" ", strip=True).split()) or NOT_FOUND
+
+    for field, prop in (("title", "og:title"), ("description", "og:description")):
+        if getattr(listing, field) == NOT_FOUND:
+            tag = soup.find("meta", property=prop)
+            if tag and tag.get("content"):
+                setattr(listing, field, tag["content"].strip())
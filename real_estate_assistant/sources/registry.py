@@ -0,0 +1,41 @@
+# real_estate_assistant/sources/registry.py
+"""
+The registered source adapters. `adapter_for(url)` returns the adapter whose hosts match the
+URL; pages from unknown hosts (saved copies, mirrors, test servers) are parsed as unegui.mn,
+the markup the retriever has always assumed, but without its politeness limits.
+"""
+from .base import SourceAdapter
+from .remax import RemaxSource
+from .site1212 import Site1212Source
+from .unegui import UneguiSource
+
+SOURCES = [UneguiSource(), RemaxSource(), Site1212Source()]
+DEFAULT_SOURCE = SOURCES[0]
+
+
+def register(adapter: SourceAdapter, first: bool = False) -> SourceAdapter:
+    """Adds an adapter; `first` lets it take over hosts an existing adapter already claims."""
+    if first:
+        SOURCES.insert(0, adapter)
+    else:
+        SOURCES.append(adapter)
+    return adapter
+
+
+def matching_source(url: str) -> SourceAdapter | None:
+    """The adapter registered for the URL's host, or None."""
+    return next((adapter for adapter in SOURCES if adapter.matches(url)), None)
+
+
+def adapter_for(url: str) -> SourceAdapter:
+    return matching_source(url) or DEFAULT_SOURCE
+
+
+def source_hosts() -> tuple:
+    return tuple(host for adapter in SOURCES for host in adapter.hosts)
+
+
+def is_listing_url(url: str) -> bool:
+    adapter = matching_source(url)
+    return bool(adapter and adapter.is_listing_url(url))
+
@@ -0,0 +1,26 @@
+# real_estate_assistant/sources/site1212.py
+import re
+
+from ..listing import NOT_FOUND, Listing
+from .base import GenericSource
+
+
+class Site1212Source(GenericSource):
+    """
+    1212.mn, the National Statistics Office portal. It publishes the monthly housing price
+    bulletins and statistic tables rather than individual listings, so pages get the generic
+    treatment; the adapter mainly keeps requests to the statistics servers slow.
+    """
+
+    name = "1212"
+    hosts = ("1212.mn",)
+    listing_url_pattern = re.compile(r'1212\.mn/(?:[\w-]+/)*(?:stat\.aspx|tables?/view)',
+                                     re.IGNORECASE)
+    requests_per_minute = 20
+    burst = 2
+    max_concurrency = 2
+
+    def extract(self, soup, listing: Listing):
+        super().extract(soup, listing)
+        if listing.title == NOT_FOUND and soup.title and soup.title.string:
+            listing.title = soup.title.string.strip()
@@ -0,0 +1,115 @@
+# real_estate_assistant/sources/unegui.py
+import re
+
+from ..listing import Listing
+from .base import SourceAdapter
+
+_ANNOUNCEMENT_PATTERN = re.compile(r'<section\b[^>]*\blist-announcement\b.*?</section\s*>',
+                                   re.IGNORECASE | re.DOTALL)
+
+
+def listing_characteristics(soup) -> list:
+    """
+    The key/value characteristics of a unegui.mn listing, e.g.
+    `<li><span class="key-chars">Талбай:</span><a class="value-chars">49.5 м²</a></li>`,
+    as (lowercased key without colon, value) pairs. One pass over the page.
+    """
+    pairs = []
+    for key_tag in soup.find_all(class_="key-chars"):
+        parent_li = key_tag.find_parent("li") or key_tag.parent
+        value_tag = parent_li.find(class_="value-chars") if parent_li else None
+        if value_tag:
+            key = key_tag.get_text(strip=True).lower().rstrip(":").strip()
+            pairs.append((key, " ".join(value_tag.get_text(" ", strip=True).split())))
+    return pairs
+
+
+def extract_detail_by_label(soup, label: str, characteristics: list = None):
+    """
+    Returns the value of a labelled characteristic (see listing_characteristics), e.g. "49.5 м²"
+    for label "Талбай". Matching is case-insensitive, ignores the trailing colon and accepts
+    longer keys that start with the label (e.g. "Өрөөний тоо" for "Өрөө"). Pass
+    `characteristics` to avoid rescanning the page for every label.
+    """
+    wanted = label.lower().rstrip(":").strip()
+    if characteristics is None:
+        characteristics = listing_characteristics(soup)
+    for key, value in characteristics:
+        if key.startswith(wanted):
+            return value
+    return None
+
+
+class UneguiSource(SourceAdapter):
+    """unegui.mn classifieds: `/adv/<id>_<slug>/` pages with chars-column characteristics."""
+
+    name = "unegui"
+    hosts = ("unegui.mn",)
+    listing_url_pattern = re.compile(r'unegui\.mn/adv/\d+')
+    requests_per_minute = 60
+    burst = 3
+    max_concurrency = 3
+
+    def content_region(self, html_content: str) -> str:
+        match = _ANNOUNCEMENT_PATTERN.search(html_content)
+        return match.group(0) if match else super().content_region(html_content)
+
+    def extract(self, soup, listing: Listing):
+        title_tag = soup.find('h1')
+        if title_tag:
+            listing.title = title_tag.text.strip()
+        else:
+            og_title = soup.find('meta', property='og:title')
+            if og_title and og_title.get('content'):
+                listing.title = og_title['content'].strip()
+
+        price_container = soup.find('section', class_='list-announcement')
+        if price_container and price_container.has_attr('data-price'):
+            listing.set_text("price", price_container['data-price'])
+        else:
+            price_tag = soup.find(class_='announcement-price__value')
+            if price_tag:
+                listing.set_text("price", price_tag.get_text(strip=True))
+
+        # Location: the labelled characteristic, then schema.org address, then the district
+        # level of the breadcrumbs. Free text mentioning "байршил" is not an address.
+        chars = listing_characteristics(soup)
+        location = (extract_detail_by_label(soup, "Байршил", chars)
+                    or extract_detail_by_label(soup, "Дүүрэг", chars))
+        if not location:
+            address_tag = soup.find(attrs={"itemprop": "address"})
+            if address_tag:
+                location = " ".join(address_tag.get_text(" ", strip=True).split())
+        if not location:
+            breadcrumbs = soup.find(class_="breadcrumbs")
+            links = breadcrumbs.find_all("a") if breadcrumbs else []
+            crumbs = [a.get_text(strip=True) for a in links]
+            location = next((c for c in reversed(crumbs) if "дүүрэг" in c.lower()), None)
+        if location:
+            listing.location = location
+
+        area = extract_detail_by_label(soup, "Талбай", chars)
+        if area:
+            listing.set_text("area", area)
+
+        rooms = extract_detail_by_label(soup, "Өрөө", chars)
+        if not rooms:
+            rooms_tag = soup.find(
+                string=lambda t: t and ("өрөө" in t.lower() or "rooms" in t.lower()))
+            rooms = rooms_tag.strip() if rooms_tag else None
+        if rooms:
+            listing.set_text("rooms", rooms)
+
+        description_tag = soup.find('div', class_='announcement-description')
+        if description_tag:
+            listing.description = (description_tag.text.strip()
+                                   .replace('\n', ' ').replace('\r', ' ').replace('\t', ' '))
+        else:
+            og_description = soup.find('meta', property='og:description')
+            if og_description and og_description.get('content'):
+                listing.description = og_description['content'].strip()
+            else:
+                body_text = soup.body.get_text(separator=' ', strip=True) if soup.body else ""
+                if len(body_text) > 500:
+                    body_text = body_text[:500] + '...'
+                listing.description = body_text
@@ -0,0 +1,279 @@
+# real_estate_assistant/tracing.py
+"""
+Lightweight spans for timing pipeline stages.
+
+    with span("retriever.fetch", url=url) as s:
+        html = ...
+        s.set(bytes=len(html))
+
+    @traced("writer.report_data")
+    def generate_report_data(...): ...
+
+Spans nest per request through contextvars (threads and asyncio tasks each keep their own
+stack), carry attributes such as bytes and row counts, and are handed to the configured
+exporters when they end: a JSONL file, an in-memory collector, or OpenTelemetry when its SDK
+is installed. With no exporter configured a span only costs a clock read and a contextvar set.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+TRACE_FILE_ENV = "TRACE_JSONL"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str = None
+    start_time: float = 0.0  # Unix time in seconds
+    duration_ms: float = 0.0
+    attrs: dict = field(default_factory=dict)
+    status: str = "ok"
+    error: str = None
+
+    def set(self, **attrs):
+        """Sets attributes, e.g. `span.set(bytes=len(body), rows=12)`."""
+        self.attrs.update(attrs)
+        return self
+
+    def add(self, key: str, amount=1):
+        """Increments a counter attribute."""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+        return self
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class _NullSpan:
+    """Returned by current_span() outside any span, so callers never need a None check."""
+
+    def set(self, **attrs):
+        return self
+
+    def add(self, key: str, amount=1):
+        return self
+
+
+NULL_SPAN = _NullSpan()
+_current = contextvars.ContextVar("current_span", default=None)
+_exporters = []
+
+
+def current_span():
+    return _current.get() or NULL_SPAN
+
+
+@contextmanager
+def span(name: str, **attrs):
+    parent = _current.get()
+    s = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time(),
+        attrs=attrs,
+    )
+    for exporter in _exporters:
+        exporter.on_start(s)
+    token = _current.set(s)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.status, s.error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        _current.reset(token)
+        for exporter in _exporters:
+            exporter.export(s)
+
+
+def traced(name: str = None, **attrs):
+    """
+    Decorator form of `span`; works on plain and async functions. Defaults to the qualified name.
+    """
+
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attrs):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+class SpanExporter:
+    """
+    Receives spans as they start and end. Subclasses override `export` and optionally `on_start`.
+    """
+
+    def on_start(self, s: Span):
+        pass
+
+    def export(self, s: Span):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class JsonlExporter(SpanExporter):
+    """Appends one JSON object per finished span to `path`."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, s: Span):
+        line = json.dumps(s.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self):
+        self._file.close()
+
+
+class CollectingExporter(SpanExporter):
+    """Keeps finished spans in memory (benchmarks, the server's per-request timings)."""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, s: Span):
+        with self._lock:
+            self.spans.append(s)
+
+    def trace(self, trace_id: str) -> list:
+        with self._lock:
+            return [s for s in self.spans if s.trace_id == trace_id]
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """
+    Mirrors spans into OpenTelemetry, keeping the parent/child structure, so they reach whatever
+    OTel exporter the process has configured (OTLP, Jaeger, console...). Needs opentelemetry-api.
+    """
+
+    def __init__(self, tracer_name: str = "real_estate_assistant"):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(tracer_name)
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, s: Span):
+        with self._lock:
+            parent = self._open.get(s.parent_id)
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self._tracer.start_span(s.name, context=context,
+                                            start_time=int(s.start_time * 1e9))
+        with self._lock:
+            self._open[s.span_id] = otel_span
+
+    def export(self, s: Span):
+        with self._lock:
+            otel_span = self._open.pop(s.span_id, None)
+        if otel_span is None:
+            return
+        for key, value in s.attrs.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        if s.error:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, s.error))
+        otel_span.end(end_time=int((s.start_time + s.duration_ms / 1000) * 1e9))
+
+
+def add_exporter(exporter: SpanExporter) -> SpanExporter:
+    _exporters.append(exporter)
+    return exporter
+
+
+def remove_exporter(exporter: SpanExporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+        exporter.shutdown()
+
+
+def configure_tracing(jsonl_path: str = None, opentelemetry: bool = False):
+    """
+    Enables exporters; `jsonl_path` defaults to the TRACE_JSONL environment variable.
+    OpenTelemetry is skipped with a warning when its packages are missing.
+    """
+    jsonl_path = jsonl_path or os.getenv(TRACE_FILE_ENV)
+    if jsonl_path:
+        add_exporter(JsonlExporter(jsonl_path))
+    if opentelemetry:
+        try:
+            add_exporter(OpenTelemetryExporter())
+        except ImportError:
+            logger.warning("opentelemetry is not installed; skipping the OpenTelemetry exporter")
+
+
+def summarize(spans: list) -> list:
+    """Finished spans of one trace as indented 'name  ms  attrs' lines, parents before children."""
+    children = {}
+    for s in spans:
+        children.setdefault(s.parent_id, []).append(s)
+    ids = {s.span_id for s in spans}
+    roots = [s for s in spans if s.parent_id not in ids]
+
+    lines = []
+
+    def walk(s, depth):
+        attrs = " ".join(f"{k}={v}" for k, v in s.attrs.items() if isinstance(v, (int, float)))
+        line = f"{'  ' * depth}{s.name:<{40 - 2 * depth}}{s.duration_ms:>10.1f} ms  {attrs}"
+        lines.append(line.rstrip())
+        for child in sorted(children.get(s.span_id, []), key=lambda c: c.start_time):
+            walk(child, depth + 1)
+
+    for root in sorted(roots, key=lambda r: r.start_time):
+        walk(root, 0)
+    return lines
+
+
+if __name__ == '__main__':
+    collector = add_exporter(CollectingExporter())
+
+    @traced("demo.parse")
+    def parse(text):
+        current_span().set(bytes=len(text))
+        return text.split()
+
+    with span("demo.request", url="http://example.com") as root:
+        with span("demo.fetch") as fetch:
+            time.sleep(0.01)
+            fetch.set(bytes=2048)
+        words = parse("a b c " * 100)
+        root.set(words=len(words))
+
+    print("\n".join(summarize(collector.trace(root.trace_id))))
@@ -1,8 +1,34 @@
 # real_estate_assistant/utils.py
 import json
+import logging
 import os
+import re
+
 # from together import Together # Example
 
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+LOG_DATE_FORMAT = "%H:%M:%S"
+
+logger = logging.getLogger(__name__)
+
+def configure_logging(level=logging.INFO):
+    """
+    Sets up stderr logging for the package (and for a module run with `python -m`). INFO logs one
+    summary line per step; DEBUG adds the full payloads (listing details, price tables, prompts).
+    Third-party loggers keep their defaults, so pdfminer and urllib3 stay quiet at DEBUG.
+    `level` may also be a name like "DEBUG".
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    for name in ("real_estate_assistant", "__main__"):
+        package_logger = logging.getLogger(name)
+        package_logger.handlers[:] = [handler]
+        package_logger.setLevel(level)
+        package_logger.propagate = False
+    return logging.getLogger("real_estate_assistant")
+
 def load_config(config_path="config.json"):
     """Loads a JSON configuration file."""
     if os.path.exists(config_path):
@@ -15,27 +41,54 @@ def save_data_json(data, filepath):
     try:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
-        print(f"Data successfully saved to {filepath}")
+        logger.info("Data saved to %s", filepath)
     except IOError as e:
-        print(f"Error saving data to {filepath}: {e}")
+        logger.error("Error saving data to %s: %s", filepath, e)
 
 def load_data_json(filepath):
     """Loads data from a JSON file."""
     if not os.path.exists(filepath):
-        print(f"Error: File not found at {filepath}")
+        logger.error("File not found at %s", filepath)
         return None
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             data = json.load(f)
-        print(f"Data successfully loaded from {filepath}")
+        logger.info("Data loaded from %s", filepath)
         return data
     except IOError as e:
-        print(f"Error loading data from {filepath}: {e}")
+        logger.error("Error loading data from %s: %s", filepath, e)
         return None
     except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from {filepath}: {e}")
+        logger.error("Error decoding JSON from %s: %s", filepath, e)
         return None
 
+def evict_to_size(directory: str, max_bytes: int) -> int:
+    """
+    Deletes the least recently used files in `directory` (by modification time, which cache
+    hits refresh) until it holds at most `max_bytes`. Files still being written (*.part) are
+    left alone. Returns the number of files deleted.
+    """
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and not entry.name.endswith(".part")]
+    except FileNotFoundError:
+        return 0
+    files = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries))
+    total = sum(size for _, size, _ in files)
+    deleted = 0
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    if deleted:
+        logger.info("Evicted %d files from %s", deleted, directory)
+    return deleted
+
 
 # def setup_llm_client(api_key=None):
 #     """Initializes and returns an LLM client (e.g., Together)."""
@@ -58,14 +111,131 @@ def clean_text(text: str) -> str:
     # Add more cleaning rules as needed
     return text
 
+_JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+
+def extract_json_object(text: str):
+    """
+    Parses the JSON object in an LLM response, ignoring any prose or code fences around it.
+    Returns {} when there is none; raises ValueError when it is not valid JSON.
+    """
+    match = _JSON_OBJECT_PATTERN.search(text or "")
+    return json.loads(match.group(0)) if match else {}
+
+_NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+
+def _parse_number(text: str):
+    """Parses the first number in a string, treating ',' as a thousands separator."""
+    match = _NUMBER_PATTERN.search(text.replace(" ", "").replace(" ", ""))
+    if not match:
+        return None
+    token = match.group(0)
+    if token.count(",") == 1 and "." not in token and len(token.split(",")[1]) != 3:
+        token = token.replace(",", ".")  # Decimal comma, e.g. "49,5 м²"
+    else:
+        token = token.replace(",", "")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+def parse_price_mnt(text) -> float | None:
+    """Parses a listing price such as 'MNT 239,000,000' or '239 сая ₮' into MNT."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    if not isinstance(text, str):
+        return None
+    value = _parse_number(text)
+    if value is None:
+        return None
+    lowered = text.lower()
+    if "тэрбум" in lowered or "billion" in lowered:
+        value *= 1_000_000_000
+    elif "сая" in lowered or "million" in lowered or re.search(r'\d\s*m\b', lowered):
+        value *= 1_000_000
+    return value
+
+def parse_area_m2(text) -> float | None:
+    """Parses an area such as '49.5 м²' or '49.5 мкв' into square meters."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    if not isinstance(text, str):
+        return None
+    return _parse_number(text)
+
+_ROOMS_PATTERN = re.compile(r'(\d+)\s*(?:өрөө|rooms?\b|bedrooms?\b)', re.IGNORECASE)
+
+def parse_rooms(text) -> int | None:
+    """Parses a room count such as '2', '2 өрөө' or 'Хан-Уулд 3 өрөө шинэ байр'."""
+    if isinstance(text, (int, float)):
+        return int(text)
+    if not isinstance(text, str):
+        return None
+    match = _ROOMS_PATTERN.search(text)
+    if match:
+        return int(match.group(1))
+    stripped = text.strip()
+    return int(stripped) if stripped.isdigit() else None
+
+
+TOKEN_ENCODING = "cl100k_base"
+_encoding = None
+_encoding_loaded = False
+
+def get_token_encoding():
+    """
+    Returns the tiktoken encoding, loaded once; None if tiktoken or its BPE file is unavailable.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:  # Missing package, or the BPE file cannot be downloaded offline
+            logger.info("Tokenizer unavailable (%s), estimating token counts", e.__class__.__name__)
+    return _encoding
+
+_TOKEN_ESTIMATE_PATTERN = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+
+def count_tokens(text: str) -> int:
+    """Counts prompt tokens with tiktoken, or estimates them from words and punctuation."""
+    if not text:
+        return 0
+    encoding = get_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    # Cyrillic words split into several BPE tokens, so count long words as more than one.
+    return sum(1 + len(token) // 4 for token in _TOKEN_ESTIMATE_PATTERN.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cuts text to at most `max_tokens` tokens, preferring a line boundary."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = get_token_encoding()
+    if encoding is not None:
+        truncated = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        low, high = 0, len(text)
+        while low < high:  # Longest prefix that fits the estimate
+            mid = (low + high + 1) // 2
+            if count_tokens(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        truncated = text[:low]
+    cut = truncated.rfind("\n")
+    return truncated[:cut] if cut > len(truncated) // 2 else truncated
+
 
 if __name__ == '__main__':
+    configure_logging()
     # Example usage of utility functions
     config = load_config("non_existent_config.json") # Test loading non-existent config
     print(f"Loaded config: {config}")
 
     # Test saving and loading JSON
-    sample_data = {"name": "Real Estate Bot", "version": "0.1", "features": ["analysis", "reporting"]}
+    sample_data = {"name": "Real Estate Bot", "version": "0.1",
+                   "features": ["analysis", "reporting"]}
     json_filepath = "data/processed_data/sample_output.json" # Ensure data/processed_data exists
     
     # Create dummy directory for testing if not present (main.py usually handles this)
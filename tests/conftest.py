@@ -0,0 +1,54 @@
+# tests/conftest.py
+"""Shared offline fixtures: bulletin-shaped market data, a sample listing and a replay LLM."""
+import pandas as pd
+import pytest
+
+from real_estate_assistant.listing import Listing
+from real_estate_assistant.llm import ReplayBackend, prompt_key
+
+MONTHS = ["2024 Mar", "2025 Jan", "2025 Feb", "2025 Mar"]
+
+
+def price_table(rows: dict) -> pd.DataFrame:
+    """{district: [price per month..., Value, Percent]} as parsed from a bulletin table."""
+    return pd.DataFrame([
+        {"District": district, **dict(zip(MONTHS, values)), "Value": values[-2],
+         "Percent": values[-1]}
+        for district, values in rows.items()
+    ])
+
+
+@pytest.fixture
+def market_data():
+    return {
+        "new_apartment_prices": price_table({
+            "Bayangol": [3.77, 4.05, 4.21, 4.41, 0.64, 17.0],
+            "Khan-Uul": [4.60, 4.85, 4.99, 5.10, 0.50, 10.9],
+            "Sukhbaatar": [3.92, 4.80, 5.12, 5.44, 1.52, 38.7],
+        }),
+        "old_apartment_prices": price_table({
+            "Bayangol": [2.71, 2.92, 3.03, 3.18, 0.46, 17.0],
+            "Khan-Uul": [3.31, 3.49, 3.59, 3.67, 0.36, 10.9],
+        }),
+        "period": "2025-03",
+    }
+
+
+@pytest.fixture
+def listing():
+    return Listing(url="https://www.unegui.mn/adv/9129580/", title="Төмөр замд 2 өрөө байр зарна",
+                   location="Баянгол дүүрэг, 3-р хороо",
+                   description="Нарлаг, дулаан, шинэ засвартай.", price_mnt=239e6, area_m2=49.5,
+                   rooms=2)
+
+
+@pytest.fixture
+def replay(tmp_path):
+    """A ReplayBackend with no recordings; `record(prompt, answer)` adds one."""
+    backend = ReplayBackend(str(tmp_path / "responses.json"), strict=True)
+
+    def record(prompt: str, answer: str):
+        backend.recordings[prompt_key(prompt)] = {"content": answer}
+
+    backend.record = record
+    return backend
@@ -0,0 +1,44 @@
+# tests/test_comparables.py
+from dataclasses import replace
+
+import pytest
+
+from real_estate_assistant.comparables import (
+    ComparablesIndex,
+    comparables_table,
+    summarize_comparables,
+)
+
+
+@pytest.fixture
+def store(listing):
+    """Bayangol 2-room flats from 30 to 70 m², plus flats that must never match."""
+    flats = [replace(listing, url=f"https://www.unegui.mn/adv/{7000000 + area}/", area_m2=area,
+                     price_mnt=area * 4.5e6)
+             for area in range(30, 71, 2)]
+    flats.append(replace(listing, url="https://www.unegui.mn/adv/1/", rooms=3))
+    flats.append(replace(listing, url="https://www.unegui.mn/adv/2/", location="Хан-Уул дүүрэг"))
+    flats.append(listing)
+    return flats
+
+
+@pytest.mark.parametrize("embed", [False, True])
+def test_search_filters_district_rooms_and_area(store, listing, embed):
+    index = ComparablesIndex.from_listings(store, embed=embed)
+    results = index.search(listing, k=50)
+
+    assert listing.url not in results.urls
+    assert "https://www.unegui.mn/adv/1/" not in results.urls
+    assert "https://www.unegui.mn/adv/2/" not in results.urls
+    areas = sorted(results.records["area_m2"].tolist())
+    assert areas[0] >= listing.area_m2 * 0.8 and areas[-1] <= listing.area_m2 * 1.2
+    assert len(index.search(listing, k=3)) == 3
+
+
+def test_summary_and_prompt_table(store, listing):
+    index = ComparablesIndex.from_listings(store, embed=False)
+    summary = summarize_comparables(index.search(listing))
+    assert summary["median_price_per_m2"] == pytest.approx(4.5)
+    table = comparables_table(summary)
+    assert table.startswith(f"{summary['count']} comparable listings: median MNT 4.50M per m²")
+    assert comparables_table({"count": 0}) == "No comparable listings found."
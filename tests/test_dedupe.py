@@ -0,0 +1,73 @@
+# tests/test_dedupe.py
+from dataclasses import replace
+
+import pytest
+
+from real_estate_assistant.dedupe import Deduplicator
+
+
+def test_repost_is_a_duplicate_of_the_first_listing(listing):
+    repost = replace(listing, url="https://www.unegui.mn/adv/9311207/", title=listing.title + "!!",
+                     price_mnt=235e6)
+    dedupe = Deduplicator()
+    assert dedupe.add(listing) is None
+    assert dedupe.add(repost) == listing.url
+    assert dedupe.canonical(repost.url) == listing.url
+    assert dedupe.clusters() == [[listing.url, repost.url]]
+
+
+def test_same_text_for_a_different_flat_is_not_a_duplicate(listing):
+    other_flat = replace(listing, url="https://www.unegui.mn/adv/9311300/", price_mnt=310e6,
+                         area_m2=65)
+    assert Deduplicator().filter([listing, other_flat]) == [listing, other_flat]
+
+
+def test_seen_urls_are_not_added_again(listing):
+    dedupe = Deduplicator()
+    dedupe.add(listing)
+    assert dedupe.add(listing) is None
+    assert len(dedupe) == 1
+    assert dedupe.clusters() == []
+
+
+def test_saved_clusters_survive_a_reload(tmp_path, listing):
+    repost = replace(listing, url="https://www.unegui.mn/adv/9311207/", price_mnt=235e6)
+    dedupe = Deduplicator()
+    dedupe.filter([listing, repost])
+    dedupe.save(str(tmp_path / "vector_store.dedupe.pkl"))
+
+    loaded = Deduplicator.load(str(tmp_path / "vector_store.dedupe.pkl"))
+    assert loaded.duplicates_of(listing.url) == [repost.url]
+    assert loaded.add(replace(repost, url="https://www.unegui.mn/adv/9311208/")) == listing.url
+    assert len(Deduplicator.load(str(tmp_path / "missing.pkl"))) == 0
+
+
+def test_reports_list_the_other_postings(listing, market_data):
+    from real_estate_assistant.agents.writer import WriterAgent, extract_market_context
+    from real_estate_assistant.report_formats import render_report
+
+    repost = replace(listing, url="https://www.unegui.mn/adv/9311207/")
+    dedupe = Deduplicator()
+    dedupe.filter([listing, repost])
+    context = extract_market_context(market_data, listing, deduplicator=dedupe)
+    report_data = WriterAgent(use_llm=False).generate_report_data(listing, context)
+
+    assert report_data["duplicate_urls"] == [repost.url]
+    assert f"Also posted as: {repost.url}" in render_report(report_data, "markdown")
+
+
+def test_the_store_keeps_its_deduplicator_between_writes(tmp_path, listing, market_data):
+    pytest.importorskip("faiss")
+    from real_estate_assistant.agents.build_index import (
+        VectorStore,
+        update_vector_store,
+        write_vector_store,
+    )
+
+    index_path, data_path = str(tmp_path / "vector_store.index"), str(tmp_path / "data.pkl")
+    write_vector_store([listing], market_data, index_path, data_path)
+    repost = replace(listing, url="https://www.unegui.mn/adv/9311207/")
+    assert update_vector_store([(None, repost)], index_path, data_path) == 0
+
+    store = VectorStore.load(index_path, data_path)
+    assert store.deduplicator.clusters() == [[listing.url, repost.url]]
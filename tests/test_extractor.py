@@ -0,0 +1,59 @@
+# tests/test_extractor.py
+import pytest
+
+from real_estate_assistant.agents.extractor import HybridExtractor
+from real_estate_assistant.llm import LLMBackend, LLMResponse
+
+URL = "https://www.unegui.mn/adv/9129580/"
+PAGE = (
+    "<html><body><ul class='breadcrumbs'><a>Үл хөдлөх</a><a>Баянгол дүүрэг</a></ul>"
+    "<section class='list-announcement' data-price='65000000'>"
+    "<h1>Бгд 4 хороололд 1 өрөө 17 мк байр</h1>"
+    "<ul class='chars-column'>"
+    "<li><span class='key-chars'>Талбай:</span><a class='value-chars'>17 м²</a></li>"
+    "<li><span class='key-chars'>Өрөө:</span><a class='value-chars'>1</a></li></ul>"
+    "<div class='announcement-description'>Шууд нүүж ороход бэлэн.</div>"
+    "</section></body></html>"
+)
+
+
+class AnsweringLLM(LLMBackend):
+    """Answers every prompt with `answer` and keeps the prompts."""
+
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.prompts = []
+
+    def invoke(self, prompt: str, **kwargs) -> LLMResponse:
+        self.prompts.append(prompt)
+        return LLMResponse(content=self.answer)
+
+
+def test_complete_page_never_reaches_the_llm():
+    llm = AnsweringLLM("{}")
+    listing = HybridExtractor(llm_client=llm).extract_from_html(PAGE, URL)
+    assert llm.prompts == []
+    assert (listing.price_mnt, listing.area_m2, listing.rooms) == (65e6, 17, 1)
+    assert set(listing.provenance.values()) == {"parser"}
+
+
+def test_llm_is_asked_only_for_the_missing_fields():
+    llm = AnsweringLLM('{"location": "Баянгол дүүрэг, 4-р хороолол"}')
+    extractor = HybridExtractor(llm_client=llm)
+    listing = extractor.extract_from_html(PAGE.replace("<a>Баянгол дүүрэг</a>", ""), URL)
+
+    [prompt] = llm.prompts
+    assert '"location"' in prompt
+    assert not any(f'"{field}"' in prompt for field in ("title", "price", "area", "rooms"))
+    assert listing.location == "Баянгол дүүрэг, 4-р хороолол"
+    assert listing.provenance["location"] == "llm"
+    assert extractor.stats["llm_fields"] == 1
+
+
+@pytest.mark.parametrize("answer", ['{"area": "хэдэн метр"}', "not json"])
+def test_unusable_answers_leave_the_field_missing(answer):
+    page = PAGE.replace("<li><span class='key-chars'>Талбай:</span><a class='value-chars'>17 м²"
+                        "</a></li>", "").replace(" 17 мк", "")
+    listing = HybridExtractor(llm_client=AnsweringLLM(answer)).extract_from_html(page, URL)
+    assert listing.area_m2 is None
+    assert listing.provenance["area"] == "missing"
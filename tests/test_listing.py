@@ -0,0 +1,34 @@
+# tests/test_listing.py
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from real_estate_assistant.listing import Listing, ListingBatch, as_listing
+
+
+def test_dict_form_round_trips(listing):
+    data = listing.to_dict()
+    assert (data["price"], data["area"]) == ("MNT 239,000,000", "49.5 m²")
+    assert as_listing(data) == listing
+    parsed = Listing.from_dict({"url": listing.url, "price": "239 сая ₮", "bedrooms": "2"})
+    assert (parsed.price_mnt, parsed.rooms, parsed.area_m2) == (239e6, 2, None)
+
+
+def test_batch_columns(listing):
+    other = replace(listing, url="https://www.unegui.mn/adv/1/", location="Хан-Уул дүүрэг",
+                    price_mnt=None)
+    batch = ListingBatch.from_listings([listing, other])
+
+    assert batch.price_per_m2()[0] == pytest.approx(239 / 49.5)
+    assert np.isnan(batch.price_per_m2()[1])
+    assert batch.take(batch.district_mask("БГД")).urls == [listing.url]
+
+
+def test_take_accepts_masks_and_indices(listing):
+    other = replace(listing, url="https://www.unegui.mn/adv/1/", location="Хан-Уул дүүрэг")
+    batch = ListingBatch.from_listings([listing, other])
+
+    assert batch.take(batch.district_mask("БГД")).urls == [listing.url]
+    assert batch.take([False, True]).urls == [other.url]
+    assert batch.take([1, 0]).urls == [other.url, listing.url]
@@ -0,0 +1,40 @@
+# tests/test_market_history.py
+import os
+
+import pandas as pd
+
+from real_estate_assistant.market_history import MarketHistoryStore, ingest_bulletins
+
+BULLETIN = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks", "fixtures",
+                        "bulletin_2025_03.pdf")
+
+
+def bulletin_rows(bulletin: str, prices: dict) -> pd.DataFrame:
+    """Bayangol/New rows of one bulletin: {month: price}."""
+    return pd.DataFrame({"District": "Bayangol", "Type": "New", "period": list(prices),
+                         "price": list(prices.values()), "change": None, "percent": None,
+                         "source": f"{bulletin}.pdf", "bulletin": bulletin})
+
+
+def test_ingestion_stores_every_month_column(tmp_path):
+    store = MarketHistoryStore(str(tmp_path))
+    summary = ingest_bulletins([BULLETIN, str(tmp_path / "missing.pdf")], store, max_workers=2)
+
+    assert summary["ingested"] == [{"source": BULLETIN, "period": "2025-03"}]
+    assert [error["source"] for error in summary["errors"]] == [str(tmp_path / "missing.pdf")]
+    assert store.periods() == ["2024-03", "2025-01", "2025-02", "2025-03"]
+    assert store.district_series("БГД").tolist() == [3.77, 4.05, 4.21, 4.41]
+    assert store.trend("Bayangol")["change_pct"] == 16.98
+
+
+def test_a_month_keeps_its_own_bulletin_whatever_the_order(tmp_path):
+    march = bulletin_rows("2025-03", {"2025-02": 4.21, "2025-03": 4.41})
+    april = bulletin_rows("2025-04", {"2025-02": 4.20, "2025-03": 4.45, "2025-04": 4.52})
+    february = bulletin_rows("2025-02", {"2025-02": 4.19})
+
+    for order in ([march, april, february], [february, april, march]):
+        store = MarketHistoryStore(str(tmp_path / str(id(order))))
+        for rows in order:
+            store.append(rows["bulletin"][0], rows)
+        # Each month from its own bulletin; a month without one from the latest bulletin
+        assert store.district_series("Bayangol").tolist() == [4.19, 4.41, 4.52]
@@ -0,0 +1,54 @@
+# tests/test_market_index.py
+import pytest
+
+from real_estate_assistant import market_index
+from real_estate_assistant.agents.retriever import RetrieverAgent
+from real_estate_assistant.market_index import (
+    MarketIndex,
+    get_market_index,
+    month_period,
+    resolve_district,
+)
+
+
+@pytest.mark.parametrize("text, district", [
+    ("БГД 3-р хороо", "Bayangol"),
+    ("Bayangol district", "Bayangol"),
+    ("Баянзүрхийн 26-р хороо", "Bayanzurkh"),
+    ("УБ, ХУД, 11-р хороо", "Khan-Uul"),
+    ("Songinohairhan", "Songinokhairkhan"),
+    ("Улаанбаатар", "Ulaanbaatar"),
+    ("Дархан", None),
+])
+def test_resolve_district(text, district):
+    assert resolve_district(text) == district
+
+
+def test_index_prices_come_from_the_latest_month(market_data):
+    index = MarketIndex(market_data)
+    assert index.month == "2025 Mar"
+    assert index.lookup("БГД", "New")["Price"] == 4.41
+    assert index.lookup("Bayangol") == pytest.approx((4.41 + 3.18) / 2)
+    assert [row["District"] for row in index.top_rows] == ["Sukhbaatar", "Khan-Uul", "Bayangol"]
+    assert index.percentile(5.44) == pytest.approx(90.0)
+
+
+def test_index_is_built_and_hashed_once_per_data(market_data, monkeypatch):
+    index = get_market_index(market_data)
+    monkeypatch.setattr(market_index, "market_data_version", lambda data: pytest.fail("rehashed"))
+    assert get_market_index(market_data) is index
+    assert market_data["version"] == index.version
+
+
+def test_price_lines_use_the_months_in_the_header():
+    lines = [
+        "District 2024 Apr 2025 Feb 2025 Mar 2025 Apr Value Percent",
+        "Bayangol 3.80 4.21 4.41 4.52 0.72 18.90",
+        "Source: not a row",
+    ]
+    retriever = RetrieverAgent()
+    rows = retriever.parse_price_lines(lines)
+    assert rows == [{"District": "Bayangol", "2024 Apr": 3.80, "2025 Feb": 4.21, "2025 Mar": 4.41,
+                     "2025 Apr": 4.52, "Value": 0.72, "Percent": 18.90}]
+    assert retriever.extract_bulletin_period(lines) == "2025-04"
+    assert month_period("2025 Apr") == "2025-04"
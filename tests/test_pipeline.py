@@ -0,0 +1,72 @@
+# tests/test_pipeline.py
+import asyncio
+from dataclasses import replace
+
+import pytest
+
+from real_estate_assistant import pipeline as pipeline_module
+from real_estate_assistant.agents.writer import WriterAgent
+from real_estate_assistant.pipeline import AsyncPipeline
+
+
+def test_market_data_is_downloaded_once_and_kept_when_a_refresh_fails(market_data):
+    downloads = []
+
+    async def adownload_pdf(session, url):
+        downloads.append(url)
+        if len(downloads) > 1:
+            raise OSError("The bulletin site is down")
+        return "bulletin.pdf"
+
+    async def run():
+        async with AsyncPipeline(writer=WriterAgent(use_llm=False)) as pipeline:
+            pipeline.retriever.adownload_pdf = adownload_pdf
+            pipeline.retriever.parse_downloaded_pdf = lambda path: market_data
+            loaded = await asyncio.gather(*(pipeline.market_data() for _ in range(4)))
+            assert all(data is market_data for data in loaded)
+            assert len(downloads) == 1
+
+            pipeline.market_data_ttl = 0  # Expired: the next call refreshes, and fails
+            assert await pipeline.market_data() is market_data
+            assert len(downloads) == 2
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("archive", [True, False])
+def test_batch_reports_reach_the_renderer_as_they_finish(monkeypatch, listing, archive):
+    listings = [replace(listing, url=f"https://www.unegui.mn/adv/{n}/") for n in range(3)]
+    events = []
+
+    async def market_context(listing, market_data=None):
+        return {}
+
+    async def report_data(listing, market_context, translate=False):
+        await asyncio.sleep(0.2 if listing.url.endswith("/0/") else 0)
+        events.append(("done", listing.url))
+        return {"url": listing.url}
+
+    def render(reports, filename):
+        for report in reports:
+            events.append(("rendered", report["url"]))
+        return filename
+
+    monkeypatch.setattr(pipeline_module, "create_pdf_archive", render)
+    monkeypatch.setattr(pipeline_module, "create_combined_pdf_report", render)
+
+    async def run():
+        async with AsyncPipeline(writer=WriterAgent(use_llm=False), max_workers=1) as pipeline:
+            pipeline.market_context = market_context
+            pipeline.report_data = report_data
+            return await pipeline.batch_pdf_report(listings, {}, output_path="out",
+                                                   archive=archive)
+
+    assert asyncio.run(run()) == "out"
+    rendered = [url for event, url in events if event == "rendered"]
+    first = listings[0].url
+    if archive:  # The slow first report does not hold up the others
+        assert sorted(rendered[:2]) == [listings[1].url, listings[2].url]
+        assert rendered[2] == first
+        assert events.index(("rendered", listings[1].url)) < events.index(("done", first))
+    else:  # Sections keep the listing order
+        assert rendered == [listing.url for listing in listings]
@@ -0,0 +1,100 @@
+# tests/test_rate_limit.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from real_estate_assistant import rate_limit
+from real_estate_assistant.llm import StubLLM
+from real_estate_assistant.rate_limit import (
+    AdaptiveConcurrency,
+    RateLimitedLLM,
+    RateLimiter,
+    TokenBucket,
+)
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+class FailingOnce(StubLLM):
+    """Answers 429 on the first call for every prompt, then like StubLLM."""
+
+    def __init__(self, error=Throttled):
+        super().__init__()
+        self.error = error
+        self.seen = set()
+
+    def invoke(self, prompt: str, **kwargs):
+        if prompt not in self.seen:
+            self.seen.add(prompt)
+            raise self.error("Too many requests")
+        return super().invoke(prompt, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt: 0.0)
+
+
+def limited(llm, **kwargs):
+    return RateLimitedLLM(llm, limiter=RateLimiter(60_000, 10_000_000),
+                          concurrency=AdaptiveConcurrency(initial=8), **kwargs)
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(rate_per_minute=60, capacity=2)
+    bucket.take(2)
+    assert bucket.wait_time(1, bucket.updated) == pytest.approx(1.0)
+    assert bucket.wait_time(1, bucket.updated + 1.0) == pytest.approx(0.0)
+
+
+def test_limiter_makes_callers_wait_past_the_burst():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=60_000, request_burst=1)
+    assert limiter._try_acquire(10) == 0.0
+    assert limiter._try_acquire(10) > 0.5
+
+
+def test_throttled_calls_are_retried_and_counted():
+    llm = limited(FailingOnce())
+    assert llm.invoke("prompt").content.startswith("Stub response")
+    assert (llm.retries, llm.throttled) == (1, 1)
+    assert asyncio.run(llm.ainvoke("other prompt")).content.startswith("Stub response")
+    assert (llm.retries, llm.throttled) == (2, 2)
+
+
+def test_counters_are_exact_under_concurrency():
+    llm = limited(FailingOnce())
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: llm.invoke(f"prompt {i}"), range(64)))
+    assert (llm.retries, llm.throttled) == (64, 64)
+
+
+def test_other_errors_are_raised_at_once():
+    llm = limited(FailingOnce(error=ValueError))
+    with pytest.raises(ValueError):
+        llm.invoke("prompt")
+    assert llm.retries == 0
+
+
+def test_concurrency_limit_halves_on_errors():
+    concurrency = AdaptiveConcurrency(initial=8)
+    concurrency.acquire()
+    concurrency.release(latency=0.1, ok=False)
+    assert concurrency.limit == 4
+
+
+def test_async_waiter_is_woken_by_a_release_from_another_thread():
+    concurrency = AdaptiveConcurrency(initial=1)
+    concurrency.acquire()
+
+    async def wait_for_slot():
+        waiting = asyncio.ensure_future(concurrency.acquire_async())
+        await asyncio.sleep(0)
+        assert not waiting.done() and len(concurrency._async_waiters) == 1
+        await asyncio.to_thread(concurrency.release, 0.1)
+        await asyncio.wait_for(waiting, timeout=1)
+
+    asyncio.run(wait_for_slot())
+    assert concurrency.in_flight == 1 and concurrency._async_waiters == []
@@ -0,0 +1,127 @@
+# tests/test_recrawl.py
+import pytest
+
+from real_estate_assistant.agents.retriever import RetrieverAgent
+from real_estate_assistant.recrawl import MAX_INTERVAL, MIN_INTERVAL, Recrawler, RecrawlStore
+from real_estate_assistant.sources.scheduler import FetchScheduler
+
+URL = "https://www.unegui.mn/adv/9129580/"
+BROKEN_URL = "https://www.unegui.mn/adv/9311207/"
+
+
+def page(price: str) -> str:
+    return (f"<html><body><section class='list-announcement' data-price='{price}'>"
+            "<h1>Төмөр замд 2 өрөө байр зарна</h1></section></body></html>")
+
+
+def ok(html: str, etag: str = '"v1"') -> dict:
+    return {"status": 200, "html": html, "etag": etag, "last_modified": None}
+
+
+class ScriptedRetriever(RetrieverAgent):
+    """Answers each conditional GET with the next scripted result for its URL."""
+
+    def __init__(self):
+        super().__init__(scheduler=FetchScheduler())
+        self.responses = {}
+        self.requests = []
+        self.parsed = []
+
+    def fetch_if_modified(self, url, etag=None, last_modified=None):
+        self.requests.append((url, etag))
+        return self.responses[url].pop(0)
+
+    def parse_listing_html(self, html_content, url):
+        self.parsed.append(url)
+        return super().parse_listing_html(html_content, url)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = RecrawlStore(str(tmp_path / "recrawl.sqlite"))
+    store.track([URL], now=0)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def retriever():
+    return ScriptedRetriever()
+
+
+def interval(store, url=URL):
+    return next(row["interval"] for row in store.due(float("inf")) if row["url"] == url)
+
+
+def test_not_modified_doubles_the_interval_up_to_the_maximum(store, retriever):
+    recrawler = Recrawler(store, retriever)
+    retriever.responses[URL] = [ok(page("239000000"))]
+    assert recrawler.run(now=0)["changed"] == 1
+    assert interval(store) == MIN_INTERVAL
+
+    now, intervals = 0, []
+    while not intervals or intervals[-1] < MAX_INTERVAL:
+        now += interval(store)
+        retriever.responses[URL] = [{"status": 304, "html": None, "etag": '"v1"',
+                                     "last_modified": None}]
+        assert recrawler.run(now=now)["not_modified"] == 1
+        intervals.append(interval(store))
+    assert intervals[:2] == [2 * MIN_INTERVAL, 4 * MIN_INTERVAL]
+    assert intervals[-1] == MAX_INTERVAL
+    assert retriever.requests[-1] == (URL, '"v1"')  # The validator from the first fetch
+
+
+def test_same_fingerprint_is_not_parsed_again(store, retriever):
+    recrawler = Recrawler(store, retriever)
+    retriever.responses[URL] = [ok(page("239000000")), ok(page("239000000"), etag='"v2"')]
+    recrawler.run(now=0)
+    result = recrawler.run(now=MIN_INTERVAL)
+    assert (result["unchanged"], result["changed"], result["changes"]) == (1, 0, [])
+    assert retriever.parsed == [URL]
+
+
+def test_price_change_is_recorded(store, retriever):
+    changes = []
+    recrawler = Recrawler(store, retriever, on_change=changes.extend)
+    retriever.responses[URL] = [ok(page("239000000")), ok(page("229000000"))]
+    assert recrawler.run(now=0)["price_changes"] == 0  # The first price is not a change
+
+    result = recrawler.run(now=MIN_INTERVAL)
+    assert result["price_changes"] == 1
+    assert store.price_series(URL) == [(0, 239e6), (MIN_INTERVAL, 229e6)]
+    previous, current = changes[-1]
+    assert (previous.price_mnt, current.price_mnt) == (239e6, 229e6)
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_removed_listing_is_marked_gone(store, retriever, status):
+    recrawler = Recrawler(store, retriever)
+    retriever.responses[URL] = [ok(page("239000000")),
+                                {"status": status, "html": None, "etag": None,
+                                 "last_modified": None}]
+    recrawler.run(now=0)
+    result = recrawler.run(now=MIN_INTERVAL)
+
+    assert result["gone"] == 1
+    assert [(previous.url, current) for previous, current in result["changes"]] == [(URL, None)]
+    assert len(store) == 0
+    assert store.due(float("inf")) == []
+
+
+def test_a_page_that_fails_to_parse_does_not_undo_the_pass(store, retriever, monkeypatch):
+    store.track([BROKEN_URL], now=0)
+    parse = retriever.parse_listing_html
+
+    def parse_listing_html(html_content, url):
+        if url == BROKEN_URL:
+            raise ValueError("unexpected markup")
+        return parse(html_content, url)
+
+    monkeypatch.setattr(retriever, "parse_listing_html", parse_listing_html)
+    retriever.responses = {URL: [ok(page("239000000"))], BROKEN_URL: [ok(page("1"))]}
+    result = Recrawler(store, retriever).run(now=0)
+
+    assert (result["changed"], result["errors"]) == (1, 1)
+    assert store.price_series(URL) == [(0, 239e6)]
+    assert [row["url"] for row in store.due(MIN_INTERVAL - 1)] == []
+    assert sorted(row["url"] for row in store.due(MIN_INTERVAL)) == [URL, BROKEN_URL]
@@ -0,0 +1,45 @@
+# tests/test_report_cache.py
+import os
+from dataclasses import replace
+
+from real_estate_assistant.agents.writer import WriterAgent, extract_market_context
+from real_estate_assistant.llm import InstrumentedLLM, StubLLM
+from real_estate_assistant.report_cache import ReportCache
+
+
+def test_key_depends_on_everything_that_reaches_the_report(tmp_path, listing, market_data):
+    cache = ReportCache(str(tmp_path))
+    context = extract_market_context(market_data, listing)
+    key = cache.key(listing, context, translate=False, model="stub")
+
+    assert cache.key(replace(listing, description="  Нарлаг,  дулаан, шинэ засвартай. "), context,
+                     False, "stub") == key
+    assert cache.key(replace(listing, price_mnt=250e6), context, False, "stub") != key
+    assert cache.key(listing, context, True, "stub") != key
+    assert cache.key(listing, context, False, "other-model") != key
+    assert cache.key(listing, extract_market_context({}, listing), False, "stub") != key
+
+
+def test_writer_reuses_cached_report(tmp_path, listing, market_data):
+    llm = StubLLM()
+    cache = ReportCache(str(tmp_path))
+    writer = WriterAgent(llm=InstrumentedLLM(llm), report_cache=cache)
+    context = extract_market_context(market_data, listing)
+
+    first = writer.generate_report_data(listing, context)
+    calls = llm.calls
+    second = writer.generate_report_data(listing, context)
+
+    assert llm.calls == calls
+    assert cache.stats["hits"] == 1
+    assert second["market_analysis"] == first["market_analysis"]
+    assert second["market_data_df"] is context["market_data_df"]
+
+
+def test_eviction_keeps_the_cache_under_its_size(tmp_path):
+    cache = ReportCache(str(tmp_path), max_bytes=3000)
+    for i in range(10):
+        cache.put(f"{i:032x}", {"title": "x" * 500, "market_data_df": None})
+    assert sum(entry.stat().st_size for entry in os.scandir(tmp_path)) <= 3000
+    assert cache.get(f"{9:032x}") is not None
+    assert cache.get(f"{0:032x}") is None
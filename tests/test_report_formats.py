@@ -0,0 +1,52 @@
+# tests/test_report_formats.py
+import json
+
+import pytest
+
+from real_estate_assistant.agents.writer import WriterAgent, extract_market_context
+from real_estate_assistant.report_formats import (
+    ReportRenderer,
+    render_report,
+    report_hash,
+    write_report,
+)
+
+
+@pytest.fixture
+def report_data(listing, market_data):
+    writer = WriterAgent(use_llm=False)
+    return writer.generate_report_data(listing, extract_market_context(market_data, listing))
+
+
+def test_json_is_serializable_and_carries_the_market_table(report_data):
+    data = json.loads(render_report(report_data, "json"))
+    assert data["title"] == report_data["title"]
+    assert "market_data_df" not in data
+    bayangol = next(row for row in data["market_data"]
+                    if row["District"] == "Bayangol" and row["Type"] == "New")
+    assert bayangol["Price"] == 4.41
+
+
+def test_markdown_and_html_show_latest_month_prices(report_data):
+    markdown = render_report(report_data, "markdown")
+    assert markdown.startswith(f"# {report_data['title']}")
+    assert "| Bayangol | 4.41 | 0.64 | 17.0 | New |" in markdown
+    html = render_report(report_data, "html")
+    assert "<td>4.41</td>" in html
+    assert "<th>2025 Mar (MNT сая)</th>" in html
+
+
+def test_report_id_ignores_usage_and_write_report(tmp_path, report_data):
+    assert report_hash({**report_data, "llm_usage": {"calls": 2}}) == report_hash(report_data)
+    path = write_report(report_data, "markdown", str(tmp_path / "report.md"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == render_report(report_data, "markdown")
+
+
+def test_renderer_keeps_recent_reports(tmp_path, report_data):
+    renderer = ReportRenderer(str(tmp_path), max_reports=1)
+    report_id = renderer.add(report_data)
+    assert renderer.render(report_id, "json") == render_report(report_data, "json")
+    renderer.add({**report_data, "title": "Another listing"})
+    assert renderer.render(report_id, "json") is None
+    assert renderer.pdf_path("0" * 32) is None
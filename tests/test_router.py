@@ -0,0 +1,69 @@
+# tests/test_router.py
+from concurrent.futures import ThreadPoolExecutor
+
+from real_estate_assistant.agents.router import ROUTER_AGENT_PROMPT_TEMPLATE, RouterAgent
+
+
+def prompt(query: str) -> str:
+    return ROUTER_AGENT_PROMPT_TEMPLATE.format(user_query=query)
+
+
+def test_listing_url_is_routed_without_llm():
+    decision = RouterAgent().route("Энийг шалгаад өгөөч https://www.unegui.mn/adv/9129580_tomor-zamd/")
+    assert (decision.label, decision.tier) == ("q1", "pattern")
+    assert decision.url == "https://www.unegui.mn/adv/9129580_tomor-zamd/"
+
+
+def test_general_query_is_decided_by_keywords():
+    decision = RouterAgent().route("Хан-Уул дүүрэгт 2 өрөө байр")
+    assert (decision.label, decision.tier, decision.url) == ("q2", "keywords", None)
+
+
+def test_unknown_url_has_its_own_tier_and_is_confirmed_by_llm(replay):
+    query = "Look at https://example.com/listing/42"
+    replay.record(prompt(query), "q1")
+    decision = RouterAgent(llm_client=replay).route(query)
+    assert (decision.label, decision.tier, decision.url) == ("q1", "llm", "https://example.com/listing/42")
+    assert RouterAgent().route(query).tier == "url"
+
+
+def test_llm_q1_without_url_is_downgraded(replay):
+    replay.record(prompt("hello"), "q1")
+    decision = RouterAgent(llm_client=replay).route("hello")
+    assert (decision.label, decision.url) == ("q2", None)
+
+
+def test_fallback_decisions_are_not_cached(replay):
+    router = RouterAgent(llm_client=replay)
+    assert router.route("hello").tier == "fallback"  # Nothing recorded: the strict replay raises
+
+    replay.record(prompt("hello"), "q2")
+    decision = router.route("hello")
+    assert (decision.tier, decision.cached) == ("llm", False)
+    assert router.route("HELLO!").cached
+
+
+def test_batch_matches_single_routing(replay):
+    replay.record(prompt("hello"), "q2")
+    queries = ["https://www.unegui.mn/adv/1/", "Хан-Уул дүүрэгт 2 өрөө байр", "hello", "Hello"]
+    batch = RouterAgent(llm_client=replay).classify_batch(queries)
+    assert [d.label for d in batch] == ["q1", "q2", "q2", "q2"]
+    assert batch[3].cached
+
+
+def test_tier_counts_are_exact_under_concurrency():
+    router = RouterAgent()
+    queries = [f"https://www.unegui.mn/adv/{i}/" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(router.route, queries))
+    assert router.tier_counts["pattern"] == 200
+
+
+def test_cache_is_consistent_under_concurrency():
+    router = RouterAgent(cache_size=8)
+    queries = [f"https://www.unegui.mn/adv/{i % 16}/" for i in range(400)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        decisions = list(pool.map(router.route, queries))
+    assert [d.url for d in decisions] == queries
+    assert router.cache_hits + router.tier_counts["pattern"] == 400
+    assert len(router._cache) == 8
@@ -0,0 +1,49 @@
+# tests/test_scoring.py
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from real_estate_assistant.market_index import MarketIndex
+from real_estate_assistant.scoring import describe_verdict, score_listing
+
+
+@pytest.mark.parametrize("price_mnt, verdict", [
+    (160e6, "good"),  # Bayangol averages 3.795M per m²; 49.5 m² at 160M is 14.8% below
+    (190e6, "average"),
+    (239e6, "overpriced"),
+])
+def test_verdict_buckets(listing, market_data, price_mnt, verdict):
+    score = score_listing(replace(listing, price_mnt=price_mnt), MarketIndex(market_data))
+    assert (score["district"], score["benchmark_scope"]) == ("Bayangol", "district")
+    assert score["benchmark_price_per_m2"] == pytest.approx(3.795)
+    assert score["verdict"] == verdict
+
+
+def test_unknown_district_is_scored_against_the_market(listing, market_data):
+    elsewhere = replace(listing, title="2 өрөө байр", location="Дархан")
+    score = score_listing(elsewhere, MarketIndex(market_data))
+    assert (score["district"], score["benchmark_scope"]) == (None, "market")
+    assert score["benchmark_price_per_m2"] == pytest.approx(4.36)
+
+
+def test_missing_numbers_or_market_give_no_verdict(listing, market_data):
+    index = MarketIndex(market_data)
+    assert score_listing(replace(listing, area_m2=None), index)["verdict"] is None
+    assert score_listing(listing, None)["verdict"] is None
+    score = score_listing(listing, MarketIndex({}))
+    assert score["verdict"] is None
+    assert describe_verdict(score) == "**Insufficient data**"
+
+
+def test_zero_benchmark_is_treated_as_missing(listing, market_data):
+    market_data["new_apartment_prices"].loc[0, "2025 Mar"] = 0.0
+    market_data["old_apartment_prices"].loc[0, "2025 Mar"] = 0.0
+    score = score_listing(listing, MarketIndex(market_data))
+    assert score["benchmark_scope"] == "market"  # Bayangol's zero prices are no benchmark
+    assert score["verdict"] == "overpriced"
+
+    no_prices = {"new_apartment_prices": pd.DataFrame({"District": ["Bayangol"],
+                                                       "2025 Mar": [0.0]})}
+    score = score_listing(listing, MarketIndex(no_prices))
+    assert (score["price_per_m2"], score["verdict"]) == (pytest.approx(4.828), None)
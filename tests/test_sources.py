@@ -0,0 +1,98 @@
+# tests/test_sources.py
+import threading
+import time
+
+import pytest
+
+from real_estate_assistant.sources import registry
+from real_estate_assistant.sources.base import SourceAdapter
+from real_estate_assistant.sources.scheduler import FetchScheduler, HostGate
+
+UNEGUI_PAGE = (
+    "<html><body><section class='list-announcement' data-price='239000000'>"
+    "<h1>Төмөр замд 2 өрөө байр зарна</h1><ul class='chars-column'>"
+    "<li><span class='key-chars'>Байршил:</span><a class='value-chars'>Баянгол дүүрэг</a></li>"
+    "<li><span class='key-chars'>Талбай:</span><a class='value-chars'>49.5 м²</a></li>"
+    "<li><span class='key-chars'>Өрөө:</span><a class='value-chars'>2</a></li></ul>"
+    "</section></body></html>"
+)
+REMAX_PAGE = (
+    "<html><head><script type='application/ld+json'>"
+    '{"@type": "Apartment", "floorSize": {"value": 82}, "numberOfRooms": 3}'
+    "</script></head><body><h1 class='property-title'>Luxury flat near the park</h1>"
+    "<div class='property-price'>450 сая ₮</div>"
+    "<div class='property-address'>Хан-Уул дүүрэг, 11-р хороо</div></body></html>"
+)
+
+
+@pytest.mark.parametrize("url, name, listing_url", [
+    ("https://www.unegui.mn/adv/9129580_tomor-zamd/", "unegui", True),
+    ("https://m.unegui.mn/l-hdlh/", "unegui", False),
+    ("https://remax.mn/listing/42-flat", "remax", True),
+    ("https://1212.mn/stat.aspx?LIST_ID=976_L4_B1", "1212", True),
+    ("http://localhost:8000/saved.html", "unegui", False),  # Unknown hosts parse as unegui.mn
+])
+def test_adapter_for_url(url, name, listing_url):
+    assert registry.adapter_for(url).name == name
+    assert registry.is_listing_url(url) == listing_url
+
+
+def test_unegui_page_is_parsed():
+    listing = registry.adapter_for("https://www.unegui.mn/adv/1/").parse(
+        UNEGUI_PAGE, "https://www.unegui.mn/adv/1/")
+    assert (listing.title, listing.location) == ("Төмөр замд 2 өрөө байр зарна", "Баянгол дүүрэг")
+    assert (listing.price_mnt, listing.area_m2, listing.rooms) == (239e6, 49.5, 2)
+
+
+def test_remax_page_falls_back_to_structured_metadata():
+    listing = registry.adapter_for("https://remax.mn/listing/42").parse(
+        REMAX_PAGE, "https://remax.mn/listing/42")
+    assert (listing.title, listing.price_mnt) == ("Luxury flat near the park", 450e6)
+    assert listing.resolved_district == "Khan-Uul"
+    assert (listing.area_m2, listing.rooms) == (82, 3)
+
+
+@pytest.fixture
+def limited_host(monkeypatch):
+    """An unthrottled test host that allows two requests in flight."""
+
+    class TestSource(SourceAdapter):
+        name = "test"
+        hosts = ("listings.test",)
+        max_concurrency = 2
+
+    monkeypatch.setattr(registry, "SOURCES", [TestSource(), *registry.SOURCES])
+    return "listings.test"
+
+
+def test_map_keeps_each_host_within_its_concurrency(limited_host):
+    scheduler = FetchScheduler(max_workers=8)
+    in_flight, peak = {}, {}
+    lock = threading.Lock()
+
+    def fetch(url):
+        host = url.split("/")[2]
+        with scheduler.slot(url):
+            with lock:
+                in_flight[host] = in_flight.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), in_flight[host])
+            time.sleep(0.02)
+            with lock:
+                in_flight[host] -= 1
+        return url
+
+    urls = [f"https://{host}/adv/{i}/" for i in range(6) for host in (limited_host, "other.test")]
+    assert scheduler.map(fetch, urls) == urls
+    assert peak[limited_host] == 2
+    assert peak["other.test"] > 2  # Unknown hosts are only bounded by the worker count
+    assert scheduler.stats()[limited_host]["requests"] == 6
+
+
+def test_gate_spaces_requests_past_the_burst():
+    gate = HostGate(requests_per_minute=600, burst=1)  # One request every 0.1 s
+    with gate.slot() as first:
+        pass
+    with gate.slot() as second:
+        pass
+    assert first == 0.0
+    assert second == pytest.approx(0.1, abs=0.05)
@@ -0,0 +1,31 @@
+# tests/test_startup.py
+"""
+The CLI must show its first prompt quickly: `import main` stays within the startup budget and
+leaves the heavy libraries to be imported on first use (see benchmarks/bench_startup.py).
+"""
+import os
+
+from benchmarks.bench_startup import DEFAULT_BUDGET_MS, DEFERRED_MODULES, measure_import
+
+RUNS = 3
+BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS))
+
+
+def _best_import():
+    return min((measure_import("main") for _ in range(RUNS)), key=lambda run: run["total_ms"])
+
+
+def test_import_main_within_budget():
+    best = _best_import()
+    assert best["total_ms"] <= BUDGET_MS, (
+        f"import main took {best['total_ms']:.1f} ms (budget {BUDGET_MS:.0f} ms)"
+    )
+
+
+def test_heavy_modules_deferred():
+    loaded = measure_import("main")["modules"]
+    eager = [
+        name for name in DEFERRED_MODULES
+        if any(module == name or module.startswith(name + ".") for module in loaded)
+    ]
+    assert not eager, f"imported at startup: {', '.join(eager)}"
@@ -0,0 +1,68 @@
+# tests/test_tracing.py
+import asyncio
+
+import pytest
+
+from real_estate_assistant.tracing import (
+    CollectingExporter,
+    add_exporter,
+    current_span,
+    remove_exporter,
+    span,
+    summarize,
+    traced,
+)
+
+
+@pytest.fixture
+def collector():
+    exporter = add_exporter(CollectingExporter())
+    yield exporter
+    remove_exporter(exporter)
+
+
+def test_spans_nest_under_the_enclosing_span(collector):
+    @traced("parse")
+    def parse(text):
+        current_span().set(bytes=len(text))
+        return text.split()
+
+    with span("request", url="https://www.unegui.mn/adv/1/") as root:
+        with span("fetch"):
+            pass
+        parse("two words")
+
+    fetch, parsed, request = collector.spans  # Exported as they end
+    assert request is root and request.parent_id is None
+    assert fetch.parent_id == parsed.parent_id == root.span_id
+    assert {s.trace_id for s in collector.spans} == {root.trace_id}
+    assert parsed.attrs == {"bytes": 9}
+    assert [line.split()[0] for line in summarize(collector.trace(root.trace_id))] == [
+        "request", "fetch", "parse"]
+
+
+def test_errors_are_recorded_and_raised(collector):
+    with pytest.raises(ValueError):
+        with span("broken"):
+            raise ValueError("bad page")
+    [broken] = collector.spans
+    assert (broken.status, broken.error) == ("error", "ValueError: bad page")
+    assert current_span().set(ignored=True) is not None  # Outside any span: a no-op
+
+
+def test_concurrent_tasks_keep_their_own_parent(collector):
+    @traced("task")
+    async def task(delay):
+        await asyncio.sleep(delay)
+        with span("inner"):
+            pass
+
+    async def run():
+        with span("batch") as batch:
+            await asyncio.gather(task(0.02), task(0))
+        return batch
+
+    batch = asyncio.run(run())
+    tasks = {s.span_id for s in collector.spans if s.name == "task"}
+    assert {s.parent_id for s in collector.spans if s.name == "task"} == {batch.span_id}
+    assert {s.parent_id for s in collector.spans if s.name == "inner"} == tasks